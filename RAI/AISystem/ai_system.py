@@ -17,10 +17,12 @@
 from copy import deepcopy
 
 
-from RAI.AISystem.model import Model
+from RAI.AISystem.model import Model, _concatenate
 from RAI.certificates import CertificateManager
 from RAI.dataset.dataset import Data, NumpyData, IteratorData, Dataset, MetaDatabase
 from RAI.metrics import MetricManager
+from RAI.metrics.compute_memo import ComputeMemo
+from RAI.metrics.metric_window import MetricWindow
 from RAI.all_types import all_output_requirements, all_task_types, all_metric_types
 
 
@@ -63,6 +65,9 @@ class AISystem:
         self.data_dict = {}
         self.custom_metrics = {}
         self.custom_functions = []
+        self._update_data_type = None
+        self.windows = []
+        self._prediction_cache = {}
 
     def initialize(self, user_config: dict = {},
                    custom_certificate_location: str = None,
@@ -80,9 +85,7 @@ class AISystem:
         self.user_config = user_config
         self.custom_metrics = custom_metrics
         self.custom_functions = custom_functions
-        masks = {"scalar": self.meta_database.scalar_mask, "categorical": self.meta_database.categorical_mask,
-                 "image": self.meta_database.image_mask, "text": self.meta_database.text_mask}
-        self.dataset.separate_data(masks)
+        self.dataset.separate_data(self._get_masks())
         self.meta_database.initialize_requirements(self.dataset, "fairness" in user_config)
         self.metric_manager = MetricManager(self)
         self.certificate_manager = CertificateManager()
@@ -90,6 +93,10 @@ class AISystem:
         if custom_certificate_location is not None:
             self.certificate_manager.load_custom_certificates(custom_certificate_location)
 
+    def _get_masks(self) -> dict:
+        return {"scalar": self.meta_database.scalar_mask, "categorical": self.meta_database.categorical_mask,
+                "image": self.meta_database.image_mask, "text": self.meta_database.text_mask}
+
     def get_metric_values(self) -> dict:
         """
         Returns the last metric values in the form of key value pair
@@ -243,7 +250,7 @@ class AISystem:
         }
         return summary
 
-    def _single_compute(self, predictions: dict, data_type: str = "test", tag=None) -> None:
+    def _single_compute(self, predictions: dict, data_type: str = "test", tag=None, parallelism: int = None) -> None:
         # Single compute accepts predictions and the name of a dataset, and then calculates metrics for that dataset.
         self.auto_id += 1
         if tag is None:
@@ -257,8 +264,12 @@ class AISystem:
         data_dict["tag"] = tag
         self.data_dict = data_dict
         self.metric_manager.initialize(self.user_config)
+        self._update_data_type = None
         key = data_type if data_type is not None else "No Dataset"
-        if isinstance(data_dict["data"], NumpyData):
+        if parallelism is not None and isinstance(data_dict["data"], (NumpyData, IteratorData)):
+            self._last_metric_values[key] = \
+                self.metric_manager.sharded_compute(data_dict, parallelism, predictions)
+        elif isinstance(data_dict["data"], NumpyData):
             self._last_metric_values[key] = \
                 self.metric_manager.compute(data_dict)
         elif isinstance(data_dict["data"], IteratorData):
@@ -268,13 +279,15 @@ class AISystem:
             self._last_certificate_values = self.certificate_manager.compute(self._last_metric_values.get(key))
 
     # Compute will tell RAI to compute metric values across each dataset which predictions were made on.
-    def compute(self, predictions: dict, tag=None) -> None:
+    def compute(self, predictions: dict, tag=None, parallelism: int = None) -> None:
 
         """
         Compute will tell RAI to compute metric values across each dataset which predictions were made on
 
         :param predictions(dict): Prediction value from the classifier
         :param tag: by default None
+        :param parallelism: number of processes computing shards of each dataset, see MetricManager.sharded_compute.
+            By default every dataset is computed in this process
         :return: None
         """
         self._last_metric_values = {}
@@ -287,30 +300,175 @@ class AISystem:
             raise Exception("Prediction dictionary should be in the form [dataset][output_type] -> nd.array")
         for key in predictions.keys():
             if key in self.dataset.data_dict.keys():
-                self._single_compute(predictions[key], key, tag=tag)
+                self._single_compute(predictions[key], key, tag=tag, parallelism=parallelism)
 
         self.add_certificates()
         self.add_custom_metrics()
 
+    # Compute models evaluates several prediction sets on the same datasets, sharing the groups which only use the data
+    def compute_models(self, predictions: dict, models: dict = None, on_model=None) -> dict:
+        """
+        Computes metric values for several models evaluated on the same datasets.
+        Metric groups which only depend on the data are computed once per dataset and shared by every model,
+        the other metric groups are computed once per model. Each model becomes its own measurement, tagged with its key.
+
+        :param predictions: Predictions of each model in the form [tag][dataset][output_type] -> nd.array.
+            Every model must provide the same datasets and output types
+        :param models: Model which made the predictions of each tag, by default self.model describes every tag
+        :param on_model: Called with the tag once the metric and certificate values of a model are set,
+            for example lambda tag: rai_db.add_measurement()
+        :return: Metric values of each model in the form [tag][dataset][metric_group]
+        """
+        assert isinstance(predictions, dict) and len(predictions) > 0, "predictions should map each tag to its predictions"
+        tags = list(predictions)
+        first = predictions[tags[0]]
+        for tag in tags:
+            assert predictions[tag].keys() == first.keys() and \
+                all(predictions[tag][key].keys() == first[key].keys() for key in first), \
+                f"Predictions of {tag} do not have the same datasets and output types as {tags[0]}"
+        if models is not None:
+            assert all(tag in models for tag in tags), "models should contain the Model of each tag"
+
+        original_model = self.model
+        values = {tag: {} for tag in tags}
+        try:
+            for data_type in first:
+                if len(self.dataset.data_dict) > 0 and data_type not in self.dataset.data_dict:
+                    continue
+                key = data_type if len(self.dataset.data_dict) > 0 else None
+                by_tag = {tag: predictions[tag][data_type] for tag in tags}
+                for tag, result in self._compute_models_on(key, by_tag, models).items():
+                    values[tag][key if key is not None else "No Dataset"] = result
+
+            for tag in tags:
+                if models is not None:
+                    self.model = models[tag]
+                self._last_metric_values = values[tag]
+                if self.enable_certificates and len(values[tag]) > 0:
+                    self._last_certificate_values = self.certificate_manager.compute(list(values[tag].values())[-1])
+                self.add_certificates()
+                self.add_custom_metrics()
+                if on_model is not None:
+                    on_model(tag)
+        finally:
+            self.model = original_model
+        return values
+
+    def _compute_models_on(self, data_type: str, predictions: dict, models: dict = None) -> dict:
+        # Computes the data only groups once, then the remaining groups for the predictions of each tag
+        data = self.get_data(data_type)
+        if not isinstance(data, NumpyData):
+            result = {}
+            for tag in predictions:
+                if models is not None:
+                    self.model = models[tag]
+                self._single_compute(predictions[tag], data_type, tag=tag)
+                result[tag] = self._last_metric_values[data_type if data_type is not None else "No Dataset"]
+            return result
+
+        data_dict = {"data": data}
+        shared = ComputeMemo()
+        data_values = None
+        result = {}
+        try:
+            for tag in predictions:
+                if models is not None:
+                    self.model = models[tag]
+                self.auto_id += 1
+                for output_type in all_output_requirements:
+                    if output_type in predictions[tag]:
+                        data_dict[output_type] = predictions[tag][output_type]
+                data_dict["tag"] = tag
+                self.data_dict = data_dict
+                # Compatibility of the groups may depend on the model
+                if data_values is None or models is not None:
+                    self.metric_manager.initialize(self.user_config)
+                self._update_data_type = None
+                groups = self.metric_manager.metric_groups
+                if data_values is None:
+                    data_values = self.metric_manager.compute(
+                        data_dict, [name for name in groups if groups[name].is_data_only()], shared)
+                model_values = self.metric_manager.compute(
+                    data_dict, [name for name in groups if not groups[name].is_data_only()], shared.copy())
+                result[tag] = {name: data_values[name] if name in data_values else model_values[name]
+                               for name in groups if name in data_values or name in model_values}
+        finally:
+            shared.clear()
+        return result
+
     # Run Compute automatically generates outputs from the model, and compute metrics based on those outputs
-    def run_compute(self, tag=None) -> None:
+    def run_compute(self, tag=None, parallelism: int = None) -> None:
         """
         Run Compute automatically generates outputs from the model, and compute metrics based on those outputs
 
         :param tag: tag by default None or we can pass model as a string
+        :param parallelism: number of processes computing shards of each dataset, see MetricManager.sharded_compute.
+            The values match those of a compute without parallelism, the summary statistics are only merged from
+            quantile sketches of the shards when user_config["stats"]["quantile_tolerance"] is set
 
         :return: Data Summary(Dict)
 
         """
         self._last_metric_values = {}
         preds = {}
+        fingerprint = self.model.fingerprint()
         for category in self.dataset.data_dict:
             preds[category] = {}
-            data = self.dataset.data_dict[category].X
             for function_type in self.model.output_types:
-                preds[category][function_type] = self.model.output_types[function_type](data)
+                preds[category][function_type] = self._get_predictions(category, function_type, fingerprint)
         for key in preds:
-            self._single_compute(preds[key], key)
+            self._single_compute(preds[key], key, tag=tag, parallelism=parallelism)
+
+    def get_predictions(self, data_type: str, output_type: str = "predict"):
+        """
+        Returns the model outputs of output_type for a dataset, running the model in batches on the first call.
+        Outputs are cached by model fingerprint, dataset and output type, so later run_compute calls and analyses
+        reuse them while the model is unchanged. The fingerprint is computed again on every call, so a retrained
+        or replaced agent runs the model again. user_config["inference"] can set the "batch_size", the "executor"
+        ("thread" or "process") and "max_workers" of Model.infer, and "cache": False turns the cache off.
+
+        :param data_type: name of the dataset, for example "test"
+        :param output_type: output type of the model, by default "predict"
+
+        :return: model outputs for every row of the dataset
+        """
+        return self._get_predictions(data_type, output_type, self.model.fingerprint())
+
+    def clear_prediction_cache(self) -> None:
+        """
+        Removes the cached model outputs of every dataset
+
+        :return: None
+        """
+        self._prediction_cache = {}
+
+    def _get_predictions(self, data_type: str, output_type: str, fingerprint: str):
+        config = self._inference_config()
+        use_cache = config.get("cache", True)
+        key = (fingerprint, data_type, output_type)
+        if use_cache and key in self._prediction_cache:
+            return self._prediction_cache[key]
+        data = self.get_data(data_type)
+        if isinstance(data, IteratorData):
+            outputs = []
+            data.reset()
+            while data.next_batch():
+                outputs.append(self._infer(output_type, data.X, config))
+            result = _concatenate(outputs) if outputs else []
+        else:
+            result = self._infer(output_type, data.X, config)
+        if use_cache:
+            # Outputs of a previous version of the model are not needed anymore
+            self._prediction_cache = {k: v for k, v in self._prediction_cache.items() if k[0] == fingerprint}
+            self._prediction_cache[key] = result
+        return result
+
+    def _infer(self, output_type: str, X, config: dict):
+        return self.model.infer(output_type, X, batch_size=config.get("batch_size"), executor=config.get("executor"),
+                                max_workers=config.get("max_workers"))
+
+    def _inference_config(self) -> dict:
+        return (self.user_config or {}).get("inference", {})
 
     def get_metric_info(self):
         """
@@ -333,6 +491,60 @@ class AISystem:
         """
         return self.certificate_manager.get_metadata()
 
-    # we have not implemented the incremental update as of now and each call to compute process all the data
-    def update(self, data):
-        raise NotImplementedError
+    def add_window(self, size: float, step: float = None, data_type: str = None, on_window=None) -> MetricWindow:
+        """
+        Adds a tumbling or sliding time window over the batches passed to update.
+        Each window emits its metric values once a batch arrives after its end, for example to RaiDB.add_measurement
+        so the dashboard graphs show one point per window.
+
+        :param size: length of a window in seconds, a multiple of step
+        :param step: seconds between the starts of two windows, by default size for tumbling windows
+        :param data_type: name the window values are stored under, by default "window_<size>s"
+        :param on_window: called with the metric values of each window, for example RaiDB.add_measurement
+
+        :return: the MetricWindow, whose flush method emits the open windows
+        """
+        if data_type is None:
+            data_type = f"window_{size:g}s"
+        window = MetricWindow(self.metric_manager, size, step, data_type, on_window)
+        self.windows.append(window)
+        return window
+
+    # Update folds a new batch into the running metric values, instead of processing all the data again like compute
+    def update(self, X, y=None, predictions: dict = None, data_type: str = "update", tag=None, timestamp: float = None) -> None:
+        """
+        Folds a batch of new samples into the metric values of the previous updates on data_type,
+        so metrics can be monitored continuously at a cost that only depends on the size of the batch.
+        The first update on a data_type, or the first one after a compute, starts from empty metric groups.
+        The batch is also folded into the windows added with add_window.
+
+        :param X: features of the batch
+        :param y: labels of the batch, by default None
+        :param predictions(dict): model outputs of the batch by output type, computed with the model when None
+        :param data_type: name the running metric values are stored under, by default "update"
+        :param tag: by default None
+        :param timestamp: time of the batch in seconds since the epoch used by the windows, by default now
+
+        :return: None
+        """
+        if predictions is None:
+            config = self._inference_config()
+            predictions = {output_type: self._infer(output_type, X, config) for output_type in self.model.output_types}
+        data = NumpyData(X, y)
+        data.initialize(self._get_masks())
+        self.auto_id += 1
+        data_dict = {"data": data, "tag": tag if tag is not None else f"{self.auto_id}"}
+        for output_type in all_output_requirements:
+            if output_type in predictions:
+                data_dict[output_type] = predictions[output_type]
+        if self._update_data_type != data_type:
+            self.data_dict = data_dict
+            self.metric_manager.initialize(self.user_config)
+            self._update_data_type = data_type
+        self._last_metric_values = {data_type: self.metric_manager.update(data_dict)}
+        for window in self.windows:
+            window.update(data_dict, timestamp)
+        if self.enable_certificates:
+            self._last_certificate_values = self.certificate_manager.compute(self._last_metric_values[data_type])
+        self.add_certificates()
+        self.add_custom_metrics()
@@ -15,7 +15,12 @@
 # SPDX-License-Identifier: Apache-2.0
 
 __all__ = ['Model']
+import hashlib
+import pickle
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import numpy as np
 import RAI.dataset
+from RAI.utils.utils import timed_import
 
 
 class Model:
@@ -58,3 +63,59 @@ class Model:
         self.optimizer = optimizer
         self.model_class = model_class
         self.description = description
+
+    def infer(self, output_type: str, X, batch_size: int = None, executor: str = None, max_workers: int = None):
+        """
+        Runs the output function of output_type on X, in batches of batch_size rows when set, and joins the outputs.
+        Batches run one after the other, or on a "thread" or "process" pool, which needs a picklable output function.
+
+        :param output_type: output type of the function, for example "predict"
+        :param X: input rows
+        :param batch_size: maximum number of rows per call, by default all rows in one call
+        :param executor: None, "thread" or "process"
+        :param max_workers: maximum number of workers, by default chosen by the executor
+
+        :return: outputs of the rows of X
+        """
+        function = self.output_types[output_type]
+        if batch_size is None or len(X) <= batch_size:
+            return function(X)
+        batches = [X[start:start + batch_size] for start in range(0, len(X), batch_size)]
+        if executor is None:
+            outputs = [function(batch) for batch in batches]
+        else:
+            assert executor in ("thread", "process"), "executor must be one of None, 'thread' or 'process'"
+            pool_class = ThreadPoolExecutor if executor == "thread" else ProcessPoolExecutor
+            with pool_class(max_workers=max_workers) as pool:
+                outputs = list(pool.map(function, batches))
+        return _concatenate(outputs)
+
+    def fingerprint(self) -> str:
+        """
+        Returns a digest of the model's name, output functions and agent, which changes when the agent is retrained.
+        The parameters of torch modules are hashed directly, other agents are pickled, and agents which cannot
+        be pickled are identified by their id.
+
+        :return: hex digest
+        """
+        digest = hashlib.sha1(repr((self.name, sorted((output_type, getattr(function, "__qualname__", ""), id(function))
+                                                      for output_type, function in self.output_types.items()))).encode())
+        if hasattr(self.agent, "state_dict"):
+            for name, tensor in self.agent.state_dict().items():
+                digest.update(name.encode())
+                digest.update(tensor.detach().cpu().numpy().tobytes())
+        elif self.agent is not None:
+            try:
+                digest.update(pickle.dumps(self.agent))
+            except Exception:
+                digest.update(str(id(self.agent)).encode())
+        return digest.hexdigest()
+
+
+# Joins the outputs of each batch, lists are chained and arrays or tensors are concatenated along the first axis
+def _concatenate(outputs):
+    if isinstance(outputs[0], list):
+        return [value for output in outputs for value in output]
+    if hasattr(outputs[0], "detach"):
+        return timed_import("torch").cat(outputs)
+    return np.concatenate(outputs)
@@ -0,0 +1,138 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+__all__ = ['clever_scores']
+
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import numpy as np
+from art.config import ART_NUMPY_DTYPE
+from art.utils import random_sphere
+from scipy.optimize import fmin
+from scipy.stats import weibull_min
+
+# Gradients are measured in the dual norm of the perturbation norm, q = p / (p - 1)
+_DUAL_NORMS = {1: np.inf, 2: 2, np.inf: 1}
+
+
+def clever_scores(classifier, x, radii: dict, nb_batches: int = 10, batch_size: int = 5, pool_factor: int = 3,
+                  c_init: float = 1.0, gradient_batch_size: int = 256, executor: str = None, max_workers: int = None,
+                  on_example=None):
+    """
+    Computes the targeted CLEVER scores of many examples against every class, for several norms at once.
+    Follows art.metrics.clever_t, but the perturbation balls of all examples and norms are sampled together,
+    their gradients are computed in batches of gradient_batch_size points, and the gradient of each point is
+    measured against every class instead of once per target class. Gradient batches run in this thread, as ART
+    classifiers are not thread safe, and with an executor the Weibull fits of each example run on its pool. The fits
+    hold the GIL, so only a "process" pool runs them in parallel. The untargeted score of an example is the minimum
+    of its targeted scores.
+
+    :param classifier: ART classifier providing class gradients
+    :param x: examples, with the batch along the first axis
+    :param radii: radius of the perturbation ball of each norm, norms may be 1, 2 or np.inf
+    :param nb_batches: number of batches of gradient norms the Weibull distribution is fit on
+    :param batch_size: number of gradient norms per batch
+    :param pool_factor: the pool of each example and norm holds pool_factor * batch_size points
+    :param c_init: initial shape of the Weibull distribution
+    :param gradient_batch_size: number of points per class gradient call
+    :param executor: None, "thread" or "process", the pool running the Weibull fits
+    :param max_workers: maximum number of workers, by default chosen by the executor
+    :param on_example: optional function called with the index of each example once its scores are computed
+
+    :return: predicted class of each example, and a dictionary mapping each norm to an array of shape
+             (examples, classes) of targeted scores, nan for the predicted class
+    """
+    x = np.asarray(x, dtype=ART_NUMPY_DTYPE)
+    norms = list(radii)
+    for norm in norms:
+        if norm not in _DUAL_NORMS:
+            raise ValueError(f"Norm {norm} not supported")
+    if pool_factor < 1:
+        raise ValueError("The `pool_factor` must be larger than 1.")
+    n_examples, shape = len(x), x.shape[1:]
+    pool_size = pool_factor * batch_size
+
+    values = classifier.predict(x)
+    predicted = np.argmax(values, axis=1)
+    nb_classes = values.shape[1]
+
+    # Pool of points around each example for each norm, as rows of shape (examples * norms * pool_size, *shape)
+    pool = np.stack([random_sphere(n_examples * pool_size, int(np.prod(shape)), radii[norm], norm)
+                     .reshape(n_examples, pool_size, *shape) for norm in norms], axis=1)
+    pool = (pool + x[:, None, None]).astype(ART_NUMPY_DTYPE).reshape(-1, *shape)
+    if getattr(classifier, "clip_values", None) is not None:
+        np.clip(pool, classifier.clip_values[0], classifier.clip_values[1], out=pool)
+    point_class = np.repeat(predicted, len(norms) * pool_size)
+    point_norm = np.tile(np.repeat([_DUAL_NORMS[norm] for norm in norms], pool_size), n_examples)
+
+    def gradient_norms(start):
+        stop = start + gradient_batch_size
+        return _gradient_norms(classifier, pool[start:stop], point_class[start:stop], point_norm[start:stop])
+
+    assert executor in (None, "thread", "process"), "executor must be one of None, 'thread' or 'process'"
+    norms_per_point = [gradient_norms(start) for start in range(0, len(pool), gradient_batch_size)]
+    norms_per_point = np.concatenate(norms_per_point).reshape(n_examples, len(norms), pool_size, nb_classes)
+
+    # Batch maxima of the gradient norms, drawn independently for each class as clever_t does, with np.random
+    indices = np.random.choice(pool_size, (n_examples, len(norms), nb_classes, nb_batches * batch_size))
+    maxima = np.take_along_axis(norms_per_point.transpose(0, 1, 3, 2), indices, axis=3)
+    maxima = maxima.reshape(n_examples, len(norms), nb_classes, nb_batches, batch_size).max(axis=4)
+    # Margin between the predicted class and each other class at the examples themselves
+    margins = values[np.arange(n_examples), predicted][:, None] - values
+    tasks = [(maxima[i], margins[i], predicted[i], [radii[norm] for norm in norms], c_init) for i in range(n_examples)]
+
+    if executor is None:
+        fitted = map(_fit_scores, tasks)
+    else:
+        pool_executor = (ThreadPoolExecutor if executor == "thread" else ProcessPoolExecutor)(max_workers=max_workers)
+        fitted = pool_executor.map(_fit_scores, tasks)
+    scores = {norm: np.full((n_examples, nb_classes), np.nan) for norm in norms}
+    try:
+        for i, example_scores in enumerate(fitted):
+            for j, norm in enumerate(norms):
+                scores[norm][i] = example_scores[j]
+            if on_example is not None:
+                on_example(i)
+    finally:
+        if executor is not None:
+            pool_executor.shutdown()
+    return predicted, scores
+
+
+# Fits the Weibull distribution of the batch maxima of one example for each norm and class, and returns its scores
+def _fit_scores(task):
+    maxima, margins, predicted, radii, c_init = task
+    scores = np.full(maxima.shape[:2], np.nan)
+    for j, radius in enumerate(radii):
+        for target in range(maxima.shape[1]):
+            if target == predicted:
+                continue
+            _, loc, _ = weibull_min.fit(-maxima[j, target], c_init, optimizer=fmin)
+            scores[j, target] = min(-margins[target] / loc, radius)
+    return scores
+
+
+# Norms of the difference between the gradient of the predicted class and the gradient of each class, for each point
+def _gradient_norms(classifier, points, point_class, point_norm):
+    gradients = classifier.class_gradient(points)
+    if np.isnan(gradients).any():
+        raise Exception("The classifier results NaN gradients.")
+    gradients = gradients.reshape(len(points), gradients.shape[1], -1)
+    differences = gradients[np.arange(len(points)), point_class][:, None] - gradients
+    result = np.empty(differences.shape[:2], dtype=differences.dtype)
+    for norm in np.unique(point_norm):
+        rows = point_norm == norm
+        result[rows] = np.linalg.norm(differences[rows], ord=norm, axis=2)
+    return result
@@ -21,7 +21,7 @@ from RAI.AISystem import AISystem
 from RAI.Analysis import Analysis
 from RAI.dataset import IteratorData, NumpyData
 from art.estimators.classification import PyTorchClassifier
-from art.metrics import clever_t
+from .clever import clever_scores
 import os
 from dash import html, dcc, dash_table
 import plotly.graph_objs as go
@@ -38,6 +38,12 @@ class CleverTargetedScore(Analysis, class_location=os.path.abspath(__file__)):
         self.R_L1 = 40
         self.R_L2 = 2
         self.R_LI = 0.1
+        self.NB_BATCHES = 10
+        self.BATCH_SIZE = 5
+        self.POOL_FACTOR = 3
+        self.GRADIENT_BATCH_SIZE = 256
+        self.EXECUTOR = None
+        self.MAX_WORKERS = None
 
     def initialize(self):
         if self.result is None:
@@ -48,7 +54,7 @@ class CleverTargetedScore(Analysis, class_location=os.path.abspath(__file__)):
         output_features = self.ai_system.model.output_features[0].values
         self.output_features = output_features.copy()
         numClasses = len(output_features)
-        self.max_progress_tick = self.EXAMPLES_PER_CLASS * numClasses * (numClasses - 1) + 2
+        self.max_progress_tick = self.EXAMPLES_PER_CLASS * numClasses + 2
         self.progress_tick()
 
         data = self.ai_system.get_data(self.dataset)
@@ -68,21 +74,28 @@ class CleverTargetedScore(Analysis, class_location=os.path.abspath(__file__)):
         classifier = PyTorchClassifier(model=self.ai_system.model.agent, loss=self.ai_system.model.loss_function,
                                        optimizer=self.ai_system.model.optimizer, input_shape=shape, nb_classes=numClasses)
 
-        for target_class in balanced_classifications:
-            for example in balanced_classifications[target_class]:
+        examples = [(target_class, example) for target_class in balanced_classifications
+                    for example in balanced_classifications[target_class]]
+        if examples:
+            _, scores = self._clever_scores(classifier, np.array([example for _, example in examples]))
+            for i, (target_class, _) in enumerate(examples):
                 for val in output_features:
                     if val == target_class:
                         continue
-                    result['clever_t_l1'][val].append(clever_t(classifier, example, val, 10, 5, self.R_L1, norm=1, pool_factor=3))
-                    result['clever_t_l2'][val].append(clever_t(classifier, example, val, 10, 5, self.R_L2, norm=2, pool_factor=3))
-                    result['clever_t_li'][val].append(clever_t(classifier, example, val, 10, 5, self.R_LI, norm=np.inf, pool_factor=3))
-                    self.progress_tick()
+                    result['clever_t_l1'][val].append(float(scores[1][i, val]))
+                    result['clever_t_l2'][val].append(float(scores[2][i, val]))
+                    result['clever_t_li'][val].append(float(scores[np.inf][i, val]))
         result['total_images'] = 0
         result['total_classes'] = len(result['clever_t_l1'])
         for val in balanced_classifications:
             result['total_images'] += len(balanced_classifications[val])
         return result
 
+    def _clever_scores(self, classifier, examples):
+        return clever_scores(classifier, examples, {1: self.R_L1, 2: self.R_L2, np.inf: self.R_LI}, self.NB_BATCHES,
+                             self.BATCH_SIZE, self.POOL_FACTOR, gradient_batch_size=self.GRADIENT_BATCH_SIZE,
+                             executor=self.EXECUTOR, max_workers=self.MAX_WORKERS, on_example=lambda i: self.progress_tick())
+
     def _get_balanced_correct_classifications(self, predict_fun, xData, yData, class_values):
         result_balanced = {i: [] for i in class_values}
         total_images = len(class_values) * self.EXAMPLES_PER_CLASS
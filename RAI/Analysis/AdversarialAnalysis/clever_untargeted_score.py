@@ -20,7 +20,7 @@ from RAI.AISystem import AISystem
 from RAI.Analysis import Analysis
 from RAI.dataset import IteratorData, NumpyData
 from art.estimators.classification import PyTorchClassifier
-from art.metrics import clever_u
+from .clever import clever_scores
 import os
 from dash import html, dcc, dash_table
 import plotly.graph_objs as go
@@ -38,6 +38,12 @@ class CleverUntargetedScore(Analysis, class_location=os.path.abspath(__file__)):
         self.R_L1 = 40
         self.R_L2 = 2
         self.R_LI = 0.1
+        self.NB_BATCHES = 10
+        self.BATCH_SIZE = 5
+        self.POOL_FACTOR = 3
+        self.GRADIENT_BATCH_SIZE = 256
+        self.EXECUTOR = None
+        self.MAX_WORKERS = None
 
     def initialize(self):
         if self.result is None:
@@ -67,20 +73,26 @@ class CleverUntargetedScore(Analysis, class_location=os.path.abspath(__file__)):
                 self.ai_system.model.predict_fun, data, output_features)
         classifier = PyTorchClassifier(model=self.ai_system.model.agent, loss=self.ai_system.model.loss_function,
                                        optimizer=self.ai_system.model.optimizer, input_shape=shape, nb_classes=numClasses)
-        result['total_images'] = 0
 
         self.progress_tick()
 
-        for target_class in balanced_classifications:
-            result['total_images'] += len(balanced_classifications[target_class])
-            for example in balanced_classifications[target_class]:
-                result['clever_u_l1'][target_class].append(clever_u(classifier, example, 10, 5, self.R_L1, norm=1, pool_factor=3, verbose=False))
-                result['clever_u_l2'][target_class].append(clever_u(classifier, example, 10, 5, self.R_L2, norm=2, pool_factor=3, verbose=False))
-                result['clever_u_li'][target_class].append(clever_u(classifier, example, 10, 5, self.R_LI, norm=np.inf, pool_factor=3, verbose=False))
-                self.progress_tick()
+        examples = [(target_class, example) for target_class in balanced_classifications
+                    for example in balanced_classifications[target_class]]
+        result['total_images'] = len(examples)
+        if examples:
+            _, scores = self._clever_scores(classifier, np.array([example for _, example in examples]))
+            for (target_class, _), l1, l2, li in zip(examples, *(np.nanmin(scores[norm], axis=1) for norm in (1, 2, np.inf))):
+                result['clever_u_l1'][target_class].append(float(l1))
+                result['clever_u_l2'][target_class].append(float(l2))
+                result['clever_u_li'][target_class].append(float(li))
         result['total_classes'] = len(result['clever_u_l1'])
         return result
 
+    def _clever_scores(self, classifier, examples):
+        return clever_scores(classifier, examples, {1: self.R_L1, 2: self.R_L2, np.inf: self.R_LI}, self.NB_BATCHES,
+                             self.BATCH_SIZE, self.POOL_FACTOR, gradient_batch_size=self.GRADIENT_BATCH_SIZE,
+                             executor=self.EXECUTOR, max_workers=self.MAX_WORKERS, on_example=lambda i: self.progress_tick())
+
     def _get_balanced_correct_classifications(self, predict_fun, xData, yData, class_values):
         result_balanced = {i: [] for i in class_values}
         total_images = len(class_values) * self.EXAMPLES_PER_CLASS
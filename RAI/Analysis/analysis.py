@@ -82,7 +82,7 @@ class Analysis(ABC):
         Shows the progress percent value
         """
         percentage_complete = int(percentage_complete)
-        if self.conncetion is not None:
+        if self.connection is not None:
             self.connection(str(percentage_complete))
 
     def progress_tick(self):
@@ -15,11 +15,15 @@
 # SPDX-License-Identifier: Apache-2.0
 
 
+import os
+import queue
+import threading
 import numpy as np
+import pandas as pd
 from RAI.all_types import all_data_types
-from abc import ABC
+from abc import ABC, abstractmethod
 
-__all__ = ['Feature', 'MetaDatabase', 'Data', 'NumpyData', 'IteratorData', 'Dataset']
+__all__ = ['Feature', 'MetaDatabase', 'Data', 'NumpyData', 'IteratorData', 'MemmapData', 'ArrowData', 'Dataset']
 
 
 class Feature:
@@ -48,11 +52,23 @@ class Data(ABC):
 
 
 class IteratorData(Data):
-    def __init__(self, iterator, contains_x=True, contains_y=True):
+    """
+    The RAI IteratorData class reads X and y from an iterator, such as a torch DataLoader, one batch at a time.
+    With prefetch set, a background thread reads, converts and separates up to prefetch batches ahead
+    while the current batch is computed on, and waits while that many batches are queued.
+
+    :param iterator: iterable of (X, y) batches, or X or y batches depending on contains_x and contains_y
+    :param contains_x: whether the batches contain X
+    :param contains_y: whether the batches contain y
+    :param prefetch: number of batches to read ahead on a background thread, 0 reads each batch on next_batch
+    """
+    def __init__(self, iterator, contains_x=True, contains_y=True, prefetch=0):
         self.iterator = iterator
         self.iter = None
         self.contains_x = contains_x
         self.contains_y = contains_y
+        self.prefetch = prefetch
+        self._prefetcher = None
         self.X = None
         self.y = None
         self.rawX = None
@@ -61,74 +77,294 @@ class IteratorData(Data):
         self.categorical = None
         self.scalar = None
         self.image = None
+        self.text = None
         self.get_index = False
 
     def initialize(self, maps):
         self.mapping = maps
 
     def next_batch(self):
+        if self.iter is None:
+            self.reset()
+        if self._prefetcher is not None:
+            batch = self._prefetcher.get()
+        else:
+            batch = self._load_batch()
+        if batch is None:
+            return False
+        val, values = batch
+        for name, value in values.items():
+            setattr(self, name, value)
+        return val
+
+    def reset(self):
+        if self._prefetcher is not None:
+            self._prefetcher.close()
+            self._prefetcher = None
+        self.iter = self._open()
+        if self.prefetch:
+            self._prefetcher = _Prefetcher(self._load_batch, self.prefetch)
+        self.X = None
+        self.y = None
+        self.rawX = None
+        self.categorical = None
+        self.scalar = None
+        self.image = None
+        self.text = None
+        self.get_index = False
+
+    def _open(self):
+        return iter(self.iterator)
+
+    # Reads the next batch and returns it with the values of its attributes, or None once the iterator is exhausted.
+    # Does not change the attributes of the object, so it can run on the prefetch thread.
+    def _load_batch(self):
         val = next(self.iter, False)
         if not val:
-            return val
+            return None
         pos = 0
         x, y = None, None
+        values = {}
         if self.contains_x:
             x = val[pos]
-            self.rawX = x
+            values["rawX"] = x
             pos += 1
         if self.contains_y:
             y = val[pos]
-            self.rawY = y
-            self.y = y
+            values["rawY"] = y
 
         x, y = self._convert_image_data(x, y)
-        self.X = x
-        self.y = y
-        self._separate_data(x)
-        return val
-
-    def reset(self):
-        self.iter = iter(self.iterator)
-        self.X = None
-        self.y = None
-        self.rawX = None
-        self.categorical = None
-        self.scalar = None
-        self.image = None
-        self.get_index = False
+        values["X"] = x
+        values["y"] = y
+        if x is not None:
+            values.update(self._separate_data(x))
+        return val, values
 
     def _convert_image_data(self, x, y):
         if x is not None:
             x = x.detach().numpy()
-            x_shape = list(x.shape)
-            x_shape[0] = 1
-            x_shape.insert(0, -1)
-            x = x.reshape(x_shape)
+            # Images become a single image feature, tabular batches keep one column per feature
+            if x.ndim > 2:
+                x_shape = list(x.shape)
+                x_shape[0] = 1
+                x_shape.insert(0, -1)
+                x = x.reshape(x_shape)
         if y is not None:
             y = y.detach().numpy()
         return x, y
 
     def _separate_data(self, x):
-        if x is not None:
-            self.scalar = None
-            self.categorical = None
-            self.image = None
-            self.text = None
-            if 'scalar' in self.mapping and any(val for val in self.mapping['scalar']):
-                self.scalar = np.array(x[:, self.mapping['scalar']]).astype(np.float64)
-            if 'categorical' in self.mapping and any(val for val in self.mapping['categorical']):
-                self.categorical = np.array(x[:, self.mapping['categorical']]).astype(np.float64)
-            if 'image' in self.mapping and any(val for val in self.mapping['image']):
-                self.image = np.array(x[:, self.mapping['image']]).astype(np.float64)
-            if 'text' in self.mapping and any(val for val in self.mapping['text']):
-                self.text = np.array(x[:, self.mapping['text']]).astype(np.float64)
+        values = {"scalar": None, "categorical": None, "image": None, "text": None}
+        for name in values:
+            if name in self.mapping and any(val for val in self.mapping[name]):
+                values[name] = np.array(x[:, self.mapping[name]]).astype(np.float64)
+        return values
+
+
+class _BatchedData(IteratorData):
+    """
+    Base class of the file backed Data classes, which feed MetricManager.iterator_compute one batch of rows at a time.
+    Subclasses yield (X, y) batches from _batches, the feature types of each batch are views of its X where possible.
+    """
+    def __init__(self, contains_x=True, contains_y=True, scalar_dtype=np.float64, prefetch=0):
+        super().__init__(None, contains_x=contains_x, contains_y=contains_y, prefetch=prefetch)
+        self.scalar_dtype = scalar_dtype
+
+    @abstractmethod
+    def _batches(self):
+        pass
+
+    def _open(self):
+        return self._batches()
+
+    def _load_batch(self):
+        val = next(self.iter, None)
+        if val is None:
+            return None
+        x, y = val
+        values = {"X": x, "rawX": x, "y": y, "rawY": y}
+        values.update(_separate_feature_types(x, self.mapping, self.scalar_dtype))
+        return val, values
+
+
+class _Prefetcher:
+    """
+    Calls load_batch on a background thread and queues at most depth of its batches, the thread waits while the
+    queue is full. A None batch ends the thread, and errors are raised again by get.
+    """
+    def __init__(self, load_batch, depth):
+        self._queue = queue.Queue(maxsize=depth)
+        self._stop = threading.Event()
+        self._done = False
+        self._thread = threading.Thread(target=self._run, args=(load_batch,), daemon=True)
+        self._thread.start()
+
+    def _run(self, load_batch):
+        try:
+            batch = load_batch()
+            while self._put(batch) and batch is not None:
+                batch = load_batch()
+        except BaseException as e:
+            self._put(e)
+
+    # Waits for space in the queue, returns False if the prefetcher was closed meanwhile
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def get(self):
+        if self._done:
+            return None
+        item = self._queue.get()
+        if item is None or isinstance(item, BaseException):
+            self._done = True
+        if isinstance(item, BaseException):
+            raise item
+        return item
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+
+
+class MemmapData(_BatchedData):
+    """
+    The RAI MemmapData class reads X and y from .npy files in batches of rows.
+    The files are memory mapped, so only the rows of the current batch are paged into memory.
+
+    :param X: path of a .npy file, or an array, with one column per feature in the order of the MetaDatabase
+    :param y: path of a .npy file, or an array, with the labels, by default None
+    :param batch_size: number of rows in each batch
+    :param scalar_dtype: dtype of the scalar data, None keeps the dtype of X
+    :param prefetch: number of batches to read ahead on a background thread, see IteratorData
+    """
+    def __init__(self, X=None, y=None, batch_size=65536, scalar_dtype=np.float64, prefetch=0):
+        super().__init__(contains_x=X is not None, contains_y=y is not None, scalar_dtype=scalar_dtype, prefetch=prefetch)
+        self.source_X = _open_memmap(X)
+        self.source_y = _open_memmap(y)
+        self.batch_size = batch_size
+
+    def __len__(self):
+        return len(self.source_X if self.source_X is not None else self.source_y)
+
+    def _batches(self):
+        for start in range(0, len(self), self.batch_size):
+            stop = start + self.batch_size
+            x = None if self.source_X is None else np.asarray(self.source_X[start:stop])
+            y = None if self.source_y is None else np.asarray(self.source_y[start:stop])
+            yield x, y
+
+
+# Memory maps .npy files read only, arrays are used as they are
+def _open_memmap(source):
+    if isinstance(source, (str, os.PathLike)):
+        return np.load(source, mmap_mode="r")
+    return source
+
+
+class ArrowData(_BatchedData):
+    """
+    The RAI ArrowData class reads a Parquet or Feather file one row group or record batch at a time, using pyarrow
+    from the arrow extra of the package.
+    Only the feature and target columns are read, categorical columns are encoded using the values of their feature.
+    RAI.utils.arrow_to_RAI creates the features and the ArrowData of a file.
+
+    :param path: path of the Parquet or Feather file
+    :param features: RAI Features of the columns of X, named after their column
+    :param output_feature: RAI Feature of the target column, by default None
+    :param batch_size: maximum number of rows in each batch, by default one row group or record batch
+    :param file_format: "parquet" or "feather", by default taken from the file extension
+    :param scalar_dtype: dtype of the scalar data, None keeps the dtype of X
+    :param prefetch: number of batches to read ahead on a background thread, see IteratorData
+    """
+    def __init__(self, path, features, output_feature=None, batch_size=None, file_format=None, scalar_dtype=np.float64,
+                 prefetch=0):
+        super().__init__(contains_x=len(features) > 0, contains_y=output_feature is not None, scalar_dtype=scalar_dtype,
+                         prefetch=prefetch)
+        self.path = path
+        self.features = features
+        self.output_feature = output_feature
+        self.batch_size = batch_size
+        self.file_format = _arrow_file_format(path, file_format)
+
+    def _batches(self):
+        for batch in _read_arrow_batches(self.path, self.file_format, self._columns(), self.batch_size):
+            x = self._to_numpy(batch, self.features) if self.contains_x else None
+            y = _arrow_column(batch, self.output_feature) if self.contains_y else None
+            yield x, y
+
+    def _columns(self):
+        columns = [f.name for f in self.features]
+        if self.output_feature is not None:
+            columns.append(self.output_feature.name)
+        return columns
+
+    # Builds the matrix of a batch, one column at a time
+    def _to_numpy(self, batch, features):
+        dtype = object if any(f.dtype != "numeric" for f in features) else np.float64
+        result = np.empty((batch.num_rows, len(features)), dtype=dtype)
+        for i, f in enumerate(features):
+            result[:, i] = _arrow_column(batch, f)
+        return result
+
+
+# Converts the column of a feature to numpy, categorical values become the codes of the feature's values
+def _arrow_column(batch, feature):
+    column = np.asarray(batch.column(feature.name))
+    if feature.categorical and feature.values is not None:
+        column = pd.Categorical(column, categories=list(feature.values.values())).codes
+    return column
+
+
+# Returns the file format of a Parquet or Feather file, by default taken from the file extension
+def _arrow_file_format(path, file_format=None):
+    if file_format is None:
+        file_format = "parquet" if str(path).endswith((".parquet", ".pq")) else "feather"
+    if file_format not in ("parquet", "feather"):
+        raise ValueError("file_format must be one of: parquet, feather")
+    return file_format
+
+
+# Reads the schema of a Parquet or Feather file
+def _read_arrow_schema(path, file_format):
+    from RAI.utils.utils import timed_import
+    if file_format == "parquet":
+        return timed_import("pyarrow.parquet").read_schema(path, memory_map=True)
+    return timed_import("pyarrow.ipc").open_file(timed_import("pyarrow").memory_map(str(path))).schema
+
+
+# Yields the record batches of the given columns of a Parquet or Feather file
+def _read_arrow_batches(path, file_format, columns, batch_size=None):
+    from RAI.utils.utils import timed_import
+    pa = timed_import("pyarrow")
+    if file_format == "parquet":
+        parquet_file = timed_import("pyarrow.parquet").ParquetFile(path, memory_map=True)
+        if batch_size is not None:
+            yield from parquet_file.iter_batches(batch_size=batch_size, columns=columns)
+            return
+        batches = (parquet_file.read_row_group(i, columns=columns) for i in range(parquet_file.num_row_groups))
+    else:
+        reader = timed_import("pyarrow.ipc").open_file(pa.memory_map(str(path)))
+        batches = (reader.get_batch(i).select(columns) for i in range(reader.num_record_batches))
+    for batch in batches:
+        if batch_size is None:
+            yield batch
+        else:
+            for start in range(0, batch.num_rows, batch_size):
+                yield batch.slice(start, batch_size)
 
 
 class NumpyData(Data):
     """
     The RAI Data class contains X and y data for a single Data split (train, test, val).
+    The scalar data is converted to scalar_dtype, None keeps the dtype of X, for example to keep float32 data.
     """
-    def __init__(self, X=None, y=None, rawX=None) -> None:
+    def __init__(self, X=None, y=None, rawX=None, scalar_dtype=np.float64) -> None:
         self.X = X
         self.y = y
         self.contains_x = X is not None
@@ -141,6 +377,7 @@ class NumpyData(Data):
         self.image = None
         self.text = None
         self.get_index = False
+        self.scalar_dtype = scalar_dtype
 
     def __len__(self):
         shape = np.shape(self.X)
@@ -170,21 +407,37 @@ class NumpyData(Data):
     def getRawItem(self, key):
         return self.rawX[key]
 
-    # Splits up a dataset into its different data types, currently scalar and categorical
+    # Splits up a dataset into its different data types.
+    # Features of a type stored in consecutive columns of a Fortran ordered X, such as the X of df_to_RAI(group_columns=True),
+    # or in every column of X are views of X rather than copies
     def initialize(self, masks):
-        self.scalar = None
-        self.categorical = None
-        self.image = None
-        self.text = None
-        if self.X is not None:
-            if "scalar" in masks and any(val for val in masks["scalar"]):
-                self.scalar = np.array(self.X[:, masks["scalar"]]).astype(np.float64)
-            if "categorical" in masks and any(val for val in masks["categorical"]):
-                self.categorical = self.X[:, masks["categorical"]]
-            if "image" in masks and any(val for val in masks["image"]):
-                self.image = self.X[:, masks["image"]]
-            if "text" in masks and any(val for val in masks["text"]):
-                self.text = self.X[:, masks["scalar"]]
+        for name, value in _separate_feature_types(self.X, masks, self.scalar_dtype).items():
+            setattr(self, name, value)
+
+
+# Returns the scalar, categorical, image and text data of X, which are None for types without features or no X
+def _separate_feature_types(X, masks, scalar_dtype=np.float64):
+    values = {"scalar": None, "categorical": None, "image": None, "text": None}
+    if X is None:
+        return values
+    for name in values:
+        if name in masks and any(val for val in masks[name]):
+            values[name] = _select_columns(X, masks[name])
+    if values["scalar"] is not None and scalar_dtype is not None:
+        values["scalar"] = values["scalar"].astype(scalar_dtype, copy=False)
+    return values
+
+
+# Returns the columns of X selected by a boolean mask, as a view when they are consecutive and the view is contiguous.
+# NumPy reduces strided rows in a different order than contiguous ones, so other selections are copied as before
+# to keep metric values unchanged.
+def _select_columns(X, mask):
+    index = np.flatnonzero(mask)
+    if index[-1] - index[0] + 1 == len(index):
+        view = X[:, index[0]:index[-1] + 1]
+        if view.flags.c_contiguous or view.flags.f_contiguous:
+            return view
+    return X[:, index]
 
 
 class Dataset:
@@ -0,0 +1,152 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import threading
+from RAIShared.analysis_jobs import connect_jobs, submit_job, cancel_job, DataVersionWatcher, WATCH_INTERVAL, \
+    JOBS_TABLE, NEXT_REVISION, JOB_COLUMNS, QUEUED, RUNNING, DONE, FAILED, CANCELLED
+
+__all__ = ['AnalysisJobQueue', 'AnalysisCancelled']
+
+
+class AnalysisCancelled(Exception):
+    """
+    Raised from the progress callback of an analysis whose job was cancelled, to stop it at its next tick
+    """
+
+
+class AnalysisJobQueue:
+    """
+    Worker side of the analysis job queue. Jobs are submitted by the dashboard, claimed and run here,
+    and their progress and results are written back to the same table.
+
+    Listeners are called from a daemon thread when another connection commits, see DataVersionWatcher.
+
+    :param path: path of the project sqlite database
+    :param interval: seconds between two checks for changes
+    """
+
+    def __init__(self, path: str, interval: float = WATCH_INTERVAL) -> None:
+        self._lock = threading.RLock()
+        self._last_progress = {}
+        self.connection = connect_jobs(path)
+        self._watcher = DataVersionWatcher(self.connection, self._lock, interval)
+
+    def add_listener(self, listener) -> None:
+        """
+        :param listener: function without arguments, called from the watcher thread when the jobs were changed
+            by another connection
+        """
+        self._watcher.add_listener(listener)
+
+    def _write(self, query, args):
+        with self._lock, self.connection:
+            return self.connection.execute(query, args)
+
+    def _read(self, query, args=()):
+        with self._lock:
+            rows = self.connection.execute(query, args).fetchall()
+        return [dict(zip(JOB_COLUMNS, row)) for row in rows]
+
+    def submit(self, kind: str, dataset: str, analysis: str = None, status: str = QUEUED) -> int:
+        """
+        :param kind: 'available' to list the available analysis, 'run' to run one
+        :param dataset: dataset the analysis uses
+        :param analysis: name of the analysis to run
+        :param status: initial status, 'running' for jobs the caller runs itself
+
+        :return: id of the new job
+        """
+        return submit_job(self.connection, self._lock, kind, dataset, analysis, status)
+
+    def pending_jobs(self) -> list:
+        """
+        :return: queued jobs as dictionaries, oldest first
+        """
+        return self._read(f'SELECT {", ".join(JOB_COLUMNS)} FROM {JOBS_TABLE} WHERE status = ? ORDER BY job_id',
+                          (QUEUED,))
+
+    def get_job(self, job_id: int):
+        """
+        :return: the job as a dictionary, None if it does not exist
+        """
+        rows = self._read(f'SELECT {", ".join(JOB_COLUMNS)} FROM {JOBS_TABLE} WHERE job_id = ?', (job_id,))
+        return rows[0] if rows else None
+
+    def claim(self, job_id: int) -> bool:
+        """
+        Marks a queued job as running. Only one caller can claim a job.
+
+        :return: True if the job was claimed by this call
+        """
+        cursor = self._write(f'UPDATE {JOBS_TABLE} SET status = ?, revision = {NEXT_REVISION} '
+                             'WHERE job_id = ? AND status = ?', (RUNNING, job_id, QUEUED))
+        return cursor.rowcount > 0
+
+    def update_progress(self, job_id: int, progress) -> None:
+        """
+        Streams the progress of a running job. Repeated values are not written again.
+        Raises AnalysisCancelled if the job is no longer running.
+        """
+        progress = int(progress)
+        if self._last_progress.get(job_id) == progress:
+            return
+        self._last_progress[job_id] = progress
+        cursor = self._write(f'UPDATE {JOBS_TABLE} SET progress = ?, revision = {NEXT_REVISION} '
+                             'WHERE job_id = ? AND status = ?', (progress, job_id, RUNNING))
+        if cursor.rowcount == 0:
+            raise AnalysisCancelled(f'Analysis job {job_id} was cancelled')
+
+    def finish(self, job_id: int, result: str) -> bool:
+        """
+        Stores the result of a running job and removes older finished jobs of the same analysis
+
+        :return: False if the job was cancelled in the meantime
+        """
+        return self._complete(job_id, DONE, result)
+
+    def fail(self, job_id: int, error: str) -> bool:
+        """
+        Marks a running job as failed, keeping the error message as its result
+        """
+        return self._complete(job_id, FAILED, error)
+
+    def _complete(self, job_id, status, result):
+        self._last_progress.pop(job_id, None)
+        with self._lock, self.connection:
+            cursor = self.connection.execute(
+                f'UPDATE {JOBS_TABLE} SET status = ?, progress = 100, result = ?, revision = {NEXT_REVISION} '
+                'WHERE job_id = ? AND status = ?', (status, result, job_id, RUNNING))
+            if cursor.rowcount > 0:
+                self.connection.execute(
+                    f'DELETE FROM {JOBS_TABLE} WHERE job_id < ? AND status IN (?, ?, ?) AND kind = '
+                    f'(SELECT kind FROM {JOBS_TABLE} WHERE job_id = ?) AND analysis IS '
+                    f'(SELECT analysis FROM {JOBS_TABLE} WHERE job_id = ?)',
+                    (job_id, DONE, FAILED, CANCELLED, job_id, job_id))
+        return cursor.rowcount > 0
+
+    def cancel(self, job_id: int) -> bool:
+        """
+        Cancels a queued or running job. A running analysis stops at its next progress tick.
+
+        :return: True if the job was still queued or running
+        """
+        return cancel_job(self.connection, self._lock, job_id)
+
+    def close(self) -> None:
+        self._watcher.close()
+        with self._lock:
+            self.connection.close()
@@ -16,20 +16,32 @@
 
 import logging
 import json
+import sqlite3
 import subprocess
 import threading
+import uuid
 import RAI
 import os
 import numpy as np
 
 from sqlitedict import SqliteDict
 
-from RAI.Analysis import AnalysisManager
-from RAI.utils.utils import MonitoringTimer
+from RAI.utils.utils import timed_import
+from RAI.db.analysis_queue import AnalysisJobQueue, AnalysisCancelled
+from RAIShared.analysis_jobs import AVAILABLE, RUN, RUNNING
+from RAIShared.value_codec import ENCODINGS, encode_value, decode_value
 
 logger = logging.getLogger(__name__)
 
 PROJECTS = 'PROJECTS'
+# Maps each stored key to a token replaced on every write, so readers skip decoding unchanged keys
+REVISIONS = 'revisions'
+
+# Measurements are stored one per row next to the SqliteDict table, so adding one never rewrites the history
+MEASUREMENTS_TABLE = 'measurements'
+CREATE_MEASUREMENTS_TABLE = f'CREATE TABLE IF NOT EXISTS {MEASUREMENTS_TABLE} ' \
+                            '(seq INTEGER PRIMARY KEY AUTOINCREMENT, tag TEXT, value BLOB NOT NULL)'
+CREATE_MEASUREMENTS_INDEX = f'CREATE INDEX IF NOT EXISTS {MEASUREMENTS_TABLE}_tag ON {MEASUREMENTS_TABLE} (tag)'
 
 
 class NumpyArrayEncoder(json.JSONEncoder):
@@ -46,94 +58,123 @@ class RaiDB:
     """
     Service used to provide sqlite functionalities. Allows for adding measurements, deleting measurements,
     exporting metadata.
+
+    :param ai_system: AISystem whose measurements are stored, in a database named after it
+    :param encoding: encoding of the stored measurements, one of 'json', 'msgpack' or 'msgpack+zstd'.
+        Binary encodings store numeric lists as raw NumPy buffers, which is smaller and faster to decode for
+        wide vector and matrix metrics. They need the msgpack or zstd extra of the package.
+        The encoding is kept with the project, by default the project's previous choice or 'json'
     """
 
-    def __init__(self, ai_system: RAI.AISystem = None) -> None:
+    def __init__(self, ai_system: RAI.AISystem = None, encoding: str = None) -> None:
         self.ai_system = ai_system
         self._threads = []
-        self.analysis_manager = AnalysisManager()
+        self._analysis_manager = None
         self.projects_db = self._get_db()
         self.db = self._get_db(ai_system.name)
-        self._init_available_analysis_timer()
-        self._init_analysis_timer()
+        if encoding is None:
+            encoding = self.db.get('encoding', 'json')
+        assert encoding in ENCODINGS, "encoding must be one of " + str(ENCODINGS)
+        self.encoding = encoding
+        self.db['encoding'] = encoding
+        self.measurements_db = self._get_measurements_db(ai_system.name)
+        self.analysis_jobs = AnalysisJobQueue(self._get_db_path(ai_system.name))
+        self.analysis_jobs.add_listener(self._process_analysis_jobs)
+        self._process_analysis_jobs()
 
-    def _get_db(self, name=None):
+    @property
+    def analysis_manager(self):
+        # The Analysis package pulls in ART, torch and dash, so it is only imported once an analysis is needed
+        if self._analysis_manager is None:
+            self._analysis_manager = timed_import("RAI.Analysis").AnalysisManager()
+        return self._analysis_manager
+
+    def _get_db_path(self, name=None):
         folder = os.getenv('DATABASE_FOLDER')
         if name is None:
             name = 'rai_internal'
-        db = f'{folder}/{name}.sqlite'
-        return SqliteDict(db, encode=json.dumps, decode=json.loads, autocommit=True)
+        return f'{folder}/{name}.sqlite'
 
-    def _init_available_analysis_timer(self):
-        def sub_handler():
-            try:
-                keep_alive = True
-                request = self.db.get('available_analysis')
-                if request and request['seen'] is False:
-                    available = self.analysis_manager.get_available_analysis(self.ai_system, request['data'])
-                    self.db['available_analysis_response'] = {
-                        'data': json.dumps(available),
-                        'seen': False
-                    }
-                    self.db['available_analysis'] = {
-                        'data': request['data'],
-                        'seen': True
-                    }
-                    keep_alive = False
-            except Exception as e:
-                print(f'Analysis timer failed: {e}')
-            finally:
-                return keep_alive
-        MonitoringTimer(1, sub_handler)
+    def _get_db(self, name=None):
+        return SqliteDict(self._get_db_path(name), encode=json.dumps, decode=json.loads, autocommit=True)
+
+    def _get_measurements_db(self, name):
+        connection = sqlite3.connect(self._get_db_path(name), timeout=30, check_same_thread=False)
+        with connection:
+            connection.execute(CREATE_MEASUREMENTS_TABLE)
+            connection.execute(CREATE_MEASUREMENTS_INDEX)
+        self._migrate_metric_values(connection)
+        return connection
+
+    def _migrate_metric_values(self, connection):
+        # Older projects kept every measurement in one JSON list under the 'metric_values' key
+        legacy = self.db.get('metric_values')
+        if legacy is None:
+            return
+        with connection:
+            for metrics in json.loads(legacy):
+                connection.execute(f'INSERT INTO {MEASUREMENTS_TABLE} (tag, value) VALUES (?, ?)',
+                                   (self._get_tag(metrics), encode_value(metrics, self.encoding)))
+        self.db.pop('metric_values', None)
+
+    @staticmethod
+    def _get_tag(metrics):
+        for dataset in metrics:
+            tag = metrics[dataset].get('metadata', {}).get('tag')
+            if tag is not None:
+                return str(tag)
+        return None
 
-    def _init_analysis_timer(self):
-        def sub_handler():
+    def _process_analysis_jobs(self):
+        # Called by the job watcher whenever the dashboard submits or cancels a job
+        for job in self.analysis_jobs.pending_jobs():
+            if not self.analysis_jobs.claim(job['job_id']):
+                continue
             try:
-                keep_alive = True
-                request = self.db.get('start_analysis')
-                if request and request['seen'] is False:
-                    dataset = request['data']
-                    analysis = request['analysis']
-                    self.db['start_analysis'] = {
-                        'data': dataset,
-                        'analysis': analysis,
-                        'seen': True
-                    }
-                    if request['analysis'] in self.analysis_manager.get_available_analysis(self.ai_system, dataset):
-                        connection = self.get_progress_update_lambda(analysis)
-                        x = threading.Thread(target=self._run_analysis_thread, args=(dataset, analysis, connection))
-                        x.start()
+                if job['kind'] == AVAILABLE:
+                    available = self.analysis_manager.get_available_analysis(self.ai_system, job['dataset'])
+                    self.analysis_jobs.finish(job['job_id'], json.dumps(available))
+                elif job['analysis'] in self.analysis_manager.get_available_analysis(self.ai_system, job['dataset']):
+                    x = threading.Thread(target=self._run_analysis_thread,
+                                         args=(job['job_id'], job['dataset'], job['analysis']))
+                    self._threads.append(x)
+                    x.start()
+                else:
+                    self.analysis_jobs.fail(job['job_id'], f"Analysis {job['analysis']} is not available")
             except Exception as e:
-                print(f'Analysis timer failed: {e}')
-            finally:
-                return keep_alive
-        MonitoringTimer(1, sub_handler)
+                logger.exception(f'Analysis job {job["job_id"]} failed: {e}')
+                self.analysis_jobs.fail(job['job_id'], str(e))
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
 
-    def get_progress_update_lambda(self, analysis):
-        return lambda progress: self.analysis_progress_update(analysis, progress)
+    def get_progress_update_lambda(self, job_id):
+        return lambda progress: self.analysis_progress_update(job_id, progress)
 
-    def analysis_progress_update(self, analysis: str, progress):
-        current = self.db.get('analysis_update', {})
-        current[analysis] = {'progress': progress, 'update': True}
-        self.db['analysis_update'] = current
+    def analysis_progress_update(self, job_id: int, progress):
+        self.analysis_jobs.update_progress(job_id, progress)
 
     def Disconnect(self):
         self.projects_db.close()
         try:
             self.db.close()
+            self.measurements_db.close()
+            self.analysis_jobs.close()
         except Exception:
             pass
 
-    def _run_analysis_thread(self, dataset, analysis, connection):
-        result = self.analysis_manager.run_analysis(self.ai_system, dataset, analysis, connection=connection)
-        # encoded_res = pickle.dumps(result[analysis].to_html())
-        encoded_res = json.dumps(self._jsonify_analysis(result[analysis].to_html()))
-        current = self.db.get('analysis_response', {})
-        current[analysis] = {
-            'val': encoded_res,
-            'seen': False,
-        }
-        self.db['analysis_response'] = current
+    def _run_analysis_thread(self, job_id, dataset, analysis):
+        connection = self.get_progress_update_lambda(job_id)
+        try:
+            result = self.analysis_manager.run_analysis(self.ai_system, dataset, analysis, connection=connection)
+            # encoded_res = pickle.dumps(result[analysis].to_html())
+            encoded_res = json.dumps(self._jsonify_analysis(result[analysis].to_html()))
+        except AnalysisCancelled:
+            logger.info(f'Analysis {analysis} was cancelled')
+            return
+        except Exception as e:
+            logger.exception(f'Analysis {analysis} failed: {e}')
+            self.analysis_jobs.fail(job_id, str(e))
+            return
+        self.analysis_jobs.finish(job_id, encoded_res)
 
     def _jsonify_analysis(self, analysis):
         if "dash" in str(type(analysis)) or "plotly" in str(type(analysis)):
@@ -153,6 +194,9 @@ class RaiDB:
                      "certificate_values", "certificate"]
         for key in to_delete:
             self.db.pop(key, None)
+        self._touch(*to_delete)
+        with self.measurements_db:
+            self.measurements_db.execute(f'DELETE FROM {MEASUREMENTS_TABLE}')
         if export_metadata:
             self.export_metadata()
 
@@ -182,41 +226,62 @@ class RaiDB:
         self.db['metric_info'] = json.dumps(metric_info)
         self.db['certificate_info'] = json.dumps(certificate_info)
         self.db['project_info'] = json.dumps(project_info)
+        self._touch('metric_info', 'certificate_info', 'project_info')
+
+    def _touch(self, *keys):
+        # Marks keys as changed for the dashboard, called after their values are written
+        revisions = self.db.get(REVISIONS, {})
+        for key in keys:
+            revisions[key] = uuid.uuid4().hex
+        self.db[REVISIONS] = revisions
 
     def export_visualizations(self, model_interpretation_dataset: str, data_visualization_dataset: str):
         data_visualizations = ["DataVisualization"]
         interpretations = ["GradCamAnalysis"]
         for analysis in data_visualizations:
             if data_visualization_dataset:
-                connection = self.get_progress_update_lambda(analysis)
-                result = self.analysis_manager.run_analysis(self.ai_system, data_visualization_dataset, analysis,
-                                                            connection)
-                encoded_res = json.dumps(self._jsonify_analysis(result[analysis].to_html()))
-                current = self.db.get('analysis_response', {})
-                current[analysis] = {
-                    'val': encoded_res,
-                    'seen': False,
-                }
-                self.db['analysis_response'] = current
+                self._export_analysis(data_visualization_dataset, analysis)
         for analysis in interpretations:
             if model_interpretation_dataset:
-                connection = self.get_progress_update_lambda(analysis)
-                result = self.analysis_manager.run_analysis(self.ai_system, model_interpretation_dataset, analysis,
-                                                            connection)
-                if analysis in result:
-                    encoded_res = json.dumps(self._jsonify_analysis(result[analysis].to_html()))
-                    current = self.db.get('analysis_response', {})
-                    current[analysis] = {
-                        'val': encoded_res,
-                        'seen': False,
-                    }
-                    self.db['analysis_response'] = current
-
-    def add_measurement(self) -> None:
-        certificates = self.ai_system.get_certificate_values()
-        metrics = self.ai_system.get_metric_values()
+                self._export_analysis(model_interpretation_dataset, analysis)
+
+    def _export_analysis(self, dataset, analysis):
+        # Exported analysis are stored as finished jobs, the dashboard shows the latest result of each analysis
+        job_id = self.analysis_jobs.submit(RUN, dataset, analysis, status=RUNNING)
+        connection = self.get_progress_update_lambda(job_id)
+        try:
+            result = self.analysis_manager.run_analysis(self.ai_system, dataset, analysis, connection=connection)
+            if analysis not in result:
+                self.analysis_jobs.fail(job_id, f"Analysis {analysis} is not available")
+                return
+            encoded_res = json.dumps(self._jsonify_analysis(result[analysis].to_html()))
+        except AnalysisCancelled as e:
+            logger.info(f'Analysis {analysis} was cancelled')
+            self.analysis_jobs.fail(job_id, str(e))
+            return
+        except Exception as e:
+            logger.exception(f'Analysis {analysis} failed: {e}')
+            self.analysis_jobs.fail(job_id, str(e))
+            return
+        self.analysis_jobs.finish(job_id, encoded_res)
+
+    def add_measurement(self, metrics: dict = None, certificates: dict = None) -> None:
+        """
+        Stores a measurement, by default the last metric and certificate values of the AISystem.
+        Window values from MetricWindow are stored by passing them as metrics, e.g. on_window=rai_db.add_measurement
+
+        :param metrics: metric values to store instead of the last ones of the AISystem
+        :param certificates: certificate values to store with them, only used when metrics is given
+
+        :return: None
+        """
+        if metrics is None:
+            certificates = self.ai_system.get_certificate_values()
+            metrics = self.ai_system.get_metric_values()
         print("Sharing: ", self.ai_system.name)
-        self.db['certificate_values'] = json.dumps(certificates)
+        if certificates is not None:
+            self.db['certificate_values'] = json.dumps(certificates)
+            self._touch('certificate_values')
         # Leaving this for now.
         # TODO: Set up standardized to json for all metrics.
         '''
@@ -236,9 +301,26 @@ class RaiDB:
                     print(metrics[dataset][group][m])
                     print(json.dumps(metrics[dataset][group][m]))
         '''
-        metric_values = json.loads(self.db.get('metric_values', '[]'))
-        metric_values.append(metrics)  # True
-        self.db['metric_values'] = json.dumps(metric_values)
+        with self.measurements_db:
+            self.measurements_db.execute(f'INSERT INTO {MEASUREMENTS_TABLE} (tag, value) VALUES (?, ?)',
+                                         (self._get_tag(metrics), encode_value(metrics, self.encoding)))
+
+    def get_measurements(self, since: int = 0, tag: str = None) -> list:
+        """
+        Returns the stored measurements with a sequence number greater than since, optionally filtered by tag
+
+        :param since: last sequence number already read, 0 reads every measurement
+        :param tag: only return measurements with this tag
+
+        :return: list of (sequence number, tag, metric values) tuples in insertion order
+        """
+        query = f'SELECT seq, tag, value FROM {MEASUREMENTS_TABLE} WHERE seq > ?'
+        args = [since]
+        if tag is not None:
+            query += ' AND tag = ?'
+            args.append(str(tag))
+        rows = self.measurements_db.execute(query + ' ORDER BY seq', args).fetchall()
+        return [(seq, row_tag, decode_value(value)) for seq, row_tag, value in rows]
 
     def viewGUI(self):
         gui_launcher = threading.Thread(target=self._view_gui_thread, args=[])
@@ -0,0 +1,79 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import threading
+
+__all__ = ['ComputeMemo', 'get_memo']
+
+
+class ComputeMemo:
+    """
+    Intermediate results shared by the metric groups during one compute, keyed by name.
+    MetricManager.compute creates one, passes it to the groups as data_dict["memo"] and clears it
+    once every group has run, so each intermediate is computed once per compute.
+
+    Values are shared between groups and must not be modified in place.
+    """
+
+    def __init__(self) -> None:
+        self._values = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def get(self, key, function, *args, **kwargs):
+        """
+        Returns the value stored under key, computing it with function(*args, **kwargs) on first use.
+        With a thread executor, groups asking for the same key wait for the first computation.
+
+        :param key: name of the intermediate, groups sharing a value must use the same name
+        :param function: function computing the intermediate
+        """
+        with self._lock:
+            if key in self._values:
+                return self._values[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            if key not in self._values:
+                self._values[key] = function(*args, **kwargs)
+        return self._values[key]
+
+    # Returns a memo starting with the values of this one, values computed later are not shared back
+    def copy(self):
+        result = ComputeMemo()
+        with self._lock:
+            result._values = dict(self._values)
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values = {}
+            self._key_locks = {}
+
+    # Locks can not be pickled when data_dict is sent to a process executor
+    def __getstate__(self):
+        return {"_values": self._values}
+
+    def __setstate__(self, state):
+        self._values = state["_values"]
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+
+# Returns the memo of the current compute, or an empty one when a group is computed outside of a MetricManager
+def get_memo(data_dict):
+    memo = data_dict.get("memo")
+    return memo if memo is not None else ComputeMemo()
@@ -18,6 +18,7 @@
 import os
 import numpy as np
 from RAI.metrics.metric_group import MetricGroup
+from RAI.metrics.compute_memo import get_memo
 
 
 class BasicExplainablityGroup(MetricGroup, class_location=os.path.abspath(__file__)):
@@ -35,10 +36,17 @@ class BasicExplainablityGroup(MetricGroup, class_location=os.path.abspath(__file
                 args = self.ai_system.metric_manager.user_config["stats"]["args"]
 
             scalar_data = data_dict["data"].scalar
-            mean_v = np.mean(scalar_data, **args.get("mean", {}), axis=0, keepdims=True)  # noqa: F841
-            std_v = np.std(scalar_data, **args.get("covariance", {}), axis=0, keepdims=True)  # noqa: F841
-            max_v = np.max(scalar_data, axis=0, keepdims=True)  # noqa: F841
-            min_v = np.min(scalar_data, axis=0, keepdims=True)  # noqa: F841
+            memo = get_memo(data_dict)
+            if "mean" in args:
+                mean_v = np.mean(scalar_data, **args["mean"], axis=0)  # noqa: F841
+            else:
+                mean_v = memo.get("scalar_mean", np.mean, scalar_data, axis=0)  # noqa: F841
+            if "covariance" in args:
+                std_v = np.std(scalar_data, **args["covariance"], axis=0)  # noqa: F841
+            else:
+                std_v = memo.get("scalar_std", np.std, scalar_data, axis=0)  # noqa: F841
+            max_v = memo.get("scalar_max", np.max, scalar_data, axis=0)  # noqa: F841
+            min_v = memo.get("scalar_min", np.min, scalar_data, axis=0)  # noqa: F841
 
             self.metrics["explainable_model"].value = True
 
@@ -14,7 +14,14 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 
-from .group_fairness import GroupFairnessMetricGroup  # noqa: F401
-from .individual_fairness import IndividualFairnessMetricGroup  # noqa: F401
-from .general_dataset_fairness import GeneralDatasetFairnessGroup  # noqa: F401
-from .general_prediction_fairness import GeneralPredictionFairnessGroup  # noqa: F401
+
+import os
+from RAI.metrics.metric_registry import register_lazy_groups
+
+# Groups are registered from their .json files, their modules are only imported once used
+__getattr__ = register_lazy_groups(__name__, os.path.dirname(__file__), {
+    "GroupFairnessMetricGroup": "group_fairness",
+    "IndividualFairnessMetricGroup": "individual_fairness",
+    "GeneralDatasetFairnessGroup": "general_dataset_fairness",
+    "GeneralPredictionFairnessGroup": "general_prediction_fairness"
+})
@@ -15,7 +15,8 @@
 # SPDX-License-Identifier: Apache-2.0
 
 
-from RAI.metrics.ai360_helper import get_binary_dataset
+from RAI.metrics.fairness_helper import get_dataset_fairness, get_protected_groups
+from RAI.metrics.compute_memo import get_memo
 from RAI.metrics.metric_group import MetricGroup
 import os
 
@@ -23,6 +24,11 @@ import os
 class GeneralDatasetFairnessGroup(MetricGroup, class_location=os.path.abspath(__file__)):
     def __init__(self, ai_system) -> None:
         super().__init__(ai_system)
+        self._counts = None
+
+    def reset(self):
+        super().reset()
+        self._counts = None
 
     @classmethod
     def is_compatible(cls, ai_system):
@@ -40,12 +46,29 @@ class GeneralDatasetFairnessGroup(MetricGroup, class_location=os.path.abspath(__
 
     def compute(self, data_dict):
         data = data_dict["data"]
-        prot_attr = []
-        if self.ai_system.metric_manager.user_config is not None and "fairness" in self.ai_system.metric_manager.user_config and "priv_group" in \
-                self.ai_system.metric_manager.user_config["fairness"]:
-            prot_attr = self.ai_system.metric_manager.user_config["fairness"]["protected_attributes"]
+        prot_attr = get_protected_groups(self)[0]
+        self._set_values(get_memo(data_dict).get("dataset_fairness", get_dataset_fairness, self, data, prot_attr))
+
+    # Folds the dataset counts of the batch into the running counts, always with the native backend
+    def compute_batch(self, data_dict):
+        prot_attr = get_protected_groups(self)[0]
+        bin_dataset = get_memo(data_dict).get("dataset_fairness", get_dataset_fairness, self, data_dict["data"], prot_attr,
+                                              backend="native")
+        self._counts = bin_dataset if self._counts is None else self._counts.merge(bin_dataset)
+
+    def partial_state(self):
+        return {"counts": None if self._counts is None else self._counts.without_rows()}
+
+    def merge(self, state):
+        counts = state["counts"]
+        if counts is not None:
+            self._counts = counts if self._counts is None else self._counts.merge(counts)
+
+    def finalize_batch_compute(self):
+        if self._counts is not None:
+            self._set_values(self._counts)
 
-        bin_dataset = get_binary_dataset(self, data, prot_attr)
+    def _set_values(self, bin_dataset):
         self.metrics['base_rate'].value = bin_dataset.base_rate()
         self.metrics['num_instances'].value = bin_dataset.num_instances()
         self.metrics['num_negatives'].value = bin_dataset.num_negatives()
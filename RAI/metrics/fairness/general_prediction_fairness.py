@@ -16,17 +16,23 @@
 
 
 from RAI.metrics.metric_group import MetricGroup
-from RAI.metrics.ai360_helper import get_classification_dataset
+from RAI.metrics.fairness_helper import get_classification_fairness, get_protected_groups
+from RAI.metrics.compute_memo import get_memo
 import os
 
 
 class GeneralPredictionFairnessGroup(MetricGroup, class_location=os.path.abspath(__file__)):
     def __init__(self, ai_system) -> None:
         super().__init__(ai_system)
+        self._counts = None
 
     def update(self, data):
         pass
 
+    def reset(self):
+        super().reset()
+        self._counts = None
+
     @classmethod
     def is_compatible(cls, ai_system):
         compatible = super().is_compatible(ai_system)
@@ -42,17 +48,35 @@ class GeneralPredictionFairnessGroup(MetricGroup, class_location=os.path.abspath
     def compute(self, data_dict):
         data = data_dict["data"]
         preds = data_dict["predict"]
-        priv_group_list = []
-        unpriv_group_list = []
-        prot_attr = []
-        if self.ai_system.metric_manager.user_config is not None and "fairness" in self.ai_system.metric_manager.user_config and "priv_group" in \
-                self.ai_system.metric_manager.user_config["fairness"]:
-            prot_attr = self.ai_system.metric_manager.user_config["fairness"]["protected_attributes"]
-            for group in self.ai_system.metric_manager.user_config["fairness"]["priv_group"]:
-                priv_group_list.append({group: self.ai_system.metric_manager.user_config["fairness"]["priv_group"][group]["privileged"]})
-                unpriv_group_list.append({group: self.ai_system.metric_manager.user_config["fairness"]["priv_group"][group]["unprivileged"]})
+        prot_attr, priv_group_list, unpriv_group_list = get_protected_groups(self)
+
+        # The fairness groups read the same configuration, so they share one object per compute
+        cd = get_memo(data_dict).get("classification_fairness", get_classification_fairness,
+                                     self, data, preds, prot_attr, priv_group_list, unpriv_group_list)
+        self._set_values(cd)
+        self.metrics['consistency'].value = cd.consistency()[0]
+
+    # Folds the fairness counts of the batch into the running counts, always with the native backend
+    def compute_batch(self, data_dict):
+        prot_attr, priv_group_list, unpriv_group_list = get_protected_groups(self)
+        cd = get_memo(data_dict).get("classification_fairness", get_classification_fairness, self, data_dict["data"],
+                                     data_dict["predict"], prot_attr, priv_group_list, unpriv_group_list, backend="native")
+        self._counts = cd if self._counts is None else self._counts.merge(cd)
 
-        cd = get_classification_dataset(self, data, preds, prot_attr, priv_group_list, unpriv_group_list)
+    def partial_state(self):
+        return {"counts": None if self._counts is None else self._counts.without_rows()}
+
+    def merge(self, state):
+        counts = state["counts"]
+        if counts is not None:
+            self._counts = counts if self._counts is None else self._counts.merge(counts)
+
+    # Consistency compares each row to its nearest neighbours, so it is only reported by compute
+    def finalize_batch_compute(self):
+        if self._counts is not None:
+            self._set_values(self._counts)
+
+    def _set_values(self, cd):
         self.metrics['average_odds_difference'].value = cd.average_odds_difference()
         self.metrics['between_all_groups_coefficient_of_variation'].value = cd.between_all_groups_coefficient_of_variation()
         self.metrics['between_all_groups_generalized_entropy_index'].value = cd.between_all_groups_generalized_entropy_index()
@@ -61,7 +85,6 @@ class GeneralPredictionFairnessGroup(MetricGroup, class_location=os.path.abspath
         self.metrics['between_group_generalized_entropy_index'].value = cd.between_group_generalized_entropy_index()
         self.metrics['between_group_theil_index'].value = cd.between_group_theil_index()
         self.metrics['coefficient_of_variation'].value = cd.coefficient_of_variation()
-        self.metrics['consistency'].value = cd.consistency()[0]
         self.metrics['differential_fairness_bias_amplification'].value = cd.differential_fairness_bias_amplification()
         self.metrics['error_rate'].value = cd.error_rate()
         self.metrics['error_rate_difference'].value = cd.error_rate_difference()
@@ -18,17 +18,22 @@
 from RAI.metrics.metric_group import MetricGroup
 import pandas as pd
 import os
-from RAI.metrics.ai360_helper import get_classification_dataset
-from aif360.sklearn.metrics import average_odds_error
+from RAI.metrics.fairness_helper import get_classification_fairness, get_fairness_backend, get_protected_groups
+from RAI.metrics.compute_memo import get_memo
 
 
 class GroupFairnessMetricGroup(MetricGroup, class_location=os.path.abspath(__file__)):
     def __init__(self, ai_system) -> None:
         super().__init__(ai_system)
+        self._counts = None
 
     def update(self, data):
         pass
 
+    def reset(self):
+        super().reset()
+        self._counts = None
+
     @classmethod
     def is_compatible(cls, ai_system):
         compatible = super().is_compatible(ai_system)
@@ -44,27 +49,45 @@ class GroupFairnessMetricGroup(MetricGroup, class_location=os.path.abspath(__fil
     def compute(self, data_dict):
         data = data_dict["data"]
         preds = data_dict["predict"]
-        priv_group_list = []
-        unpriv_group_list = []
-        prot_attr = []
-        if self.ai_system.metric_manager.user_config is not None and "fairness" in self.ai_system.metric_manager.user_config and "priv_group" in \
-                self.ai_system.metric_manager.user_config["fairness"]:
-            prot_attr = self.ai_system.metric_manager.user_config["fairness"]["protected_attributes"]
-            for group in self.ai_system.metric_manager.user_config["fairness"]["priv_group"]:
-                priv_group_list.append(
-                    {group: self.ai_system.metric_manager.user_config["fairness"]["priv_group"][group]["privileged"]})
-                unpriv_group_list.append(
-                    {group: self.ai_system.metric_manager.user_config["fairness"]["priv_group"][group]["unprivileged"]})
-
-        cd = get_classification_dataset(self, data, preds, prot_attr, priv_group_list, unpriv_group_list)
+        prot_attr, priv_group_list, unpriv_group_list = get_protected_groups(self)
+
+        # The fairness groups read the same configuration, so they share one object per compute
+        cd = get_memo(data_dict).get("classification_fairness", get_classification_fairness,
+                                     self, data, preds, prot_attr, priv_group_list, unpriv_group_list)
+        if get_fairness_backend(self) == "aif360":
+            self._set_values(cd, self._average_odds_error(data, preds, prot_attr))
+        else:
+            self._set_values(cd, cd.average_odds_error())
+
+    # Folds the fairness counts of the batch into the running counts, always with the native backend
+    def compute_batch(self, data_dict):
+        prot_attr, priv_group_list, unpriv_group_list = get_protected_groups(self)
+        cd = get_memo(data_dict).get("classification_fairness", get_classification_fairness, self, data_dict["data"],
+                                     data_dict["predict"], prot_attr, priv_group_list, unpriv_group_list, backend="native")
+        self._counts = cd if self._counts is None else self._counts.merge(cd)
+
+    def partial_state(self):
+        return {"counts": None if self._counts is None else self._counts.without_rows()}
+
+    def merge(self, state):
+        counts = state["counts"]
+        if counts is not None:
+            self._counts = counts if self._counts is None else self._counts.merge(counts)
+
+    def finalize_batch_compute(self):
+        if self._counts is not None:
+            self._set_values(self._counts, self._counts.average_odds_error())
+
+    def _set_values(self, cd, average_odds_error):
         self.metrics['disparate_impact_ratio'].value = cd.disparate_impact()
         self.metrics['statistical_parity_difference'].value = cd.statistical_parity_difference()
         self.metrics['equal_opportunity_difference'].value = cd.equal_opportunity_difference()
         self.metrics['average_odds_difference'].value = cd.average_odds_difference()
-        self.metrics['average_odds_error'].value = self._average_odds_error(data, preds, prot_attr)
+        self.metrics['average_odds_error'].value = average_odds_error
         self.metrics['between_group_generalized_entropy_error'].value = cd.between_group_generalized_entropy_index()
 
     def _average_odds_error(self, data, preds, prot_attr):
+        from aif360.sklearn.metrics import average_odds_error
         names = [feature.name for feature in self.ai_system.meta_database.features if feature.categorical]
         df = pd.DataFrame(data.categorical, columns=names)
         df['y'] = data.y
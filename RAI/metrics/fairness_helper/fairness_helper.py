@@ -0,0 +1,439 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+__all__ = ["FairnessCounts", "get_fairness_backend", "get_protected_groups", "get_dataset_fairness",
+           "get_classification_fairness"]
+import copy
+import numpy as np
+
+# Only binary labels are supported, matching aif360's BinaryLabelDataset
+_NUM_CLASSES = 2
+
+
+def get_fairness_backend(metric_group):
+    """
+    Returns the fairness backend set in user_config["fairness"]["backend"], "native" by default.
+    "aif360" builds AIF360 datasets instead and can be used to cross-check the native results.
+    """
+    fairness_config = metric_group.ai_system.metric_manager.user_config.get("fairness", {})
+    backend = fairness_config.get("backend", "native")
+    assert backend in ("native", "aif360"), "fairness backend must be one of 'native' or 'aif360'"
+    return backend
+
+
+def get_protected_groups(metric_group):
+    """
+    Returns the protected attributes and the lists of privileged and unprivileged groups set in user_config["fairness"]
+    """
+    user_config = metric_group.ai_system.metric_manager.user_config
+    priv_group_list = []
+    unpriv_group_list = []
+    prot_attr = []
+    if user_config is not None and "fairness" in user_config and "priv_group" in user_config["fairness"]:
+        prot_attr = user_config["fairness"]["protected_attributes"]
+        for group in user_config["fairness"]["priv_group"]:
+            priv_group_list.append({group: user_config["fairness"]["priv_group"][group]["privileged"]})
+            unpriv_group_list.append({group: user_config["fairness"]["priv_group"][group]["unprivileged"]})
+    return prot_attr, priv_group_list, unpriv_group_list
+
+
+def _get_positive_label(metric_group):
+    return metric_group.ai_system.metric_manager.user_config.get("fairness", {}).get("positive_label", 1)
+
+
+def _get_protected_columns(metric_group, data, prot_attr):
+    names = [feature.name for feature in metric_group.ai_system.meta_database.features if feature.categorical]
+    return np.asarray(data.categorical)[:, [names.index(attr) for attr in prot_attr]]
+
+
+def get_dataset_fairness(metric_group, data, prot_attr, backend=None):
+    """
+    Returns an object exposing the BinaryLabelDatasetMetric interface for the data and its protected attributes.
+    backend overrides the configured fairness backend, "native" is needed to merge the result with other batches.
+    """
+    if (backend or get_fairness_backend(metric_group)) == "aif360":
+        from RAI.metrics.ai360_helper import get_binary_dataset
+        return get_binary_dataset(metric_group, data, prot_attr)
+    return FairnessCounts(_get_protected_columns(metric_group, data, prot_attr), prot_attr, data.y,
+                          features=data.categorical, positive_label=_get_positive_label(metric_group))
+
+
+def get_classification_fairness(metric_group, data, preds, prot_attr, priv_group_list, unpriv_group_list, backend=None):
+    """
+    Returns an object exposing the ClassificationMetric interface for the data, predictions and protected groups.
+    backend overrides the configured fairness backend, "native" is needed to merge the result with other batches.
+    """
+    if (backend or get_fairness_backend(metric_group)) == "aif360":
+        from RAI.metrics.ai360_helper import get_classification_dataset
+        return get_classification_dataset(metric_group, data, preds, prot_attr, priv_group_list, unpriv_group_list)
+    return FairnessCounts(_get_protected_columns(metric_group, data, prot_attr), prot_attr, data.y, preds,
+                          features=data.categorical, privileged_groups=priv_group_list,
+                          unprivileged_groups=unpriv_group_list, positive_label=_get_positive_label(metric_group))
+
+
+class FairnessCounts:
+    """
+    FairnessCounts is a NumPy implementation of AIF360's BinaryLabelDatasetMetric and ClassificationMetric.
+    The binary confusion counts of each combination of protected attribute values are computed once with a
+    single bincount when constructed, and every metric is derived from that table.
+    Method names and results follow AIF360, so either object can be used by the fairness metric groups.
+    Objects built from different rows can be combined with merge, to fold batches into a running state.
+    """
+
+    def __init__(self, protected, prot_attr, y, preds=None, features=None, privileged_groups=None,
+                 unprivileged_groups=None, positive_label=1) -> None:
+        self.protected_attribute_names = list(prot_attr)
+        self.features = features
+        self.privileged_groups = privileged_groups
+        self.unprivileged_groups = unprivileged_groups
+        self.y_true = (np.asarray(y).ravel() == positive_label).astype(np.int64)
+        self.y_pred = None
+        if preds is not None:
+            self.y_pred = (np.asarray(preds).ravel() == positive_label).astype(np.int64)
+
+        # Encodes each row as 2 * y_true + y_pred: 0 = TN, 1 = FP, 2 = FN, 3 = TP
+        code = self.y_true if self.y_pred is None else 2 * self.y_true + self.y_pred
+        n_codes = 2 if self.y_pred is None else 4
+        keys, inverse = np.unique(np.asarray(protected), axis=0, return_inverse=True)
+        # Index of the unique protected attribute values of each row
+        self._intersections = inverse.ravel()
+        table = np.bincount(inverse.ravel() * n_codes + code, minlength=len(keys) * n_codes)
+        self._set_table(keys, table.reshape(len(keys), n_codes).astype(np.float64))
+
+    # Sets the unique protected attribute values and their code counts, and sums the counts of each group
+    def _set_table(self, keys, table):
+        self._keys = keys
+        self._table = table
+        self._masks = {None: None}
+        if self.privileged_groups:
+            self._masks[True] = self._condition_mask(self.privileged_groups)
+        if self.unprivileged_groups:
+            self._masks[False] = self._condition_mask(self.unprivileged_groups)
+        self._counts = {}
+        for key, mask in self._masks.items():
+            self._counts[key] = table.sum(axis=0) if mask is None else table[mask].sum(axis=0)
+
+    def merge(self, other):
+        """
+        Returns the counts of the rows of both objects, which must share their protected attributes and groups.
+        The merged object does not keep the rows, so consistency is not available on it.
+
+        :param other: FairnessCounts of other rows
+
+        :return: merged FairnessCounts
+        """
+        keys, inverse = np.unique(np.concatenate((self._keys, other._keys)), axis=0, return_inverse=True)
+        table = np.zeros((len(keys), self._table.shape[1]))
+        np.add.at(table, inverse.ravel(), np.concatenate((self._table, other._table)))
+        merged = self.without_rows()
+        merged._set_table(keys, table)
+        return merged
+
+    # Returns a copy sharing the counts but not the rows, which is small to pickle and to keep as a running state
+    def without_rows(self):
+        result = copy.copy(self)
+        result.features = None
+        result.y_true = None
+        result.y_pred = None
+        result._intersections = None
+        return result
+
+    # Returns which unique protected attribute values belong to any of the groups in condition
+    def _condition_mask(self, condition):
+        mask = np.zeros(len(self._keys), dtype=bool)
+        for group in condition:
+            group_mask = np.ones(len(self._keys), dtype=bool)
+            for name, val in group.items():
+                group_mask &= self._keys[:, self.protected_attribute_names.index(name)] == val
+            mask |= group_mask
+        return mask
+
+    def _get_counts(self, privileged):
+        if privileged not in self._counts:
+            raise AttributeError(f"'{'privileged' if privileged else 'unprivileged'}_groups' was not provided "
+                                 "when this object was initialized.")
+        return self._counts[privileged]
+
+    # Benefit 1 + y_pred - y_true of the TN, FP, FN and TP codes
+    _BENEFIT = np.array([1.0, 2.0, 0.0, 1.0])
+
+    def difference(self, metric_fun):
+        return metric_fun(privileged=False) - metric_fun(privileged=True)
+
+    def ratio(self, metric_fun):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return metric_fun(privileged=False) / metric_fun(privileged=True)
+
+    # ===== Dataset metrics =====
+
+    def num_instances(self, privileged=None):
+        return np.float64(self._get_counts(privileged).sum())
+
+    def num_positives(self, privileged=None):
+        counts = self._get_counts(privileged)
+        return counts[1] if len(counts) == 2 else counts[2] + counts[3]
+
+    def num_negatives(self, privileged=None):
+        counts = self._get_counts(privileged)
+        return counts[0] if len(counts) == 2 else counts[0] + counts[1]
+
+    def base_rate(self, privileged=None):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.num_positives(privileged) / self.num_instances(privileged)
+
+    def consistency(self, n_neighbors=5):
+        if self.features is None:
+            raise ValueError("consistency compares each row to its neighbours and is not available on merged counts")
+        from sklearn.neighbors import NearestNeighbors
+        nbrs = NearestNeighbors(n_neighbors=n_neighbors, algorithm='ball_tree')
+        nbrs.fit(self.features)
+        _, indices = nbrs.kneighbors(self.features)
+        y = self.y_true.astype(np.float64)
+        return np.array([1.0 - np.mean(np.abs(y - y[indices].mean(axis=1)))])
+
+    # Smoothed positive rate of each combination of protected attribute values, from its positive counts
+    def _smoothed_base_rates(self, counts_pos, concentration=1.0):
+        if concentration < 0:
+            raise ValueError("Concentration parameter must be non-negative.")
+        counts_total = self._table.sum(axis=1)
+        return (counts_pos + concentration / _NUM_CLASSES) / (counts_total + concentration)
+
+    def _true_positives_per_key(self):
+        return self._table[:, 1] if self._table.shape[1] == 2 else self._table[:, 2] + self._table[:, 3]
+
+    @staticmethod
+    def _differential_fairness(smoothed_base_rates):
+        # Largest log ratio over all pairs of intersectional groups
+        with np.errstate(divide="ignore"):
+            pos = np.log(smoothed_base_rates)
+            neg = np.log(1 - smoothed_base_rates)
+        return max(pos.max() - pos.min(), neg.max() - neg.min())
+
+    def smoothed_empirical_differential_fairness(self, concentration=1.0):
+        return self._differential_fairness(self._smoothed_base_rates(self._true_positives_per_key(), concentration))
+
+    # ===== Classification metrics =====
+
+    def num_true_negatives(self, privileged=None):
+        return self._get_counts(privileged)[0]
+
+    def num_false_positives(self, privileged=None):
+        return self._get_counts(privileged)[1]
+
+    def num_false_negatives(self, privileged=None):
+        return self._get_counts(privileged)[2]
+
+    def num_true_positives(self, privileged=None):
+        return self._get_counts(privileged)[3]
+
+    # Predictions are hard labels, so scores are 0 or 1 and the generalized counts equal the binary counts
+    def num_generalized_true_positives(self, privileged=None):
+        return self.num_true_positives(privileged)
+
+    def num_generalized_false_positives(self, privileged=None):
+        return self.num_false_positives(privileged)
+
+    def num_generalized_false_negatives(self, privileged=None):
+        return self.num_false_negatives(privileged)
+
+    def num_generalized_true_negatives(self, privileged=None):
+        return self.num_true_negatives(privileged)
+
+    def num_pred_positives(self, privileged=None):
+        counts = self._get_counts(privileged)
+        return counts[1] + counts[3]
+
+    def num_pred_negatives(self, privileged=None):
+        counts = self._get_counts(privileged)
+        return counts[0] + counts[2]
+
+    def performance_measures(self, privileged=None):
+        tn, fp, fn, tp = self._get_counts(privileged)
+        p, n = tp + fn, tn + fp
+        zero = np.float64(0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return dict(
+                TPR=tp / p, TNR=tn / n, FPR=fp / n, FNR=fn / p,
+                GTPR=tp / p, GTNR=tn / n, GFPR=fp / n, GFNR=fn / p,
+                PPV=tp / (tp + fp) if (tp + fp) > 0.0 else zero,
+                NPV=tn / (tn + fn) if (tn + fn) > 0.0 else zero,
+                FDR=fp / (fp + tp) if (fp + tp) > 0.0 else zero,
+                FOR=fn / (fn + tn) if (fn + tn) > 0.0 else zero,
+                ACC=(tp + tn) / (p + n) if (p + n) > 0.0 else zero
+            )
+
+    def true_positive_rate(self, privileged=None):
+        return self.performance_measures(privileged)['TPR']
+
+    def false_positive_rate(self, privileged=None):
+        return self.performance_measures(privileged)['FPR']
+
+    def false_negative_rate(self, privileged=None):
+        return self.performance_measures(privileged)['FNR']
+
+    def true_negative_rate(self, privileged=None):
+        return self.performance_measures(privileged)['TNR']
+
+    def generalized_true_positive_rate(self, privileged=None):
+        return self.performance_measures(privileged)['GTPR']
+
+    def generalized_true_negative_rate(self, privileged=None):
+        return self.performance_measures(privileged)['GTNR']
+
+    def positive_predictive_value(self, privileged=None):
+        return self.performance_measures(privileged)['PPV']
+
+    def negative_predictive_value(self, privileged=None):
+        return self.performance_measures(privileged)['NPV']
+
+    def false_discovery_rate(self, privileged=None):
+        return self.performance_measures(privileged)['FDR']
+
+    def false_omission_rate(self, privileged=None):
+        return self.performance_measures(privileged)['FOR']
+
+    def accuracy(self, privileged=None):
+        return self.performance_measures(privileged)['ACC']
+
+    def error_rate(self, privileged=None):
+        return 1. - self.accuracy(privileged)
+
+    def selection_rate(self, privileged=None):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.num_pred_positives(privileged) / self.num_instances(privileged)
+
+    def true_positive_rate_difference(self):
+        return self.difference(self.true_positive_rate)
+
+    def false_negative_rate_difference(self):
+        return self.difference(self.false_negative_rate)
+
+    def false_negative_rate_ratio(self):
+        return self.ratio(self.false_negative_rate)
+
+    def false_discovery_rate_difference(self):
+        return self.difference(self.false_discovery_rate)
+
+    def false_discovery_rate_ratio(self):
+        return self.ratio(self.false_discovery_rate)
+
+    def error_rate_difference(self):
+        return self.difference(self.error_rate)
+
+    def error_rate_ratio(self):
+        return self.ratio(self.error_rate)
+
+    def disparate_impact(self):
+        return self.ratio(self.selection_rate)
+
+    def statistical_parity_difference(self):
+        return self.difference(self.selection_rate)
+
+    def equal_opportunity_difference(self):
+        return self.true_positive_rate_difference()
+
+    def average_odds_difference(self):
+        return 0.5 * (self.difference(self.false_positive_rate) + self.difference(self.true_positive_rate))
+
+    def average_odds_error(self):
+        return 0.5 * (np.abs(self.difference(self.false_positive_rate)) + np.abs(self.difference(self.true_positive_rate)))
+
+    # ===== Individual and between group metrics =====
+
+    # Generalized entropy index of the benefit of each row, reduced in row order like AIF360
+    @staticmethod
+    def _generalized_entropy_index(b, alpha=2):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if alpha == 1:
+                return np.mean(np.log((b / np.mean(b)) ** b) / np.mean(b))
+            elif alpha == 0:
+                return -np.mean(np.log(b / np.mean(b)) / np.mean(b))
+            return np.mean((b / np.mean(b)) ** alpha - 1) / (alpha * (alpha - 1))
+
+    # Generalized entropy index of benefits b, where each benefit is shared by weights rows.
+    # Used on merged counts, which no longer hold the rows, it agrees with the row form up to rounding
+    @staticmethod
+    def _weighted_generalized_entropy_index(b, weights, alpha=2):
+        b, weights = b[weights > 0], weights[weights > 0]
+        total = weights.sum()
+        mean = np.sum(weights * b) / total
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if alpha == 1:
+                return np.sum(weights * np.log((b / mean) ** b)) / total / mean
+            elif alpha == 0:
+                return -np.sum(weights * np.log(b / mean)) / total / mean
+            return np.sum(weights * ((b / mean) ** alpha - 1)) / total / (alpha * (alpha - 1))
+
+    # Benefit 1 + y_pred - y_true of each row, None on merged counts
+    def _row_benefit(self):
+        if self.y_true is None:
+            return None
+        return (1 + self.y_pred - self.y_true).astype(np.float64)
+
+    def generalized_entropy_index(self, alpha=2):
+        benefit = self._row_benefit()
+        if benefit is None:
+            return self._weighted_generalized_entropy_index(self._BENEFIT, self._get_counts(None), alpha)
+        return self._generalized_entropy_index(benefit, alpha)
+
+    def theil_index(self):
+        return self.generalized_entropy_index(alpha=1)
+
+    def coefficient_of_variation(self):
+        return 2 * np.sqrt(self.generalized_entropy_index(alpha=2))
+
+    def between_group_generalized_entropy_index(self, alpha=2):
+        # Rows of each group share the group's mean benefit, rows outside both groups have no benefit
+        benefit = self._row_benefit()
+        if benefit is None:
+            b = np.zeros(len(self._keys), dtype=np.float64)
+            for privileged in (False, True):
+                mask = self._masks[privileged]
+                if np.any(mask):
+                    counts = self._table[mask].sum(axis=0)
+                    b[mask] = np.dot(counts, self._BENEFIT) / counts.sum()
+            return self._weighted_generalized_entropy_index(b, self._table.sum(axis=1), alpha)
+        b = np.zeros(len(benefit), dtype=np.float64)
+        for privileged in (False, True):
+            mask = self._masks[privileged][self._intersections]
+            if np.any(mask):
+                b[mask] = np.mean(benefit[mask])
+        return self._generalized_entropy_index(b, alpha)
+
+    def between_group_theil_index(self):
+        return self.between_group_generalized_entropy_index(alpha=1)
+
+    def between_group_coefficient_of_variation(self):
+        return 2 * np.sqrt(self.between_group_generalized_entropy_index(alpha=2))
+
+    def between_all_groups_generalized_entropy_index(self, alpha=2):
+        totals = self._table.sum(axis=1)
+        benefit = self._row_benefit()
+        if benefit is None:
+            return self._weighted_generalized_entropy_index(np.dot(self._table, self._BENEFIT) / totals, totals, alpha)
+        group_benefit = np.bincount(self._intersections, weights=benefit, minlength=len(totals)) / totals
+        return self._generalized_entropy_index(group_benefit[self._intersections], alpha)
+
+    def between_all_groups_theil_index(self):
+        return self.between_all_groups_generalized_entropy_index(alpha=1)
+
+    def between_all_groups_coefficient_of_variation(self):
+        return 2 * np.sqrt(self.between_all_groups_generalized_entropy_index(alpha=2))
+
+    def differential_fairness_bias_amplification(self, concentration=1.0):
+        edf_clf = self._differential_fairness(self._smoothed_base_rates(self._table[:, 1] + self._table[:, 3], concentration))
+        return edf_clf - self.smoothed_empirical_differential_fairness(concentration)
@@ -17,12 +17,13 @@
 
 from RAI.metrics.metric_group import MetricGroup
 from RAI.all_types import all_output_requirements
-from RAI.dataset import NumpyData
 import datetime
 import os
 
 
 class MetadataGroup(MetricGroup, class_location=os.path.abspath(__file__)):
+    model_dependent = True
+
     def __init__(self, ai_system) -> None:
         super().__init__(ai_system)
 
@@ -36,11 +37,11 @@ class MetadataGroup(MetricGroup, class_location=os.path.abspath(__file__)):
         samples = 0
         if "data" in data_dict and data_dict["data"] is not None:
             data = data_dict["data"]
-            if isinstance(data, NumpyData):
-                if data.X is not None:
-                    samples = data.X.shape[0]
-                elif data.y is not None:
-                    samples = len(data.y)
+            # Batched data holds the X and y of its current batch
+            if data.X is not None:
+                samples = data.X.shape[0]
+            elif data.y is not None:
+                samples = len(data.y)
         else:
             for output_type in all_output_requirements:
                 if output_type in data_dict and data_dict[output_type] is not None:
@@ -22,6 +22,8 @@ import copy
 
 
 class TreeModels(MetricGroup, class_location=os.path.abspath(__file__)):
+    model_dependent = True
+
     def __init__(self, ai_system) -> None:
         super().__init__(ai_system)
 
@@ -44,8 +46,9 @@ class TreeModels(MetricGroup, class_location=os.path.abspath(__file__)):
             self.metrics["estimator_params"].value = copy.copy(model.estimators_)
         self.metrics["feature_names"].value = [f.name for f in self.ai_system.meta_database.features]
 
+    # The values only describe the model, so they are computed with the first batch
     def compute_batch(self, data_dict):
-        if self.metrics["feature_names"].value is not None:
+        if self.metrics["feature_names"].value is None:
             self.compute(data_dict)
 
     # TODO: Does not work with Decision Trees
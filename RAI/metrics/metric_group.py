@@ -25,6 +25,29 @@ from .metric import Metric
 __all__ = ['MetricGroup']
 
 
+# Checks a metric group configuration against the provided AiSystem, used before the group's module is imported
+def config_is_compatible(config, ai_system):
+    compatible = config["compatibility"]["task_type"] == []\
+        or any(i == ai_system.task for i in config["compatibility"]["task_type"])\
+        or (any(i == "classification" for i in config["compatibility"]["task_type"])
+            and ai_system.task == "binary_classification")  # noqa : W503
+    compatible = compatible and (config["compatibility"]["data_type"] is None or config["compatibility"][
+        "data_type"] == [] or all(item in ai_system.meta_database.data_format
+                                  for item in config["compatibility"]["data_type"]))
+    compatible = compatible and (config["compatibility"]["output_requirements"] == [] or  # noqa : W504
+                                 all(item in ai_system.data_dict for item in  # noqa : W504
+                                     config["compatibility"]["output_requirements"]))  # noqa : W504
+    compatible = compatible and (config["compatibility"]["dataset_requirements"] is None or  # noqa : W504
+                                 all(item in ai_system.meta_database.stored_data for item in
+                                     config["compatibility"]["dataset_requirements"]))
+    compatible = compatible and (config["compatibility"]["data_requirements"] == [] or  # noqa : W504
+                                 all(type(item).__name__ in config["compatibility"]["data_requirements"] for
+                                     item in ai_system.dataset.data_dict.values()))
+    compatible = compatible and compare_runtimes(ai_system.metric_manager.user_config.get("time_complexity"),
+                                                 config["complexity_class"])
+    return compatible
+
+
 class MetricGroup(ABC):
     """
     MetricGroups are a group of related metrics. This class loads in information about a
@@ -34,6 +57,8 @@ class MetricGroup(ABC):
 
     name = ""
     config = None
+    # Groups describing the model or the measurement rather than the data, computed again for every model
+    model_dependent = False
 
     # Checks if the group is compatible with the provided AiSystem
     @classmethod
@@ -48,26 +73,7 @@ class MetricGroup(ABC):
         :return: Compatible object
 
         """
-
-        compatible = cls.config["compatibility"]["task_type"] == []\
-            or any(i == ai_system.task for i in cls.config["compatibility"]["task_type"])\
-            or (any(i == "classification" for i in cls.config["compatibility"]["task_type"])
-                and ai_system.task == "binary_classification")  # noqa : W503
-        compatible = compatible and (cls.config["compatibility"]["data_type"] is None or cls.config["compatibility"][
-            "data_type"] == [] or all(item in ai_system.meta_database.data_format
-                                      for item in cls.config["compatibility"]["data_type"]))
-        compatible = compatible and (cls.config["compatibility"]["output_requirements"] == [] or  # noqa : W504
-                                     all(item in ai_system.data_dict for item in  # noqa : W504
-                                         cls.config["compatibility"]["output_requirements"]))  # noqa : W504
-        compatible = compatible and (cls.config["compatibility"]["dataset_requirements"] is None or  # noqa : W504
-                                     all(item in ai_system.meta_database.stored_data for item in
-                                         cls.config["compatibility"]["dataset_requirements"]))
-        compatible = compatible and (cls.config["compatibility"]["data_requirements"] == [] or  # noqa : W504
-                                     all(type(item).__name__ in cls.config["compatibility"]["data_requirements"] for
-                                         item in ai_system.dataset.data_dict.values()))
-        compatible = compatible and compare_runtimes(ai_system.metric_manager.user_config.get("time_complexity"),
-                                                     cls.config["complexity_class"])
-        return compatible
+        return config_is_compatible(cls.config, ai_system)
 
     # Registers a subclass
     def __init_subclass__(cls, class_location=None, **kwargs):
@@ -208,5 +214,43 @@ class MetricGroup(ABC):
     def finalize_batch_compute(self):
         pass
 
+    def partial_state(self):
+        """
+        Returns the state folded by compute_batch since the last reset, to be merged into the same group elsewhere.
+        The state can be pickled, so partial states computed in other processes can be combined.
+
+        :param: None
+
+        :return: state, or None for groups which do not support merge
+
+        """
+        return None
+
+    def merge(self, state):
+        """
+        Folds the partial state of another instance of this group, computed on other rows, into this group's state.
+        finalize_batch_compute then sets the metric values of all the rows.
+
+        :param: state returned by partial_state
+
+        :return: None
+
+        """
+        raise NotImplementedError(f"{self.name} does not support merging partial states")
+
+    # Returns True if the values only depend on the data, so one compute is shared by every model evaluated on it
+    @classmethod
+    def is_data_only(cls):
+        return not cls.model_dependent and cls.config["compatibility"]["output_requirements"] == []
+
+    # Returns True if the group implements partial_state and merge, so it can be computed on shards of the data
+    def is_mergeable(self):
+        return type(self).merge is not MetricGroup.merge
+
+    # Returns True if merging the partial states of shards gives the values of compute, up to the tolerances
+    # accepted in user_config, so sharded_compute may compute the group in other processes
+    def is_merge_exact(self):
+        return True
+
     def update(self, data):
         pass
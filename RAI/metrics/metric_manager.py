@@ -15,11 +15,16 @@
 # SPDX-License-Identifier: Apache-2.0
 
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
 from typing import List
+import numpy as np
 from RAI import utils
+from RAI.dataset import IteratorData, NumpyData
 from RAI.all_types import all_output_requirements, all_complexity_classes, all_dataset_requirements, \
     all_data_types, all_task_types
 from RAI.metrics.metric_registry import registry
+from RAI.metrics.compute_memo import ComputeMemo
 import logging
 logger = logging.getLogger(__name__)
 
@@ -48,8 +53,9 @@ class MetricManager(object):
         self._last_certificate_values = None
         self.ai_system = ai_system
         self.metric_groups = {}
+        self.dependency_graph = {}
         self.user_config = {"fairness": {"priv_group": {}, "protected_attributes": [], "positive_label": 1},
-                            "time_complexity": "exponential"}
+                            "time_complexity": "exponential", "executor": None, "max_workers": None}
 
     def standardize_user_config(self, user_config: dict):
         """
@@ -93,15 +99,17 @@ class MetricManager(object):
         blacklist = user_config.get("blacklist", [])
 
         # Find all compatible metric groups
-        for metric_group_name in registry:
+        for metric_group_name in list(registry):
             if metric_groups is not None and metric_group_name not in metric_groups:
                 continue
             metric_class = registry[metric_group_name]
             self._validate_config(metric_class.config)
-            if metric_class.is_compatible(
-                    self.ai_system) and metric_group_name in whitelist and metric_group_name not in blacklist:
+            if metric_group_name in whitelist and metric_group_name not in blacklist and metric_class.is_compatible(
+                    self.ai_system):
+                # Groups registered from their json are imported by the compatibility check
+                metric_class = registry[metric_group_name]
                 compatible_metrics.append(metric_class)
-                dependencies[metric_class.config["name"]] = metric_class.config["dependency_list"]
+                dependencies[metric_class.config["name"]] = list(metric_class.config["dependency_list"])
                 for dependency in metric_class.config["dependency_list"]:
                     if dependent.get(dependency) is None:
                         dependent[dependency] = []
@@ -135,6 +143,8 @@ class MetricManager(object):
             if not removed:
                 raise AttributeError("Circular dependency detected in ", [val.name for val in compatible_metrics])
 
+        self.dependency_graph = {name: list(group.dependency_list) for name, group in self.metric_groups.items()}
+
     def reset_measurements(self) -> None:
         """
         Reset all the certificate, metric, sample and time_stamp values
@@ -192,23 +202,87 @@ class MetricManager(object):
                 metric_obj.config["tags"] = self.metric_groups[group].tags  # Change this up after
         return result
 
-    def compute(self, data_dict) -> dict:
+    def compute(self, data_dict, metric_groups: List[str] = None, memo: ComputeMemo = None) -> dict:
         """
-        Perform computation on metric objects and returns the value as a metric group in dict format
+        Perform computation on metric objects and returns the value as a metric group in dict format.
+        When user_config["executor"] is "thread" or "process", independent metric groups are run in parallel
+        while respecting the dependency graph built in initialize.
+        Intermediates shared by several groups are kept in data_dict["memo"] until the compute ends.
 
         :param data_dict: Accepts the data dict metric object
+        :param metric_groups: names of the metric groups to compute, by default every group.
+            Groups left out keep their current values and are not exported
+        :param memo: memo holding intermediates computed earlier, kept by the caller after the compute.
+            By default a new memo is used and cleared when the compute ends
 
         :return: returns the value as a metric group
         """
-        for metric_group_name in self.metric_groups:
-            self.metric_groups[metric_group_name].compute(data_dict)
-        result = {}
-        for group in self.metric_groups:
-            result[group] = {}
-            for metric in self.metric_groups[group].metrics:
-                metric_obj = self.metric_groups[group].metrics[metric]
-                result[group][metric] = utils.jsonify(metric_obj.value)
-        return result
+        names = list(self.metric_groups)
+        if metric_groups is not None:
+            names = [name for name in names if name in metric_groups]
+        executor = self.user_config.get("executor")
+        owns_memo = memo is None
+        if owns_memo:
+            memo = ComputeMemo()
+        data_dict["memo"] = memo
+        try:
+            if executor is None:
+                for metric_group_name in names:
+                    self.metric_groups[metric_group_name].compute(data_dict)
+            else:
+                self._parallel_compute(data_dict, executor, self.user_config.get("max_workers"), names)
+        finally:
+            data_dict.pop("memo", None)
+            if owns_memo:
+                memo.clear()
+        return self._export_values({name: self.metric_groups[name] for name in names})
+
+    def _parallel_compute(self, data_dict, executor: str, max_workers: int = None, names: List[str] = None) -> None:
+        """
+        Schedules metric group computes on a thread or process pool. A group is submitted as soon as
+        every group in its dependency list has finished.
+
+        :param data_dict: Accepts the data dict metric object
+        :param executor: "thread" or "process"
+        :param max_workers: maximum number of workers, by default chosen by the executor
+        :param names: names of the metric groups to compute, by default every group.
+            Dependencies outside of names are treated as already computed
+
+        :return: None
+        """
+        assert executor in ("thread", "process"), "executor must be one of None, 'thread' or 'process'"
+        pool_class = ThreadPoolExecutor if executor == "thread" else ProcessPoolExecutor
+        names = list(self.metric_groups) if names is None else names
+        pending = {name: set(self.dependency_graph.get(name, [])) & set(names) for name in names}
+        running = {}
+
+        with pool_class(max_workers=max_workers) as pool:
+            def submit_ready():
+                for name in [name for name, deps in pending.items() if len(deps) == 0]:
+                    pending.pop(name)
+                    group = self.metric_groups[name]
+                    if executor == "thread":
+                        running[pool.submit(group.compute, data_dict)] = name
+                    else:
+                        running[pool.submit(_compute_group_values, group, data_dict)] = name
+
+            submit_ready()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    values = future.result()
+                    if executor == "process":
+                        for metric in values:
+                            self.metric_groups[name].metrics[metric].value = values[metric]
+                    for deps in pending.values():
+                        deps.discard(name)
+                submit_ready()
+
+    def _export_values(self, metric_groups: dict = None) -> dict:
+        # user_config["schema_export"] converts values with the types declared in the metric group json files
+        metric_groups = self.metric_groups if metric_groups is None else metric_groups
+        return export_values(metric_groups, self.user_config.get("schema_export", False))
 
     def iterator_compute(self, data_dict, preds: dict) -> dict:
         """
@@ -238,20 +312,94 @@ class MetricManager(object):
                 elif output_type in data_dict:
                     data_dict.pop(output_type)
             cur_idx += data_len
+            self._compute_batch(data_dict)
 
-            for metric_group_name in self.metric_groups:
-                self.metric_groups[metric_group_name].compute_batch(data_dict)
+        for metric_group_name in self.metric_groups:
+            self.metric_groups[metric_group_name].finalize_batch_compute()
 
+        return self._export_values()
+
+    def update(self, data_dict) -> dict:
+        """
+        Folds one batch into the running state of each metric group and returns the metric values of every batch
+        seen since the metric groups were last initialized or reset. Groups keep mergeable state such as
+        confusion counts, moments, frequency tables and fairness group counts, so the cost of an update only
+        depends on the size of the batch. Groups without batch support keep no value.
+
+        :param data_dict: Accepts the data dict of the batch
+
+        :return: returns the value as a metric group
+        """
+        self._compute_batch(data_dict)
         for metric_group_name in self.metric_groups:
             self.metric_groups[metric_group_name].finalize_batch_compute()
+        return self._export_values()
 
-        result = {}
-        for group in self.metric_groups:
-            result[group] = {}
-            for metric in self.metric_groups[group].metrics:
-                metric_obj = self.metric_groups[group].metrics[metric]
-                result[group][metric] = utils.jsonify(metric_obj.value)
-        return result
+    def _compute_batch(self, data_dict) -> None:
+        compute_batch(self.metric_groups, data_dict)
+
+    def sharded_compute(self, data_dict, parallelism: int, preds: dict = None) -> dict:
+        """
+        Computes the metric groups on shards of the data in a pool of processes and merges their partial states,
+        map-reduce style. A NumpyData is split into parallelism blocks of rows, and each batch of an IteratorData
+        is a shard. Merged groups report the values of their batch compute, as in iterator_compute.
+        Groups which do not support merge, or whose merge is not exact such as the summary statistics without a
+        user_config["stats"]["quantile_tolerance"], are computed in this process, on all rows of a NumpyData or
+        batch by batch for an IteratorData.
+
+        :param data_dict: Accepts the data dict metric object
+        :param parallelism: number of worker processes
+        :param preds: predictions for all rows, by default the outputs in data_dict
+
+        :return: returns the value as a metric group
+        """
+        mergeable = {name: group for name, group in self.metric_groups.items()
+                     if group.is_mergeable() and group.is_merge_exact()}
+        others = {name: group for name, group in self.metric_groups.items() if name not in mergeable}
+        for group in self.metric_groups.values():
+            group.reset()
+        batched = isinstance(data_dict["data"], IteratorData)
+        if preds is None:
+            preds = {output_type: data_dict[output_type] for output_type in all_output_requirements
+                     if data_dict.get(output_type) is not None}
+
+        shards = _shards(data_dict, parallelism, preds, self.ai_system._get_masks())
+        if mergeable:
+            # At most two shards per worker are queued, and states are merged in shard order
+            running = deque()
+            with ProcessPoolExecutor(max_workers=parallelism, initializer=_set_shard_groups,
+                                     initargs=(mergeable,)) as pool:
+                for shard in shards:
+                    if batched:
+                        compute_batch(others, shard)
+                    running.append(pool.submit(_compute_shard_states, shard))
+                    while len(running) >= 2 * parallelism:
+                        self._merge_states(running.popleft().result())
+                while running:
+                    self._merge_states(running.popleft().result())
+            for group in mergeable.values():
+                group.finalize_batch_compute()
+        elif batched:
+            for shard in shards:
+                compute_batch(others, shard)
+
+        if batched:
+            for group in others.values():
+                group.finalize_batch_compute()
+        else:
+            memo = ComputeMemo()
+            data_dict["memo"] = memo
+            try:
+                for group in others.values():
+                    group.compute(data_dict)
+            finally:
+                data_dict.pop("memo", None)
+                memo.clear()
+        return self._export_values()
+
+    def _merge_states(self, states: dict) -> None:
+        for name, state in states.items():
+            self.metric_groups[name].merge(state)
 
     # batched_compute
     # if data instance of IteratorData, iterate through batches,
@@ -342,3 +490,84 @@ class MetricManager(object):
             assert "explanation" in config["metrics"][metric] and \
                    isinstance(config["metrics"][metric]["explanation"], str), \
                 metric + " must contain a valid explanation."
+
+
+# Returns the jsonified metric values of each metric group, use_schema converts each value using its metric type
+def export_values(metric_groups, use_schema: bool = False) -> dict:
+    result = {}
+    for group in metric_groups:
+        result[group] = {}
+        for metric in metric_groups[group].metrics:
+            metric_obj = metric_groups[group].metrics[metric]
+            if use_schema:
+                result[group][metric] = utils.jsonify_metric(metric_obj.value, metric_obj.type)
+            else:
+                result[group][metric] = utils.jsonify(metric_obj.value)
+    return result
+
+
+# Folds a batch into each metric group, sharing the intermediates of the batch through a memo
+def compute_batch(metric_groups, data_dict) -> None:
+    memo = ComputeMemo()
+    data_dict["memo"] = memo
+    try:
+        for metric_group_name in metric_groups:
+            metric_groups[metric_group_name].compute_batch(data_dict)
+    finally:
+        data_dict.pop("memo", None)
+        memo.clear()
+
+
+# Yields the data dict of each shard, holding a NumpyData of its rows and the matching rows of each output
+def _shards(data_dict, parallelism, preds, masks):
+    data = data_dict["data"]
+    if isinstance(data, IteratorData):
+        data.reset()
+        start = 0
+        while data.next_batch():
+            stop = start + len(data.X if data.X is not None else data.y)
+            yield _shard(data_dict, NumpyData(data.X, data.y, data.rawX), preds, start, stop, masks)
+            start = stop
+        return
+    rows = len(data.X if data.X is not None else data.y)
+    bounds = np.linspace(0, rows, parallelism + 1).astype(int)
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        shard_data = NumpyData(_rows(data.X, start, stop), _rows(data.y, start, stop), _rows(data.rawX, start, stop),
+                               scalar_dtype=data.scalar_dtype)
+        yield _shard(data_dict, shard_data, preds, start, stop, masks)
+
+
+def _shard(data_dict, data, preds, start, stop, masks):
+    data.initialize(masks)
+    shard = {key: value for key, value in data_dict.items() if key not in preds and key != "memo"}
+    shard["data"] = data
+    for output_type in preds:
+        shard[output_type] = preds[output_type][start:stop]
+    return shard
+
+
+def _rows(values, start, stop):
+    return None if values is None else values[start:stop]
+
+
+# The mergeable metric groups of a sharded_compute worker process, sent once when the worker starts
+_shard_groups = None
+
+
+def _set_shard_groups(metric_groups) -> None:
+    global _shard_groups
+    _shard_groups = metric_groups
+
+
+# Runs in a worker process, folds one shard into fresh group states and sends them back to be merged
+def _compute_shard_states(shard) -> dict:
+    for group in _shard_groups.values():
+        group.reset()
+    compute_batch(_shard_groups, shard)
+    return {name: group.partial_state() for name, group in _shard_groups.items()}
+
+
+# Runs in a worker process, only the resulting metric values are sent back to the parent
+def _compute_group_values(metric_group, data_dict) -> dict:
+    metric_group.compute(data_dict)
+    return {metric: metric_group.metrics[metric].value for metric in metric_group.metrics}
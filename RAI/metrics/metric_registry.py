@@ -14,16 +14,87 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 
-
 """
 Registers Metric Classes on creation. All valid metric groups can then be found in the registry dictionary.
+Groups of the built in packages are first registered from their .json file as LazyMetricGroups,
+the class replaces its entry once its module is imported.
 """
 
+import json
+import logging
+import os
+from RAI.utils.utils import timed_import
+
+logger = logging.getLogger(__name__)
+
 registry = {}
 
 
+class LazyMetricGroup:
+    """
+    Registry entry of a metric group whose module was not imported yet. Compatibility is first checked
+    against the .json configuration alone, the module is only imported when that check passes.
+
+    :param config: the metric group's json configuration
+    :param module_name: module defining the metric group class
+    """
+
+    def __init__(self, config, module_name):
+        self.config = config
+        self.name = config["name"]
+        self.module_name = module_name
+
+    def load(self):
+        """
+        Imports the module of the metric group
+
+        :return: the metric group class
+        """
+        timed_import(self.module_name)
+        return registry[self.name]
+
+    def is_compatible(self, ai_system):
+        from RAI.metrics.metric_group import config_is_compatible
+        if not config_is_compatible(self.config, ai_system):
+            return False
+        try:
+            metric_class = self.load()
+        except ImportError as e:
+            logger.warning(f"metric group {self.name} is unavailable: {e}")
+            return False
+        return metric_class.is_compatible(ai_system)
+
+    def __call__(self, ai_system):
+        return self.load()(ai_system)
+
+
 def register_class(class_name, class_object):
     if class_name != "":
-        if class_name in registry:
+        if class_name in registry and not isinstance(registry[class_name], LazyMetricGroup):
             raise NameError("Class Name: " + class_name + " already exists. Please enter a unique class name.")
         registry[class_name] = class_object
+
+
+def register_lazy_groups(package_name, package_path, classes):
+    """
+    Registers the metric groups of a package from their .json files without importing their modules
+
+    :param package_name: name of the package, __name__ in its __init__
+    :param package_path: directory of the package
+    :param classes: maps each metric group class name to the module of the package defining it
+
+    :return: a module level __getattr__ importing the classes on first access
+    """
+    for module in dict.fromkeys(classes.values()):
+        config_file = os.path.join(package_path, module + ".json")
+        if os.path.exists(config_file):
+            with open(config_file) as f:
+                config = json.load(f)
+            if config["name"] not in registry:
+                registry[config["name"]] = LazyMetricGroup(config, package_name + "." + module)
+
+    def __getattr__(name):
+        if name not in classes:
+            raise AttributeError(f"module {package_name!r} has no attribute {name!r}")
+        return getattr(timed_import(package_name + "." + classes[name]), name)
+    return __getattr__
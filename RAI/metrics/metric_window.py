@@ -0,0 +1,161 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import math
+import time
+from collections import deque
+from RAI.metrics.compute_memo import ComputeMemo
+from RAI.metrics.metric_manager import export_values
+
+__all__ = ['MetricWindow']
+
+
+class _Pane:
+    def __init__(self, start, metric_groups) -> None:
+        self.start = start
+        self.metric_groups = metric_groups
+
+
+class MetricWindow:
+    """
+    MetricWindow computes metrics over tumbling or sliding time windows on top of a MetricManager.
+    Windows start every step seconds and last size seconds, so step == size gives tumbling windows and
+    step < size gives overlapping sliding windows, for example the accuracy of the last hour every minute.
+    Time is split into panes of step seconds kept in a ring buffer, and each batch is folded into the
+    mergeable state of its pane only, so an update costs one batch whatever the number of overlapping windows.
+    When a window is emitted, the partial states of its panes are merged into new metric groups.
+    Groups which do not support merge keep one instance per open window, each batch being folded into all of them.
+    A window is emitted once a batch arrives after its end, tagged with its start time.
+
+    :param metric_manager: initialized MetricManager whose metric groups are created again for each pane
+    :param size: length of a window in seconds, a multiple of step
+    :param step: seconds between the starts of two windows, by default size
+    :param data_type: name the window values are stored under, by default "window"
+    :param on_window: called with the metric values of each window when it is emitted, for example RaiDB.add_measurement
+    """
+
+    def __init__(self, metric_manager, size: float, step: float = None, data_type: str = "window", on_window=None) -> None:
+        step = size if step is None else step
+        assert 0 < step <= size, "step must be positive and at most size"
+        panes = round(size / step)
+        assert math.isclose(panes * step, size), "size must be a multiple of step"
+        self.metric_manager = metric_manager
+        self.size = size
+        self.step = step
+        self.data_type = data_type
+        self.on_window = on_window
+        self._panes = deque(maxlen=panes)
+        # Instances of the groups without merge, by start of their window
+        self._windows = {}
+        self._next_start = None
+
+    def update(self, data_dict, timestamp: float = None) -> list:
+        """
+        Folds a batch into the pane containing its timestamp, after emitting the windows ending before it.
+        A batch arriving after every window containing it was emitted is folded into the first open window.
+
+        :param data_dict: data dict of the batch, as passed to MetricManager.update
+        :param timestamp: time of the batch in seconds since the epoch, by default now
+
+        :return: the metric values of the windows emitted by this batch
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        emitted = []
+        while self._panes and self._window_start() + self.size <= timestamp:
+            emitted.append(self._emit(self._window_start()))
+
+        pane_start = math.floor(timestamp / self.step) * self.step
+        if self._next_start is not None:
+            pane_start = max(pane_start, self._next_start)
+        pane = next((pane for pane in self._panes if pane.start >= pane_start), None)
+        if pane is None or pane.start != pane_start:
+            index = len(self._panes) if pane is None else self._panes.index(pane)
+            pane = _Pane(pane_start, self._create_metric_groups(mergeable=True))
+            self._panes.insert(index, pane)
+
+        # The windows containing the batch which have not been emitted yet
+        window_starts = [pane.start - i * self.step for i in range(self._panes.maxlen)]
+        window_starts = [start for start in window_starts if self._next_start is None or start >= self._next_start]
+        for start in window_starts:
+            if start not in self._windows:
+                self._windows[start] = self._create_metric_groups(mergeable=False)
+
+        tag = data_dict.get("tag")
+        memo = ComputeMemo()
+        data_dict["memo"] = memo
+        try:
+            data_dict["tag"] = _format_time(pane.start)
+            for metric_group in pane.metric_groups.values():
+                metric_group.compute_batch(data_dict)
+            for start in window_starts:
+                data_dict["tag"] = _format_time(start)
+                for metric_group in self._windows[start].values():
+                    metric_group.compute_batch(data_dict)
+        finally:
+            data_dict["tag"] = tag
+            data_dict.pop("memo", None)
+            memo.clear()
+        return emitted
+
+    def flush(self) -> list:
+        """
+        Emits every open window, for example before shutting down
+
+        :return: the metric values of the emitted windows
+        """
+        emitted = []
+        while self._panes:
+            emitted.append(self._emit(self._window_start()))
+        return emitted
+
+    # Start of the next window to emit, the first one containing the oldest pane
+    def _window_start(self) -> float:
+        start = self._panes[0].start - (self._panes.maxlen - 1) * self.step
+        return start if self._next_start is None else max(start, self._next_start)
+
+    def _create_metric_groups(self, mergeable: bool) -> dict:
+        groups = self.metric_manager.metric_groups
+        return {name: type(groups[name])(self.metric_manager.ai_system) for name in groups
+                if groups[name].is_mergeable() == mergeable}
+
+    # Merges the panes of the window starting at start, and drops the panes no later window contains
+    def _emit(self, start) -> dict:
+        metric_groups = self._create_metric_groups(mergeable=True)
+        for pane in self._panes:
+            if start <= pane.start < start + self.size:
+                for name, metric_group in pane.metric_groups.items():
+                    metric_groups[name].merge(metric_group.partial_state())
+        metric_groups.update(self._windows.pop(start, None) or self._create_metric_groups(mergeable=False))
+        groups = self.metric_manager.metric_groups
+        metric_groups = {name: metric_groups[name] for name in groups}
+        for metric_group in metric_groups.values():
+            metric_group.finalize_batch_compute()
+
+        self._next_start = start + self.step
+        while self._panes and self._panes[0].start < self._next_start:
+            self._panes.popleft()
+        for window_start in [window_start for window_start in self._windows if window_start < self._next_start]:
+            del self._windows[window_start]
+
+        use_schema = self.metric_manager.user_config.get("schema_export", False)
+        values = {self.data_type: export_values(metric_groups, use_schema)}
+        if self.on_window is not None:
+            self.on_window(values)
+        return values
+
+
+def _format_time(timestamp) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
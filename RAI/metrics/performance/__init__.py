@@ -15,9 +15,15 @@
 # SPDX-License-Identifier: Apache-2.0
 
 
-from .performance_cl import PerformanceClassificationMetricGroup  # noqa : F401
-from .performance_reg import PerformanceRegMetricGroup  # noqa : F401
-from .performance_cl_probas import PerformanceClassificationProbasMetricGroup  # noqa : F401
-from .image_generation_inception import ImageGenerationInception  # noqa : F401
-from .image_generation import ImageGeneration  # noqa : F401
-from .text_generation import TextGeneration  # noqa : F401
+import os
+from RAI.metrics.metric_registry import register_lazy_groups
+
+# Groups are registered from their .json files, their modules are only imported once used
+__getattr__ = register_lazy_groups(__name__, os.path.dirname(__file__), {
+    "PerformanceClassificationMetricGroup": "performance_cl",
+    "PerformanceRegMetricGroup": "performance_reg",
+    "PerformanceClassificationProbasMetricGroup": "performance_cl_probas",
+    "ImageGenerationInception": "image_generation_inception",
+    "ImageGeneration": "image_generation",
+    "TextGeneration": "text_generation"
+})
@@ -16,18 +16,19 @@
 
 
 from RAI.metrics.metric_group import MetricGroup
-from RAI.dataset import NumpyData
+from RAI.metrics.compute_memo import get_memo
 import numpy as np
-import sklearn
 import os
-import warnings
+
+# Largest integer label counted directly by index, larger or non integer labels are encoded first
+_MAX_DENSE_LABEL = 1024
 
 
 class PerformanceClassificationMetricGroup(MetricGroup, class_location=os.path.abspath(__file__)):
     def __init__(self, ai_system) -> None:
         super().__init__(ai_system)
-        self._y_data = []
-        self._preds = []
+        self._classes = None
+        self._confusion = None
 
     def update(self, data):
         pass
@@ -38,53 +39,105 @@ class PerformanceClassificationMetricGroup(MetricGroup, class_location=os.path.a
     def compute(self, data_dict):
         data = data_dict["data"]
         preds = data_dict["predict"]
-        args = {}
-        y_data = data.y
-
-        warnings.filterwarnings("ignore")
-        self.metrics["accuracy"].value = sklearn.metrics.accuracy_score(y_data, preds, **args.get("accuracy", {}))
-        self.metrics["balanced_accuracy"].value = sklearn.metrics.balanced_accuracy_score(y_data, preds, **args.get("balanced_accuracy", {}))
-        self.metrics["confusion_matrix"].value = sklearn.metrics.confusion_matrix(y_data, preds, **args.get("confusion_matrix", {}))
-        fptn = get_fptn(self.metrics["confusion_matrix"].value)  # TP, TN, FP, FN values. Used quite a bit.
-
-        self.metrics["fp_rate"].value = _fp_rate(fptn, **args.get("fp_rate", {}))
-        self.metrics["fp_rate_avg"].value = np.mean(self.metrics["fp_rate"].value)
-
-        self.metrics["f1"].value = sklearn.metrics.f1_score(y_data, preds, average=None, **args.get("f1", {}))
-        self.metrics["f1_avg"].value = np.mean(self.metrics["f1"].value)
-
-        self.metrics["jaccard_score"].value = np.nan_to_num(sklearn.metrics.jaccard_score(
-            y_data, preds, average=None, **args.get("jaccard_score", {})), nan=0
-        )
-        self.metrics["jaccard_score_avg"].value = np.mean(self.metrics["jaccard_score"].value)
-
-        self.metrics["precision_score"].value = sklearn.metrics.precision_score(y_data, preds, average=None)
-        self.metrics["precision_score_avg"].value = np.mean(self.metrics["precision_score"].value)
-
-        self.metrics["recall_score"].value = np.nan_to_num(_recall_score(fptn, **args.get("recall_score", {})), nan=0)
-        self.metrics["recall_score_avg"].value = np.mean(self.metrics["recall_score"].value)
+        self._classes, self._confusion = get_memo(data_dict).get("confusion", batch_confusion, data.y, preds)
+        self._compute_from_confusion()
 
     def reset(self):
         super().reset()
-        self._y_data = []
-        self._preds = []
+        self._classes = None
+        self._confusion = None
 
     def compute_batch(self, data_dict):
         data = data_dict["data"]
         preds = data_dict["predict"]
-        y_data = data.y
+        self._add_to_confusion(data.y, preds)
+
+    def partial_state(self):
+        return {"classes": self._classes, "confusion": self._confusion}
 
-        # classification uses integer based y values, assume it can be held in memory for now
-        # TODO: replace with stream based calculations in future
-        self._y_data.extend(y_data)
-        self._preds.extend(preds)
+    def merge(self, state):
+        if state["confusion"] is not None:
+            self._classes, self._confusion = merge_confusion(self._classes, self._confusion,
+                                                             state["classes"], state["confusion"])
 
     def finalize_batch_compute(self):
-        temp_dict = {}
-        resulting_data = NumpyData(None, self._y_data)
-        temp_dict["data"] = resulting_data
-        temp_dict["predict"] = self._preds
-        self.compute(temp_dict)
+        if self._confusion is not None:
+            self._compute_from_confusion()
+
+    def _add_to_confusion(self, y_data, preds):
+        classes, confusion = batch_confusion(y_data, preds)
+        self._classes, self._confusion = merge_confusion(self._classes, self._confusion, classes, confusion)
+
+    def _compute_from_confusion(self):
+        # Only labels seen in either y or the predictions are reported, matching sklearn.metrics.confusion_matrix
+        present = (self._confusion.sum(axis=0) + self._confusion.sum(axis=1)) > 0
+        confusion_matrix = self._confusion[np.ix_(present, present)]
+        fptn = get_fptn(confusion_matrix)  # TP, TN, FP, FN values. Used quite a bit.
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.metrics["accuracy"].value = np.trace(confusion_matrix) / confusion_matrix.sum()
+            per_class_recall = np.diag(confusion_matrix) / confusion_matrix.sum(axis=1)
+            self.metrics["balanced_accuracy"].value = np.mean(per_class_recall[~np.isnan(per_class_recall)])
+            self.metrics["confusion_matrix"].value = confusion_matrix
+
+            self.metrics["fp_rate"].value = _fp_rate(fptn)
+            self.metrics["fp_rate_avg"].value = np.mean(self.metrics["fp_rate"].value)
+
+            self.metrics["f1"].value = np.nan_to_num(_f1_score(fptn), nan=0)
+            self.metrics["f1_avg"].value = np.mean(self.metrics["f1"].value)
+
+            self.metrics["jaccard_score"].value = np.nan_to_num(_jaccard_score(fptn), nan=0)
+            self.metrics["jaccard_score_avg"].value = np.mean(self.metrics["jaccard_score"].value)
+
+            self.metrics["precision_score"].value = np.nan_to_num(_precision_score(fptn), nan=0)
+            self.metrics["precision_score_avg"].value = np.mean(self.metrics["precision_score"].value)
+
+            self.metrics["recall_score"].value = np.nan_to_num(_recall_score(fptn), nan=0)
+            self.metrics["recall_score_avg"].value = np.mean(self.metrics["recall_score"].value)
+
+
+# Returns the sorted label values and the confusion matrix of a single batch, using one np.bincount
+def batch_confusion(y_data, preds):
+    y_data = np.asarray(y_data).ravel()
+    preds = np.asarray(preds).ravel()
+    both = np.concatenate((y_data, preds))
+    dense = both.dtype.kind in "biuf" and len(both) > 0 and both.min() >= 0 and both.max() < _MAX_DENSE_LABEL \
+        and (both.dtype.kind != "f" or np.all(np.mod(both, 1) == 0))
+    if dense:
+        n_classes = int(both.max()) + 1
+        classes = np.arange(n_classes)
+        y_idx = y_data.astype(np.int64)
+        pred_idx = preds.astype(np.int64)
+    else:
+        classes, indices = np.unique(both, return_inverse=True)
+        n_classes = len(classes)
+        y_idx, pred_idx = indices[:len(y_data)], indices[len(y_data):]
+    confusion = np.bincount(y_idx * n_classes + pred_idx, minlength=n_classes * n_classes)
+    return classes, confusion.reshape(n_classes, n_classes)
+
+
+def merge_confusion(classes_a, confusion_a, classes_b, confusion_b):
+    """
+    Merges two confusion matrices whose rows and columns are indexed by the sorted label arrays classes_a and classes_b
+
+    :param classes_a: labels of confusion_a, or None for an empty state
+    :param confusion_a: confusion matrix, or None for an empty state
+    :param classes_b: labels of confusion_b
+    :param confusion_b: confusion matrix
+
+    :return: merged labels and confusion matrix
+    """
+    if classes_a is None:
+        return classes_b, confusion_b
+    if len(classes_a) == len(classes_b) and np.array_equal(classes_a, classes_b):
+        return classes_a, confusion_a + confusion_b
+    classes = np.union1d(classes_a, classes_b)
+    confusion = np.zeros((len(classes), len(classes)), dtype=np.int64)
+    idx_a = np.searchsorted(classes, classes_a)
+    idx_b = np.searchsorted(classes, classes_b)
+    confusion[np.ix_(idx_a, idx_a)] += confusion_a
+    confusion[np.ix_(idx_b, idx_b)] += confusion_b
+    return classes, confusion
 
 
 def get_fptn(confusion_matrix):
@@ -109,3 +162,11 @@ def _precision_score(fptn):
 
 def _recall_score(fptn):
     return fptn['tp'] / (fptn['tp'] + fptn['fn'])
+
+
+def _f1_score(fptn):
+    return 2 * fptn['tp'] / (2 * fptn['tp'] + fptn['fp'] + fptn['fn'])
+
+
+def _jaccard_score(fptn):
+    return fptn['tp'] / (fptn['tp'] + fptn['fp'] + fptn['fn'])
@@ -16,8 +16,9 @@
 
 
 from RAI.metrics.metric_group import MetricGroup
+from RAI.metrics.compute_memo import get_memo
+from RAI.metrics.performance.performance_cl import batch_confusion
 import numpy as np
-import sklearn
 import os
 
 
@@ -37,7 +38,14 @@ class AdversarialRobustnessMetricGroup(MetricGroup, class_location=os.path.abspa
 
         data = data_dict["data"]
         preds = data_dict["predict"]
-        self.metrics["inaccuracy"].value = np.sqrt(1 - sklearn.metrics.accuracy_score(data.y, preds, **args.get("accuracy", {})))
+        if "accuracy" in args:
+            from sklearn.metrics import accuracy_score
+            accuracy = accuracy_score(data.y, preds, **args["accuracy"])
+        else:
+            # Same confusion matrix as the classification performance group
+            classes, confusion = get_memo(data_dict).get("confusion", batch_confusion, data.y, preds)
+            accuracy = np.trace(confusion) / confusion.sum()
+        self.metrics["inaccuracy"].value = np.sqrt(1 - accuracy)
 
 
 # TODO: Add more metrics
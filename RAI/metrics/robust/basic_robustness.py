@@ -15,6 +15,7 @@
 # SPDX-License-Identifier: Apache-2.0
 
 from RAI.metrics.metric_group import MetricGroup
+from RAI.metrics.compute_memo import get_memo
 import numpy as np
 import os
 
@@ -33,11 +34,12 @@ class BasicRobustMetricGroup(MetricGroup, class_location=os.path.abspath(__file_
         #         and "args" in self.ai_system.metric_manager.user_config["stats"]:
         #     args = self.ai_system.metric_manager.user_config["stats"]["args"]
         scalar_data = data_dict["data"].scalar
+        memo = get_memo(data_dict)
         # scalar_data = np.array(scalar_data)
-        mean_v = np.mean(scalar_data, axis=0, keepdims=True)
-        std_v = np.std(scalar_data, axis=0, keepdims=True)
-        max_v = np.max(scalar_data, axis=0, keepdims=True)
-        min_v = np.min(scalar_data, axis=0, keepdims=True)
+        mean_v = memo.get("scalar_mean", np.mean, scalar_data, axis=0)
+        std_v = memo.get("scalar_std", np.std, scalar_data, axis=0)
+        max_v = memo.get("scalar_max", np.max, scalar_data, axis=0)
+        min_v = memo.get("scalar_min", np.min, scalar_data, axis=0)
 
         self.metrics["normalized_feature_std"].value = bool(
             np.all(np.isclose(std_v, np.ones_like(std_v))) and np.all(np.isclose(mean_v, np.ones_like(mean_v))))
@@ -15,9 +15,16 @@
 # SPDX-License-Identifier: Apache-2.0
 
 
-from .summary_stats import StatMetricGroup  # noqa : F401
-from .moments import StatMomentGroup  # noqa : F401
-from .correlation_stats_regression import CorrelationStatRegression  # noqa : F401
-from .frequency_stats import FrequencyStatMetricGroup  # noqa : F401
-from .correlation_stats_binary import BinaryCorrelationStats  # noqa : F401
-from .image_stats import ImageStatsGroup  # noqa : F401
+import os
+from . import moments  # noqa : F401
+from RAI.metrics.metric_registry import register_lazy_groups
+
+# Groups are registered from their .json files, their modules are only imported once used
+__getattr__ = register_lazy_groups(__name__, os.path.dirname(__file__), {
+    "StatMetricGroup": "summary_stats",
+    "StatMomentGroup": "moments",
+    "CorrelationStatRegression": "correlation_stats_regression",
+    "FrequencyStatMetricGroup": "frequency_stats",
+    "BinaryCorrelationStats": "correlation_stats_binary",
+    "ImageStatsGroup": "image_stats"
+})
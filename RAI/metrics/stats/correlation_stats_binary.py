@@ -16,8 +16,8 @@
 
 
 from RAI.metrics.metric_group import MetricGroup
-import scipy.stats
-from RAI.utils.utils import calculate_per_mapped_features, convert_to_feature_dict
+from RAI.utils.utils import map_to_feature_array, convert_to_feature_dict
+from RAI.utils.column_stats import column_pearsonr
 import os
 
 
@@ -39,11 +39,12 @@ class BinaryCorrelationStats(MetricGroup, class_location=os.path.abspath(__file_
         map = self.ai_system.meta_database.scalar_map
         features = self.ai_system.meta_database.features
 
-        self.metrics["point_biserial_r"].value = calculate_per_mapped_features(scipy.stats.pointbiserialr, map, features, data.scalar, data.y)
+        # The point biserial correlation is the pearson correlation with the binary labels
+        correlation, pvalue = column_pearsonr(data.scalar, data.y)
+        self.metrics["point_biserial_r"].value = map_to_feature_array(
+            [{"correlation": correlation[i], "pvalue": pvalue[i]} for i in range(len(correlation))], features, map
+        )
         for i, value in enumerate(self.metrics["point_biserial_r"].value):
-            result = {}
-            if value is not None:
-                temp = self.metrics["point_biserial_r"].value[i]
-                result = {"correlation": temp.correlation, "pvalue": temp.pvalue}
-            self.metrics["point_biserial_r"].value[i] = result
+            if value is None:
+                self.metrics["point_biserial_r"].value[i] = {}
         self.metrics["point_biserial_r"].value = convert_to_feature_dict(self.metrics["point_biserial_r"].value, [feature.name for feature in features])
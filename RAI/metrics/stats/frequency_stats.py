@@ -16,6 +16,7 @@
 
 
 from RAI.metrics.metric_group import MetricGroup
+import numpy as np
 import scipy.stats
 from RAI.utils.utils import convert_to_feature_value_dict
 import os
@@ -24,10 +25,17 @@ import os
 class FrequencyStatMetricGroup(MetricGroup, class_location=os.path.abspath(__file__)):
     def __init__(self, ai_system) -> None:
         super().__init__(ai_system)
+        self._sample_count = 0
+        self._counts = None
 
     def update(self, data):
         pass
 
+    def reset(self):
+        super().reset()
+        self._sample_count = 0
+        self._counts = None
+
     def compute(self, data_dict):
         # args = {}
         # if self.ai_system.metric_manager.user_config is not None \
@@ -38,6 +46,50 @@ class FrequencyStatMetricGroup(MetricGroup, class_location=os.path.abspath(__fil
         self.metrics["relative_freq"].value = _rel_freq(data.X, self.ai_system.meta_database.features)
         self.metrics["cumulative_freq"].value = _cumulative_freq(data.X, self.ai_system.meta_database.features)
 
+    # Keeps a running count of each value of the categorical features
+    def compute_batch(self, data_dict):
+        X = data_dict["data"].X
+        self._add_counts(_value_counts(X, self.ai_system.meta_database.features), len(X))
+
+    def partial_state(self):
+        return {"counts": self._counts, "sample_count": self._sample_count}
+
+    def merge(self, state):
+        if state["counts"] is not None:
+            self._add_counts({name: counts.copy() for name, counts in state["counts"].items()}, state["sample_count"])
+
+    def _add_counts(self, counts, sample_count):
+        if self._counts is None:
+            self._counts = counts
+        else:
+            for name in counts:
+                self._counts[name] += counts[name]
+        self._sample_count += sample_count
+
+    def finalize_batch_compute(self):
+        if self._counts is None:
+            return
+        features = {feature.name: feature for feature in self.ai_system.meta_database.features}
+        self.metrics["relative_freq"].value = {}
+        self.metrics["cumulative_freq"].value = {}
+        for name, counts in self._counts.items():
+            self.metrics["relative_freq"].value[name] = convert_to_feature_value_dict(
+                counts / max(self._sample_count, 1), features[name])
+            self.metrics["cumulative_freq"].value[name] = convert_to_feature_value_dict(
+                np.cumsum(counts).astype(np.float64).tolist(), features[name])
+
+
+# Counts of each value of the categorical features, the values being the indices of feature.values
+def _value_counts(X, features):
+    result = {}
+    for i in range(len(features)):
+        if features[i].categorical:
+            numbins = len(features[i].values)
+            column = np.asarray(X[:, i], dtype=np.float64)
+            column = column[(column >= 0) & (column < numbins)]
+            result[features[i].name] = np.bincount(column.astype(np.int64), minlength=numbins)
+    return result
+
 
 def _cumulative_freq(X, features=None):
     result = {}
@@ -17,16 +17,15 @@
 
 from RAI.metrics.metric_group import MetricGroup
 import os
-from RAI.utils import convert_float32_to_float64
 import numpy as np
 
 
 class ImageStatsGroup(MetricGroup, class_location=os.path.abspath(__file__)):
     def __init__(self, ai_system) -> None:
         super().__init__(ai_system)
-        self._batch_total_examples = 0
-        self._batch_average = [0, 0, 0]
-        self._batch_d_squared = [0.0, 0.0, 0.0]
+        self._pixel_count = 0
+        self._channel_sum = None
+        self._channel_sum_squares = None
 
     def update(self, data):
         pass
@@ -35,35 +34,49 @@ class ImageStatsGroup(MetricGroup, class_location=os.path.abspath(__file__)):
         data = data_dict["data"]
         # images are of shape [examples, image columns, c, w, h]
         images = data.image
-        means = convert_float32_to_float64(images.mean(axis=(0, 1, 3, 4)))  # images.mean((0, 1, 3, 4))
-        self.metrics["mean"].value = {"red": convert_float32_to_float64(means[0]),
-                                      "green": convert_float32_to_float64(means[1]),
-                                      "blue": convert_float32_to_float64(means[2])}
-        std = convert_float32_to_float64(images.std(axis=(0, 1, 3, 4)))
-        self.metrics["std"].value = {"red": convert_float32_to_float64(std[0]),
-                                     "green": convert_float32_to_float64(std[1]),
-                                     "blue": convert_float32_to_float64(std[2])}  # images.std((0, 1, 3, 4))
+        self.metrics["mean"].value = _to_channel_dict(images.mean(axis=(0, 1, 3, 4)))
+        self.metrics["std"].value = _to_channel_dict(images.std(axis=(0, 1, 3, 4)))
 
     def reset(self):
         super().reset()
-        self._batch_total_examples = 0
-        self._batch_average = [0, 0, 0]
-        self._batch_d_squared = [0.0, 0.0, 0.0]
+        self._pixel_count = 0
+        self._channel_sum = None
+        self._channel_sum_squares = None
 
+    # Accumulates the pixel count, sum and sum of squares of each channel with one reduction per batch
     def compute_batch(self, data_dict):
-        data = data_dict["data"]
-        images = data.image
-        for image in images:
-            self._batch_total_examples += 1
-            means = convert_float32_to_float64(image.mean(axis=(0, 2, 3)))
-            for i in range(len(self._batch_average)):
-                prev_avg = self._batch_average[i]
-                self._batch_average[i] = (self._batch_average[i] - means[i]) / self._batch_total_examples
-                self._batch_d_squared[i] = self._batch_d_squared[i] + (means[i] - self._batch_average[i]) * (means[i] - prev_avg)
+        images = np.asarray(data_dict["data"].image, dtype=np.float64)
+        if images.size == 0:
+            return
+        channel_sum = images.sum(axis=(0, 1, 3, 4))
+        channel_sum_squares = np.einsum("eichw,eichw->c", images, images)
+        self._add_sums(images.size // images.shape[2], channel_sum, channel_sum_squares)
 
-        for i in range(len(self._batch_d_squared)):
-            self._batch_d_squared[i] = self._batch_d_squared[i] / self._batch_total_examples
-            self._batch_d_squared[i] = np.sqrt(self._batch_d_squared[i])
-        self.metrics["mean"].value = {"red": self._batch_average[0], "green": self._batch_average[1], "blue": self._batch_average[2]}
-        self.metrics["std"].value = {"red": self._batch_d_squared[0], "green": self._batch_d_squared[1], "blue": self._batch_d_squared[2]}
-        pass
+    def partial_state(self):
+        return {"pixel_count": self._pixel_count, "channel_sum": self._channel_sum,
+                "channel_sum_squares": self._channel_sum_squares}
+
+    def merge(self, state):
+        if state["pixel_count"] > 0:
+            self._add_sums(state["pixel_count"], state["channel_sum"].copy(), state["channel_sum_squares"].copy())
+
+    def _add_sums(self, pixel_count, channel_sum, channel_sum_squares):
+        self._pixel_count += pixel_count
+        if self._channel_sum is None:
+            self._channel_sum = channel_sum
+            self._channel_sum_squares = channel_sum_squares
+        else:
+            self._channel_sum += channel_sum
+            self._channel_sum_squares += channel_sum_squares
+
+    def finalize_batch_compute(self):
+        if self._pixel_count == 0:
+            return
+        mean = self._channel_sum / self._pixel_count
+        variance = np.maximum(self._channel_sum_squares / self._pixel_count - mean * mean, 0)
+        self.metrics["mean"].value = _to_channel_dict(mean)
+        self.metrics["std"].value = _to_channel_dict(np.sqrt(variance))
+
+
+def _to_channel_dict(values):
+    return {"red": np.float64(values[0]), "green": np.float64(values[1]), "blue": np.float64(values[2])}
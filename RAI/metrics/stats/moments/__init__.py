@@ -14,4 +14,11 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 
-from .moments import StatMomentGroup  # noqa : F401
+
+import os
+from RAI.metrics.metric_registry import register_lazy_groups
+
+# Groups are registered from their .json files, their modules are only imported once used
+__getattr__ = register_lazy_groups(__name__, os.path.dirname(__file__), {
+    "StatMomentGroup": "moments"
+})
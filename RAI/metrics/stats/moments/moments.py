@@ -16,17 +16,24 @@
 
 from RAI.metrics.metric_group import MetricGroup
 from RAI.utils import map_to_feature_dict, convert_float32_to_float64
-import scipy.stats
+from RAI.metrics.compute_memo import get_memo
+from RAI.utils.column_stats import central_sums, merge_central_sums
+import numpy as np
 import os
 
 
 class StatMomentGroup(MetricGroup, class_location=os.path.abspath(__file__)):
     def __init__(self, ai_system) -> None:
         super().__init__(ai_system)
+        self._sums = None
 
     def update(self, data):
         pass
 
+    def reset(self):
+        super().reset()
+        self._sums = None
+
     def compute(self, data_dict):
         # args = {}
         # if self.ai_system.metric_manager.user_config is not None \
@@ -35,12 +42,32 @@ class StatMomentGroup(MetricGroup, class_location=os.path.abspath(__file__)):
         #     args = self.ai_system.metric_manager.user_config["stats"]["args"]
         data = data_dict["data"]
         scalar_data = data.scalar
+
+        # Central moments around the mean shared with the other groups, as computed by scipy.stats.moment
+        mean = get_memo(data_dict).get("scalar_mean", np.mean, scalar_data, axis=0)
+        centered = scalar_data - mean
+        squared = centered * centered
+        self._set_moments(np.zeros_like(mean), np.mean(squared, axis=0), np.mean(squared * centered, axis=0))
+
+    # Folds the centered power sums of the batch into the running sums
+    def compute_batch(self, data_dict):
+        sums = get_memo(data_dict).get("scalar_central_sums", central_sums, data_dict["data"].scalar)
+        self._sums = merge_central_sums(self._sums, sums)
+
+    def partial_state(self):
+        return {"sums": self._sums}
+
+    def merge(self, state):
+        self._sums = merge_central_sums(self._sums, state["sums"])
+
+    def finalize_batch_compute(self):
+        if self._sums is not None:
+            n = self._sums["n"]
+            self._set_moments(np.zeros_like(self._sums["mean"]), self._sums["s2"] / n, self._sums["s3"] / n)
+
+    def _set_moments(self, moment_1, moment_2, moment_3):
         scalar_map = self.ai_system.meta_database.scalar_map
         features = self.ai_system.meta_database.features
-
-        self.metrics["moment_1"].value = map_to_feature_dict(scipy.stats.moment(scalar_data, 1), features, scalar_map)
-        self.metrics["moment_2"].value = map_to_feature_dict(scipy.stats.moment(scalar_data, 2), features, scalar_map)
-        self.metrics["moment_3"].value = map_to_feature_dict(scipy.stats.moment(scalar_data, 3), features, scalar_map)
-        self.metrics["moment_1"].value = convert_float32_to_float64(self.metrics["moment_1"].value)
-        self.metrics["moment_2"].value = convert_float32_to_float64(self.metrics["moment_2"].value)
-        self.metrics["moment_3"].value = convert_float32_to_float64(self.metrics["moment_3"].value)
+        self.metrics["moment_1"].value = convert_float32_to_float64(map_to_feature_dict(moment_1, features, scalar_map))
+        self.metrics["moment_2"].value = convert_float32_to_float64(map_to_feature_dict(moment_2, features, scalar_map))
+        self.metrics["moment_3"].value = convert_float32_to_float64(map_to_feature_dict(moment_3, features, scalar_map))
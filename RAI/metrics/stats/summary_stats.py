@@ -16,21 +16,44 @@
 
 
 from RAI.metrics.metric_group import MetricGroup
+import copy
 import numpy as np
 import scipy.stats
 import warnings
 import os
 import pandas as pd
-from RAI.utils.utils import calculate_per_mapped_features, map_to_feature_dict, map_to_feature_array, convert_float32_to_float64
+from RAI.utils.utils import map_to_feature_dict, map_to_feature_array, convert_float32_to_float64
+from RAI.utils.column_stats import central_sums, merge_central_sums, comoment, merge_comoment, column_rows, \
+    column_kstat, column_kstatvar, column_iqr, column_mvsdist, sums_kstat, sums_kstatvar, sums_mvsdist, \
+    sorted_quantile
+from RAI.utils.quantile_sketch import QuantileSketch
+from RAI.metrics.compute_memo import get_memo
+
+_QUANTILES = (0.25, 0.5, 0.75)
 
 
 class StatMetricGroup(MetricGroup, class_location=os.path.abspath(__file__)):
     def __init__(self, ai_system) -> None:
         super().__init__(ai_system)
+        self._clear_state()
 
     def update(self, data):
         pass
 
+    def reset(self):
+        super().reset()
+        self._clear_state()
+
+    def _clear_state(self):
+        self._sums = None
+        self._comoment = None
+        self._min = None
+        self._max = None
+        self._log_sum = None
+        self._num_rows = 0
+        self._num_nan_rows = 0
+        self._sketch = None
+
     def compute(self, data_dict):
         args = {}
         if self.ai_system.metric_manager.user_config is not None \
@@ -38,13 +61,16 @@ class StatMetricGroup(MetricGroup, class_location=os.path.abspath(__file__)):
                 and "args" in self.ai_system.metric_manager.user_config["stats"]:
             args = self.ai_system.metric_manager.user_config["stats"]["args"]
         data = data_dict["data"]
+        memo = get_memo(data_dict)
         scalar_data = data.scalar
         scalar_map = self.ai_system.meta_database.scalar_map
         features = self.ai_system.meta_database.features
 
-        self.metrics["mean"].value = map_to_feature_dict(
-            np.mean(scalar_data, **args.get("mean", {}), axis=0), features, scalar_map
-        )
+        if "mean" in args:
+            mean = np.mean(scalar_data, **args["mean"], axis=0)
+        else:
+            mean = memo.get("scalar_mean", np.mean, scalar_data, axis=0)
+        self.metrics["mean"].value = map_to_feature_dict(mean, features, scalar_map)
         self.metrics["mean"].value = convert_float32_to_float64(self.metrics["mean"].value)
         self.metrics["covariance"].value = map_to_feature_array(
             np.cov(scalar_data.T, **args.get("covariance", {})), features, scalar_map
@@ -73,17 +99,26 @@ class StatMetricGroup(MetricGroup, class_location=os.path.abspath(__file__)):
         )
         self.metrics['variation'].value = convert_float32_to_float64(self.metrics['variation'].value)
 
-        self.metrics["median"].value = map_to_feature_dict(np.median(scalar_data, axis=0), features, scalar_map)
-        self.metrics["quantile_1"].value = map_to_feature_dict(
-            np.quantile(scalar_data, 0.25, axis=0), features, scalar_map
+        # Quantiles share one sort, or one sketch when a quantile tolerance is set.
+        # The k-statistics, interquartile range and Bayesian estimates are computed on contiguous column rows,
+        # so they match one scipy call per feature
+        rows = memo.get("scalar_rows", column_rows, scalar_data)
+        sketch = self._create_sketch()
+        if sketch is None:
+            sorted_data = memo.get("scalar_sorted", np.sort, scalar_data, axis=0)
+            self._set_quantiles(sorted_quantile(sorted_data, 0.25), np.median(sorted_data, axis=0),
+                                sorted_quantile(sorted_data, 0.75), column_iqr(rows))
+        else:
+            sketch.update(scalar_data)
+            self._set_quantiles(*sketch.quantile(_QUANTILES))
+        self.metrics["min"].value = map_to_feature_dict(
+            memo.get("scalar_min", np.min, scalar_data, axis=0), features, scalar_map
         )
-        self.metrics["quantile_3"].value = map_to_feature_dict(
-            np.quantile(scalar_data, 0.75, axis=0), features, scalar_map
+        self.metrics["max"].value = map_to_feature_dict(
+            memo.get("scalar_max", np.max, scalar_data, axis=0), features, scalar_map
         )
-        self.metrics["min"].value = map_to_feature_dict(np.min(scalar_data, axis=0), features, scalar_map)
-        self.metrics["max"].value = map_to_feature_dict(np.max(scalar_data, axis=0), features, scalar_map)
         self.metrics["standard_deviation"].value = map_to_feature_dict(
-            np.std(scalar_data, axis=0), features, scalar_map
+            memo.get("scalar_std", np.std, scalar_data, axis=0), features, scalar_map
         )
 
         self.metrics["sem"].value = map_to_feature_dict(scipy.stats.mstats.sem(scalar_data), features, scalar_map)
@@ -91,66 +126,127 @@ class StatMetricGroup(MetricGroup, class_location=os.path.abspath(__file__)):
             scipy.stats.mstats.kurtosis(scalar_data), features, scalar_map
         )
         self.metrics['kurtosis'].value = convert_float32_to_float64(self.metrics['kurtosis'].value)
+        self._set_distribution_values(column_mvsdist(rows), [column_kstat(rows, k) for k in range(1, 5)],
+                                      column_kstatvar(rows))
 
+    # Folds the batch into running central sums, co-moments, extremes, NaN row counts and a quantile sketch
+    def compute_batch(self, data_dict):
+        data = data_dict["data"]
+        memo = get_memo(data_dict)
+        scalar_data = data.scalar
+        if len(scalar_data) == 0:
+            return
+        sums = memo.get("scalar_central_sums", central_sums, scalar_data)
+        self._comoment = merge_comoment(self._comoment, self._sums, comoment(scalar_data, sums["mean"]), sums)
+        self._sums = merge_central_sums(self._sums, sums)
+        batch_min = memo.get("scalar_min", np.min, scalar_data, axis=0)
+        batch_max = memo.get("scalar_max", np.max, scalar_data, axis=0)
+        self._min = batch_min if self._min is None else np.minimum(self._min, batch_min)
+        self._max = batch_max if self._max is None else np.maximum(self._max, batch_max)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log_sum = np.log(scalar_data).sum(axis=0)
+        self._log_sum = log_sum if self._log_sum is None else self._log_sum + log_sum
+        X = np.asarray(data.X)
+        self._num_rows += len(X)
+        self._num_nan_rows += np.count_nonzero(pd.isna(X).reshape(len(X), -1).any(axis=1))
+        if self._sketch is None:
+            self._sketch = self._create_sketch() or QuantileSketch()
+        self._sketch.update(scalar_data)
+
+    def partial_state(self):
+        return {"sums": self._sums, "comoment": self._comoment, "min": self._min, "max": self._max,
+                "log_sum": self._log_sum, "num_rows": self._num_rows, "num_nan_rows": self._num_nan_rows,
+                "sketch": self._sketch}
+
+    def merge(self, state):
+        if state["sums"] is None:
+            return
+        self._comoment = merge_comoment(self._comoment, self._sums, state["comoment"], state["sums"])
+        self._sums = merge_central_sums(self._sums, state["sums"])
+        self._min = state["min"] if self._min is None else np.minimum(self._min, state["min"])
+        self._max = state["max"] if self._max is None else np.maximum(self._max, state["max"])
+        self._log_sum = state["log_sum"] if self._log_sum is None else self._log_sum + state["log_sum"]
+        self._num_rows += state["num_rows"]
+        self._num_nan_rows += state["num_nan_rows"]
+        if self._sketch is None:
+            self._sketch = copy.deepcopy(state["sketch"])
+        else:
+            self._sketch.merge(state["sketch"])
+
+    def finalize_batch_compute(self):
+        if self._sums is None:
+            return
+        scalar_map = self.ai_system.meta_database.scalar_map
         features = self.ai_system.meta_database.features
-        map = self.ai_system.meta_database.scalar_map
-
-        self.metrics["frozen_mean_mean"].value = {}
-        self.metrics["frozen_mean_variance"].value = {}
-        self.metrics["frozen_mean_std"].value = {}
-        self.metrics["frozen_variance_mean"].value = {}
-        self.metrics["frozen_variance_variance"].value = {}
-        self.metrics["frozen_variance_std"].value = {}
-        self.metrics["frozen_std_mean"].value = {}
-        self.metrics["frozen_std_variance"].value = {}
-        self.metrics["frozen_std_std"].value = {}
-
-        values = calculate_per_mapped_features(scipy.stats.mvsdist, map, features, data.scalar, to_array=False)
-
-        for key in values:
-            if values[key] is not None:
-                self.metrics["frozen_mean_mean"].value[key] = values[key][0].mean()
-                self.metrics["frozen_mean_variance"].value[key] = values[key][0].var()
-                self.metrics["frozen_mean_std"].value[key] = values[key][0].std()
-                self.metrics["frozen_variance_mean"].value[key] = values[key][1].mean()
-                self.metrics["frozen_variance_variance"].value[key] = values[key][1].var()
-                self.metrics["frozen_variance_std"].value[key] = values[key][1].std()
-                self.metrics["frozen_std_mean"].value[key] = values[key][2].mean()
-                self.metrics["frozen_std_variance"].value[key] = values[key][2].var()
-                self.metrics["frozen_std_std"].value[key] = values[key][2].std()
-
-        self.metrics["kstat_1"].value = calculate_per_mapped_features(
-            scipy.stats.kstat, map, features, data.scalar, 1, to_array=False
-        )
-        self.metrics["kstat_2"].value = calculate_per_mapped_features(
-            scipy.stats.kstat, map, features, data.scalar, 2, to_array=False
-        )
-        self.metrics["kstat_3"].value = calculate_per_mapped_features(
-            scipy.stats.kstat, map, features, data.scalar, 3, to_array=False
-        )
-        self.metrics["kstat_4"].value = calculate_per_mapped_features(
-            scipy.stats.kstat, map, features, data.scalar, 4, to_array=False
-        )
-        self.metrics["kstatvar"].value = calculate_per_mapped_features(
-            scipy.stats.kstatvar, map, features, data.scalar, to_array=False
-        )
-        self.metrics["iqr"].value = calculate_per_mapped_features(
-            scipy.stats.iqr, map, features, data.scalar, to_array=False
-        )
-
-        self.metrics["bayes_mean"].value = {}
-        self.metrics["bayes_mean_avg"].value = {}
-        self.metrics["bayes_variance"].value = {}
-        self.metrics["bayes_variance_avg"].value = {}
-        self.metrics["bayes_std"].value = {}
-        self.metrics["bayes_std_avg"].value = {}
-        values = calculate_per_mapped_features(scipy.stats.bayes_mvs, map, features, data.scalar, to_array=False)
-
-        for key in values:
-            if values[key] is not None:
-                self.metrics["bayes_mean"].value[key] = values[key][0][1]
-                self.metrics["bayes_mean_avg"].value[key] = values[key][0][0]
-                self.metrics["bayes_variance"].value[key] = values[key][1][1]
-                self.metrics["bayes_variance_avg"].value[key] = values[key][1][0]
-                self.metrics["bayes_std"].value[key] = values[key][2][1]
-                self.metrics["bayes_std_avg"].value[key] = values[key][2][0]
+        sums = self._sums
+        n = sums["n"]
+        mean = sums["mean"]
+        m2 = sums["s2"] / n
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Constant columns have no skew or kurtosis, as in scipy.stats
+            constant = m2 <= (np.finfo(np.float64).eps * mean) ** 2
+            skew = np.where(constant, np.nan, sums["s3"] / n / m2 ** 1.5)
+            kurtosis = np.where(constant, np.nan, sums["s4"] / n / m2 ** 2 - 3)
+            self.metrics["mean"].value = map_to_feature_dict(mean, features, scalar_map)
+            self.metrics["covariance"].value = map_to_feature_array(self._comoment / (n - 1), features, scalar_map)
+            self.metrics["num_nan_rows"].value = self._num_nan_rows
+            self.metrics["percent_nan_rows"].value = self._num_nan_rows / self._num_rows
+            self.metrics["geometric_mean"].value = map_to_feature_dict(np.exp(self._log_sum / n), features, scalar_map)
+            self.metrics["skew"].value = map_to_feature_dict(skew, features, scalar_map)
+            self.metrics["variation"].value = map_to_feature_dict(np.sqrt(m2) / mean, features, scalar_map)
+            self.metrics["min"].value = map_to_feature_dict(self._min, features, scalar_map)
+            self.metrics["max"].value = map_to_feature_dict(self._max, features, scalar_map)
+            self.metrics["standard_deviation"].value = map_to_feature_dict(np.sqrt(m2), features, scalar_map)
+            self.metrics["sem"].value = map_to_feature_dict(np.sqrt(sums["s2"] / (n - 1) / n), features, scalar_map)
+            self.metrics["kurtosis"].value = map_to_feature_dict(kurtosis, features, scalar_map)
+        self._set_quantiles(*self._sketch.quantile(_QUANTILES))
+        self._set_distribution_values(sums_mvsdist(sums), [sums_kstat(sums, k) for k in range(1, 5)],
+                                      sums_kstatvar(sums))
+
+    # Merged quantiles come from sketches, so they only match compute when a quantile tolerance is accepted
+    def is_merge_exact(self):
+        return self._quantile_tolerance() is not None
+
+    # Returns a quantile sketch when user_config["stats"]["quantile_tolerance"] sets the accepted rank error
+    def _create_sketch(self):
+        tolerance = self._quantile_tolerance()
+        return None if tolerance is None else QuantileSketch.with_tolerance(tolerance)
+
+    def _quantile_tolerance(self):
+        return self.ai_system.metric_manager.user_config.get("stats", {}).get("quantile_tolerance")
+
+    # Sets the quantile metrics, the interquartile range defaults to the difference of the quartiles
+    def _set_quantiles(self, quantile_1, median, quantile_3, iqr=None):
+        scalar_map = self.ai_system.meta_database.scalar_map
+        features = self.ai_system.meta_database.features
+        iqr = quantile_3 - quantile_1 if iqr is None else iqr
+        self.metrics["median"].value = map_to_feature_dict(median, features, scalar_map)
+        self.metrics["quantile_1"].value = map_to_feature_dict(quantile_1, features, scalar_map)
+        self.metrics["quantile_3"].value = map_to_feature_dict(quantile_3, features, scalar_map)
+        self.metrics["iqr"].value = map_to_feature_dict(iqr, features, scalar_map)
+
+    # Sets the frozen distribution, k-statistic and Bayesian estimate metrics, the Bayesian estimates being
+    # the means and 90% intervals of the frozen distributions as in scipy.stats.bayes_mvs
+    def _set_distribution_values(self, dists, kstats, kstatvar):
+        scalar_map = self.ai_system.meta_database.scalar_map
+        features = self.ai_system.meta_database.features
+        for name, dist in zip(("mean", "variance", "std"), dists):
+            self.metrics["frozen_" + name + "_mean"].value = _to_scalar_feature_dict(dist.mean(), features, scalar_map)
+            self.metrics["frozen_" + name + "_variance"].value = _to_scalar_feature_dict(dist.var(), features, scalar_map)
+            self.metrics["frozen_" + name + "_std"].value = _to_scalar_feature_dict(dist.std(), features, scalar_map)
+
+        for k, kstat in enumerate(kstats, 1):
+            self.metrics["kstat_" + str(k)].value = map_to_feature_dict(kstat, features, scalar_map)
+        self.metrics["kstatvar"].value = map_to_feature_dict(kstatvar, features, scalar_map)
+
+        for name, dist in zip(("mean", "variance", "std"), dists):
+            center, interval = dist.mean(), dist.interval(0.90)
+            self.metrics["bayes_" + name].value = _to_scalar_feature_dict(
+                list(zip(interval[0], interval[1])), features, scalar_map
+            )
+            self.metrics["bayes_" + name + "_avg"].value = _to_scalar_feature_dict(center, features, scalar_map)
+
+
+# Maps one value per scalar column to its feature name, leaving out the non scalar features
+def _to_scalar_feature_dict(values, features, mapping):
+    return {features[mapping[i]].name: values[i] for i in range(len(values))}
@@ -15,3 +15,5 @@
 # SPDX-License-Identifier: Apache-2.0
 
 from .utils import *  # noqa : F401, F403
+from .column_stats import *  # noqa : F401, F403
+from .quantile_sketch import *  # noqa : F401, F403
@@ -0,0 +1,217 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import numpy as np
+import scipy.special
+import scipy.stats
+
+__all__ = ['central_sums', 'merge_central_sums', 'comoment', 'merge_comoment', 'column_rows', 'column_kstat',
+           'column_kstatvar', 'column_iqr', 'column_mvsdist', 'column_bayes_mvs', 'sums_kstat', 'sums_kstatvar',
+           'sums_mvsdist', 'sorted_quantile', 'column_pearsonr']
+
+# Column-wise versions of the scipy.stats functions used by the stat metric groups.
+# Each one handles every column of a 2D array at once, instead of one scipy call per feature.
+
+
+# Returns the row count, the column means and the sums of the 2nd to 4th powers of the centered columns
+def central_sums(X):
+    X = np.asarray(X, dtype=np.float64)
+    n = X.shape[0]
+    mean = X.mean(axis=0)
+    centered = X - mean
+    squared = centered * centered
+    return {"n": n, "mean": mean, "s2": squared.sum(axis=0), "s3": (squared * centered).sum(axis=0),
+            "s4": (squared * squared).sum(axis=0)}
+
+
+def merge_central_sums(a, b):
+    """
+    Combines the central sums of two row blocks into the central sums of their concatenation,
+    using the pairwise update of Chan et al. and Pebay, so batches can be folded in one at a time.
+
+    :param a: central sums of the first block, or None for an empty state
+    :param b: central sums of the second block
+
+    :return: central sums of both blocks
+    """
+    if a is None or a["n"] == 0:
+        return b
+    if b["n"] == 0:
+        return a
+    na, nb = float(a["n"]), float(b["n"])
+    n = na + nb
+    delta = b["mean"] - a["mean"]
+    delta2 = delta * delta
+    s2 = a["s2"] + b["s2"] + delta2 * na * nb / n
+    s3 = a["s3"] + b["s3"] + delta2 * delta * na * nb * (na - nb) / n ** 2 \
+        + 3 * delta * (na * b["s2"] - nb * a["s2"]) / n
+    s4 = a["s4"] + b["s4"] + delta2 * delta2 * na * nb * (na * na - na * nb + nb * nb) / n ** 3 \
+        + 6 * delta2 * (na * na * b["s2"] + nb * nb * a["s2"]) / n ** 2 + 4 * delta * (na * b["s3"] - nb * a["s3"]) / n
+    return {"n": a["n"] + b["n"], "mean": a["mean"] + delta * nb / n, "s2": s2, "s3": s3, "s4": s4}
+
+
+# Sum of the outer products of the rows centered on mean, the covariance matrix being comoment / (n - 1)
+def comoment(X, mean):
+    centered = np.asarray(X, dtype=np.float64) - mean
+    return centered.T @ centered
+
+
+# Combines the co-moment matrices of two row blocks, given the central sums of each block
+def merge_comoment(comoment_a, sums_a, comoment_b, sums_b):
+    if comoment_a is None or sums_a["n"] == 0:
+        return comoment_b
+    if sums_b["n"] == 0:
+        return comoment_a
+    na, nb = float(sums_a["n"]), float(sums_b["n"])
+    delta = sums_b["mean"] - sums_a["mean"]
+    return comoment_a + comoment_b + np.outer(delta, delta) * na * nb / (na + nb)
+
+
+# Columns of X as contiguous rows. Reducing a row along the last axis sums in the same order as scipy does
+# for a single feature, so the column functions below return the same values as one scipy call per feature
+def column_rows(X):
+    return np.ascontiguousarray(np.asarray(X).T)
+
+
+# Calls a scipy.stats function on every row at once when the installed scipy takes an axis, else once per row
+def _per_row(function, rows, *args):
+    try:
+        return function(rows, *args, axis=-1)
+    except TypeError:
+        return np.array([function(row, *args) for row in rows])
+
+
+# k-statistic of order k for each column rows, matching scipy.stats.kstat.
+# scipy raises the power sums of one feature to powers as scalars, which rounds differently from the array power,
+# so kstat is called once per column
+def column_kstat(rows, k):
+    return np.array([scipy.stats.kstat(row, k) for row in rows])
+
+
+# Variance of the second k-statistic for each column rows, matching scipy.stats.kstatvar
+def column_kstatvar(rows):
+    return np.array([scipy.stats.kstatvar(row) for row in rows])
+
+
+# Interquartile range of each column rows, matching scipy.stats.iqr
+def column_iqr(rows):
+    return _per_row(scipy.stats.iqr, rows)
+
+
+# Frozen distributions of the mean, variance and standard deviation of every column rows, matching scipy.stats.mvsdist.
+# The distributions take one parameter per column, so their mean, var, std and interval are computed together
+def column_mvsdist(rows):
+    return _mvsdist(rows.shape[-1], rows.mean(axis=-1), rows.var(axis=-1))
+
+
+# Bayesian confidence intervals of the mean, variance and standard deviation of every column rows,
+# matching scipy.stats.bayes_mvs. Returns (center, (lower, upper)) arrays for each of the three
+def column_bayes_mvs(rows, alpha=0.90):
+    return tuple((dist.mean(), dist.interval(alpha)) for dist in column_mvsdist(rows))
+
+
+# k-statistic of order k for each column from merged central sums, used when rows arrive in batches.
+# k-statistics above the first do not depend on the location, so the centered power sums are used
+def sums_kstat(sums, k):
+    n = float(sums["n"])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if k == 1:
+            return sums["mean"]
+        elif k == 2:
+            return sums["s2"] / (n - 1)
+        elif k == 3:
+            return n * sums["s3"] / ((n - 1) * (n - 2))
+        elif k == 4:
+            return (n * (n + 1) * sums["s4"] - 3 * (n - 1) * sums["s2"] ** 2) / ((n - 1) * (n - 2) * (n - 3))
+    raise ValueError("k-statistics only supported for 1<=k<=4")
+
+
+# Variance of the second k-statistic for each column from merged central sums
+def sums_kstatvar(sums):
+    n = float(sums["n"])
+    k2 = sums_kstat(sums, 2)
+    k4 = sums_kstat(sums, 4)
+    return (2 * n * k2 ** 2 + (n - 1) * k4) / (n * (n + 1))
+
+
+# Frozen distributions of the mean, variance and standard deviation of every column from merged central sums
+def sums_mvsdist(sums):
+    return _mvsdist(sums["n"], sums["mean"], sums["s2"] / sums["n"])
+
+
+def _mvsdist(n, xbar, C):
+    if n < 2:
+        raise ValueError("Need at least 2 data-points.")
+    if n > 1000:  # gaussian approximations for large n
+        mdist = scipy.stats.norm(loc=xbar, scale=np.sqrt(C / n))
+        sdist = scipy.stats.norm(loc=np.sqrt(C), scale=np.sqrt(C / (2. * n)))
+        vdist = scipy.stats.norm(loc=C, scale=np.sqrt(2.0 / n) * C)
+    else:
+        nm1 = n - 1
+        fac = n * C / 2.
+        val = nm1 / 2.
+        mdist = scipy.stats.t(nm1, loc=xbar, scale=np.sqrt(C / nm1))
+        sdist = scipy.stats.gengamma(val, -2, scale=np.sqrt(fac))
+        vdist = scipy.stats.invgamma(val, scale=fac)
+    return mdist, vdist, sdist
+
+
+# Quantile q of each column of an array sorted along axis 0, with numpy's default linear interpolation.
+# np.quantile is used on the sorted array so values match it exactly, columns containing NaN return NaN
+def sorted_quantile(sorted_X, q):
+    if sorted_X.shape[0] == 0:
+        return np.full(sorted_X.shape[1:], np.nan)
+    return np.quantile(sorted_X, q, axis=0)
+
+
+# Pearson correlation of every column of X with y and its two-sided p-value, matching scipy.stats.pearsonr
+def column_pearsonr(X, y):
+    # Each column is reduced as a contiguous row, the same way scipy reduces a single feature
+    X = np.ascontiguousarray(np.asarray(X, dtype=np.float64).T)
+    y = np.asarray(y, dtype=np.float64).ravel()
+    n = len(y)
+    xm = X - X.mean(axis=-1, keepdims=True)
+    ym = y - y.mean()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Scaling by the largest deviation before taking the norm avoids overflow on large values
+        xmax = np.max(np.abs(xm), axis=-1, keepdims=True)
+        ymax = np.max(np.abs(ym))
+        xm = xm / (xmax * _vector_norm(xm / xmax))
+        ym = ym / (ymax * _vector_norm(ym / ymax))
+        r = _vecdot(xm, ym)
+    r = np.clip(r, -1.0, 1.0)
+    # Under the null hypothesis r follows a beta distribution on [-1, 1].
+    # Newer scipy versions take the upper tail with betaincc, the same expression is used to get the same p-values
+    ab = n / 2 - 1
+    if hasattr(scipy.special, "betaincc"):
+        p = 2 * scipy.special.betaincc(ab, ab, (np.abs(r) + 1) / 2)
+    else:
+        p = 2 * scipy.special.betainc(ab, ab, 0.5 * (1 - np.abs(r)))
+    return r, p
+
+
+# Euclidean norm and dot product along the last axis, numpy 2 provides them as the functions scipy uses
+def _vector_norm(X):
+    if hasattr(np.linalg, "vector_norm"):
+        return np.linalg.vector_norm(X, axis=-1, keepdims=True)
+    return np.sqrt(np.sum(X * X, axis=-1, keepdims=True))
+
+
+def _vecdot(X, y):
+    if hasattr(np, "vecdot"):
+        return np.vecdot(X, y, axis=-1)
+    return np.sum(X * y, axis=-1)
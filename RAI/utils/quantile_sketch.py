@@ -0,0 +1,147 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+import math
+import numpy as np
+from RAI.utils.column_stats import sorted_quantile
+
+__all__ = ['QuantileSketch']
+
+# Ratio between the capacities of two consecutive compactors
+_CAPACITY_DECAY = 2 / 3
+# Rank error of a sketch of capacity k, times k
+_RANK_ERROR = 2.0
+# Rows added at once are compacted in blocks of this many times k rows, keeping memory bounded
+_BLOCK_FACTOR = 8
+
+
+class QuantileSketch:
+    """
+    QuantileSketch is a KLL sketch of the quantiles of each column of a 2D array, using bounded memory.
+    Rows are added with update and sketches of different batches or shards are combined with merge.
+    Every column receives the same rows, so the compactors of all columns are stored together as 2D arrays
+    and compacted at the same time, with one sort per compaction instead of one per column.
+    While nothing has been compacted the sketch holds every row and quantiles are exact.
+
+    :param k: capacity of the largest compactor, the rank error is about 2 / k of the row count
+    :param seed: seed of the random offsets used when compacting
+    """
+
+    @classmethod
+    def with_tolerance(cls, tolerance: float, seed=None):
+        """
+        Returns a sketch whose rank error is about tolerance, for example 0.01 for quantiles within 1% of the rows
+
+        :param tolerance: accepted rank error, as a fraction of the row count
+        :param seed: seed of the random offsets used when compacting
+        """
+        assert 0 < tolerance < 1, "tolerance must be between 0 and 1"
+        return cls(k=max(2, int(math.ceil(_RANK_ERROR / tolerance))), seed=seed)
+
+    def __init__(self, k: int = 200, seed=None) -> None:
+        assert k >= 2, "k must be at least 2"
+        self.k = k
+        self.n = 0
+        self._levels = []
+        self._has_nan = None
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, X) -> None:
+        """
+        Adds the rows of X, columns containing NaN return NaN quantiles like np.quantile
+
+        :param X: 2D array with one column per sketched feature
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if len(X) == 0:
+            return
+        has_nan = np.isnan(X).any(axis=0)
+        self._has_nan = has_nan if self._has_nan is None else self._has_nan | has_nan
+        block = _BLOCK_FACTOR * self.k
+        for start in range(0, len(X), block):
+            self._add(0, X[start:start + block])
+            self._compress()
+        self.n += len(X)
+
+    def merge(self, other):
+        """
+        Adds the rows sketched by other, which must sketch the same columns
+
+        :param other: QuantileSketch
+
+        :return: self
+        """
+        for level, items in enumerate(other._levels):
+            self._add(level, items)
+        if other._has_nan is not None:
+            self._has_nan = other._has_nan if self._has_nan is None else self._has_nan | other._has_nan
+        self.n += other.n
+        self._compress()
+        return self
+
+    def quantile(self, q):
+        """
+        Returns the approximate quantile q of each column, the sketch being sorted once for all the quantiles in q
+
+        :param q: quantile between 0 and 1, or a sequence of them
+
+        :return: array with one value per column, with a leading axis of one row per quantile when q is a sequence
+        """
+        if self.n == 0:
+            return None
+        qs = np.atleast_1d(q)
+        if len(self._levels) == 1:
+            sorted_items = np.sort(self._levels[0], axis=0)
+            result = np.array([sorted_quantile(sorted_items, value) for value in qs])
+        else:
+            items = np.concatenate(self._levels)
+            weights = np.concatenate([np.full(len(level_items), 2.0 ** level) for level, level_items in enumerate(self._levels)])
+            order = np.argsort(items, axis=0)
+            sorted_items = np.take_along_axis(items, order, axis=0)
+            cumulative = np.cumsum(weights[order], axis=0)
+            columns = np.arange(items.shape[1])
+            result = np.array([sorted_items[np.argmax(cumulative >= value * cumulative[-1], axis=0), columns] for value in qs])
+        result = np.where(self._has_nan, np.nan, result)
+        return result if np.ndim(q) else result[0]
+
+    def __len__(self):
+        return sum(len(items) for items in self._levels)
+
+    def _add(self, level, items):
+        while len(self._levels) <= level:
+            self._levels.append(None)
+        self._levels[level] = items if self._levels[level] is None else np.concatenate((self._levels[level], items))
+
+    def _capacity(self, level):
+        depth = len(self._levels) - 1 - level
+        return max(2, int(math.ceil(self.k * _CAPACITY_DECAY ** depth)))
+
+    # Halves each compactor over its capacity, promoting every other sorted row to the next level
+    def _compress(self):
+        level = 0
+        while level < len(self._levels):
+            items = self._levels[level]
+            if items is not None and len(items) > self._capacity(level):
+                items = np.sort(items, axis=0)
+                kept = items[len(items) - len(items) % 2:]
+                offset = self._rng.integers(2)
+                self._levels[level] = kept
+                self._add(level + 1, items[offset:len(items) - len(kept):2])
+            level += 1
+        self._levels = [items if items is not None else np.empty((0, self._width())) for items in self._levels]
+
+    def _width(self):
+        return next(items.shape[1] for items in self._levels if items is not None)
@@ -15,22 +15,42 @@
 # SPDX-License-Identifier: Apache-2.0
 
 
+import logging
 import math
 import pickle
+import time
 import numpy as np
 import pandas as pd
-import torch
-import torch.utils.data
 
+from importlib import import_module
 from threading import Timer
-from sklearn.preprocessing import StandardScaler
-from RAI.dataset.dataset import Feature, MetaDatabase
-import torchvision.transforms as transforms
+from RAI.dataset.dataset import Feature, MetaDatabase, ArrowData, _arrow_file_format, _read_arrow_batches, _read_arrow_schema
 
-__all__ = ['jsonify', 'compare_runtimes', 'df_to_meta_database', 'df_to_RAI', 'reweighing',
+__all__ = ['jsonify', 'jsonify_metric', 'compare_runtimes', 'df_to_meta_database', 'df_to_RAI', 'reweighing',
            'calculate_per_mapped_features', 'convert_float32_to_float64',
            'convert_to_feature_value_dict', 'convert_to_feature_dict', 'map_to_feature_array', 'map_to_feature_dict',
-           'torch_to_RAI', 'modals_to_RAI']
+           'torch_to_RAI', 'modals_to_RAI', 'arrow_to_RAI', 'timed_import', 'get_import_times']
+
+logger = logging.getLogger(__name__)
+
+# Seconds spent importing each lazily loaded module, torch, sklearn and the other heavy backends are only imported
+# by the metric groups and analysis that use them
+_import_times = {}
+
+
+# Imports a module and records how long the first import took
+def timed_import(module_name):
+    start = time.perf_counter()
+    module = import_module(module_name)
+    if module_name not in _import_times:
+        _import_times[module_name] = time.perf_counter() - start
+        logger.info(f"imported {module_name} in {_import_times[module_name]:.3f}s")
+    return module
+
+
+# Returns the import time in seconds of every module loaded through timed_import
+def get_import_times():
+    return dict(_import_times)
 
 
 # TODO: Remove?
@@ -46,9 +66,11 @@ def jsonify(v):
     if type(v) is np.ma.MaskedArray:
         return np.ma.getdata(v).tolist()
     if type(v) is np.ndarray:
-        return clean_list(v.tolist())
+        return _jsonify_array(v)
     if type(v) is list:
         return clean_list(v)
+    if isinstance(v, np.generic) and v.dtype.kind in "biuf":
+        return _jsonify_array(np.asarray(v))
     if type(v) in (np.bool, '_bool', 'bool_') or v.__class__.__name__ == "bool_":
         return bool(v)
     if (isinstance(v, int) or isinstance(v, float)) and (
@@ -59,13 +81,70 @@ def jsonify(v):
     return pickle.dumps(v).decode('ISO-8859-1')
 
 
+# Converts a whole array at once, non finite floats are masked with None before the conversion to lists
+def _jsonify_array(v):
+    kind = v.dtype.kind
+    if kind in "biu":
+        return v.tolist()
+    if kind != "f":
+        return clean_list(v.tolist()) if v.ndim > 0 else jsonify(v.tolist())
+    finite = np.isfinite(v)
+    if finite.all():
+        return v.tolist()
+    result = v.astype(object)
+    result[~finite] = None
+    return result.tolist()
+
+
 # jsonifies each element of a list v
 def clean_list(v):
+    # Lists of Python numbers only need their non finite values replaced
+    if set(map(type, v)) <= {float, int, bool}:
+        if not all(map(math.isfinite, v)):
+            for i in range(len(v)):
+                if not math.isfinite(v[i]):
+                    v[i] = None
+        return v
     for i in range(len(v)):
         v[i] = jsonify(v[i])
     return v
 
 
+# Metric types whose values are usually arrays
+_ARRAY_METRIC_TYPES = ("Matrix", "Vector", "Vector_no_display", "FeatureArray")
+
+
+def jsonify_metric(v, metric_type: str = None):
+    """
+    Converts a metric value using the type declared in its metric group's json file, values which do not have
+    the declared type are converted by jsonify. Unlike jsonify, Dict metrics are converted recursively,
+    so NumPy scalars and non finite values inside them are converted as well, and tuples become lists.
+
+    :param v: metric value
+    :param metric_type: the "type" of the metric, e.g. "numeric", "Boolean", "Dict" or "Matrix"
+    :return: value which json.dumps accepts
+    """
+    if metric_type == "numeric" and isinstance(v, (float, int, np.number)) and not isinstance(v, bool):
+        return v if isinstance(v, int) else _jsonify_array(np.asarray(v))
+    if metric_type == "Boolean" and isinstance(v, (bool, np.bool_)):
+        return bool(v)
+    if metric_type in _ARRAY_METRIC_TYPES and isinstance(v, np.ndarray) and type(v) is not np.ma.MaskedArray:
+        return _jsonify_array(v)
+    if metric_type == "Dict" and isinstance(v, dict):
+        return _jsonify_nested(v)
+    return jsonify(v)
+
+
+def _jsonify_nested(v):
+    if isinstance(v, dict):
+        return {(key.item() if isinstance(key, np.generic) else key): _jsonify_nested(value) for key, value in v.items()}
+    if isinstance(v, tuple):
+        return [_jsonify_nested(value) for value in v]
+    if isinstance(v, list):
+        return clean_list([_jsonify_nested(value) for value in v])
+    return jsonify(v)
+
+
 # Returns True if the seen runtime is less than or equal to the required
 def compare_runtimes(required, seen):
     required = complexity_to_integer(required)
@@ -112,49 +191,86 @@ def df_remove_nans(df, extra_symbols):
     df.dropna(inplace=True)
 
 
-def torch_to_RAI(torch_item, max_size=None, detailed=True):
+# Converts a DataLoader or Tensor to X, y and raw X data, each image of X becomes a single feature.
+# Batches are copied once into an array allocated for the rows of the loader, or into a .npy file at memmap_path.
+# The raw X tensor shares the memory of X, and iteration stops once max_size rows are read.
+def torch_to_RAI(torch_item, max_size=None, detailed=True, memmap_path=None):
+    torch = timed_import("torch")
+    transforms = timed_import("torchvision.transforms")
     result_x = None
     result_y = []
     raw_x = None
-    x_shape = None
 
-    if isinstance(torch_item, torch.utils.data.DataLoader):
+    if isinstance(torch_item, timed_import("torch.utils.data").DataLoader):
         transform = torch_item.dataset.transform
         if torch_item.dataset.transform is None:
             torch_item.dataset.transform = transforms.ToTensor()
             torch_item.transform = transform
-        for i, val in enumerate(torch_item, 0):
-            x, y = val
-            if raw_x is None:
-                raw_x = x
-            else:
-                raw_x = torch.vstack((raw_x, x))
-            x = x.detach().numpy()
-            y = y.detach().numpy()
-            if x_shape is None:
-                x_shape = list(x.shape)
-                x_shape[0] = 1
-                x_shape.insert(0, -1)
-            x = x.reshape(x_shape)
-            if result_x is None:
-                result_x = x
-            else:
-                result_x = np.vstack((result_x, x))
-            result_y.extend(y.tolist())
-            if max_size is not None and len(result_x) > max_size:
-                result_x = result_x[:max_size]
-                break
+        batches = ((x.detach().numpy(), y.detach().numpy()) for x, y in torch_item)
+        result_x, result_y = _stack_batches(batches, _loader_length(torch_item, max_size), max_size, memmap_path)
+        if result_x is not None:
+            raw_x = torch.from_numpy(result_x.reshape((len(result_x),) + result_x.shape[2:]))
 
     elif isinstance(torch_item, torch.Tensor):
-        result_x = np.array([[x] for x in torch_item])
+        result_x = np.array(torch_item.detach().numpy()[:, np.newaxis])
     else:
         assert "torch_item must be of type DataLoader or Tensor"
     return result_x, result_y, raw_x
 
 
+# Returns the number of rows a DataLoader yields, or None if its batch sampler or sampler has no known length
+def _loader_length(loader, max_size=None):
+    if loader.batch_size is None:
+        return None
+    try:
+        length = len(loader.sampler)
+    except TypeError:
+        return None
+    if loader.drop_last:
+        length -= length % loader.batch_size
+    return length if max_size is None else min(length, max_size)
+
+
+# Copies (x, y) numpy batches into a single X array with one feature per row of x, and a list of y values.
+# X is allocated once when the number of rows is known, otherwise the batches are kept and concatenated at the end.
+def _stack_batches(batches, length=None, max_size=None, memmap_path=None):
+    result_x = None
+    result_y = []
+    chunks = []
+    rows = 0
+    for x, y in batches:
+        if max_size is not None:
+            x, y = x[:max_size - rows], y[:max_size - rows]
+        x = x.reshape((len(x), 1) + x.shape[1:])
+        if result_x is None and length is not None:
+            result_x = _allocate_rows((length,) + x.shape[1:], x.dtype, memmap_path)
+        if result_x is not None:
+            result_x[rows:rows + len(x)] = x
+        else:
+            chunks.append(x)
+        result_y.extend(y.tolist())
+        rows += len(x)
+        if max_size is not None and rows >= max_size:
+            break
+    if chunks:
+        result_x = _allocate_rows((rows,) + chunks[0].shape[1:], chunks[0].dtype, memmap_path)
+        np.concatenate(chunks, out=result_x)
+    elif result_x is not None and rows < len(result_x):
+        result_x = result_x[:rows]
+    return result_x, result_y
+
+
+# Allocates an array in memory, or as a .npy file memory mapped at memmap_path
+def _allocate_rows(shape, dtype, memmap_path=None):
+    if memmap_path is None:
+        return np.empty(shape, dtype=dtype)
+    return np.lib.format.open_memmap(memmap_path, mode="w+", dtype=dtype, shape=shape)
+
+
 # Converts a pandas dataframe to a Rai Metadatabase and X and y data.
+# With group_columns, columns are reordered by feature type so NumpyData can use views of X for each type.
 def df_to_RAI(df, target_column=None, clear_nans=True, extra_symbols="?", normalize=None,
-              max_categorical_threshold=None, text_columns=[]):
+              max_categorical_threshold=None, text_columns=[], group_columns=False):
     if clear_nans:
         df_remove_nans(df, extra_symbols)
     if max_categorical_threshold:
@@ -164,7 +280,7 @@ def df_to_RAI(df, target_column=None, clear_nans=True, extra_symbols="?", normal
     if normalize is not None:
         if normalize == "Scalar":
             num_d = df.select_dtypes(exclude=['object', 'category'])
-            df[num_d.columns] = StandardScaler().fit_transform(num_d)
+            df[num_d.columns] = timed_import("sklearn.preprocessing").StandardScaler().fit_transform(num_d)
     output_feature = []
     if target_column:
         y = df.pop(target_column)
@@ -201,9 +317,57 @@ def df_to_RAI(df, target_column=None, clear_nans=True, extra_symbols="?", normal
         elif "float" in str(df.dtypes[c]):
             f = Feature(c, "numeric", c)
         features.append(f)
+    if group_columns:
+        order = sorted(range(len(features)), key=lambda i: _feature_type_rank(features[i]))
+        features = [features[i] for i in order]
+        df = df[[df.columns[i] for i in order]]
     return MetaDatabase(features), df.to_numpy(), y, output_feature
 
 
+# Converts a Parquet or Feather file to a RAI Metadatabase and an ArrowData, without loading the file into memory.
+# Only the schema is read, and the unique values of the string and boolean columns, which become categorical features.
+# Features are ordered by type so the feature types of each batch are views of its X.
+def arrow_to_RAI(path, target_column=None, text_columns=[], file_format=None, batch_size=None, scalar_dtype=np.float64,
+                 prefetch=0):
+    pa = timed_import("pyarrow")
+    file_format = _arrow_file_format(path, file_format)
+    schema = _read_arrow_schema(path, file_format)
+    categorical_types = (pa.types.is_string, pa.types.is_large_string, pa.types.is_dictionary, pa.types.is_boolean)
+    categorical = [field.name for field in schema
+                   if field.name not in text_columns and any(is_type(field.type) for is_type in categorical_types)]
+    values = {c: set() for c in categorical}
+    if categorical:
+        compute = timed_import("pyarrow.compute")
+        for batch in _read_arrow_batches(path, file_format, categorical):
+            for c in categorical:
+                values[c].update(compute.unique(batch.column(c)).drop_null().to_pylist())
+
+    features = []
+    output_feature = None
+    for c in schema.names:
+        if c in text_columns:
+            f = Feature(c, "text", c)
+        elif c in values:
+            f = Feature(c, "numeric", c, categorical=True, values={i: v for i, v in enumerate(sorted(values[c]))})
+        else:
+            f = Feature(c, "numeric", c)
+        if c == target_column:
+            output_feature = f
+        else:
+            features.append(f)
+    features.sort(key=_feature_type_rank)
+    data = ArrowData(path, features, output_feature=output_feature, batch_size=batch_size, file_format=file_format,
+                     scalar_dtype=scalar_dtype, prefetch=prefetch)
+    return MetaDatabase(features), data, [output_feature] if output_feature is not None else []
+
+
+# Order of the feature types in grouped columns: scalar, categorical, image, then text
+def _feature_type_rank(feature):
+    if feature.dtype == "numeric":
+        return 1 if feature.categorical else 0
+    return 2 if feature.dtype == "image" else 3
+
+
 # Converts a pandas dataframe with numeric data and text,
 # as well as image dictionaries to a Rai Metadatabase and X and y data.
 # TODO: This needs to be formalized for multi modal data
@@ -220,7 +384,7 @@ def modals_to_RAI(
     if normalize is not None:
         if normalize == "Scalar":
             num_d = df.select_dtypes(exclude=['object', 'category'])
-            df[num_d.columns] = StandardScaler().fit_transform(num_d)
+            df[num_d.columns] = timed_import("sklearn.preprocessing").StandardScaler().fit_transform(num_d)
 
     output_feature = []
     if df_target_column:
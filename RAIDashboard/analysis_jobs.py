@@ -0,0 +1,73 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import threading
+from RAIShared.analysis_jobs import connect_jobs, submit_job, cancel_job, DataVersionWatcher, WATCH_INTERVAL, \
+    JOBS_TABLE, JOB_COLUMNS, RUN, DONE
+
+
+class AnalysisJobClient:
+    """
+    Dashboard side of the analysis job queue. Submits and cancels jobs, and calls its listeners from a daemon
+    thread when the RAI process changes them, see DataVersionWatcher.
+
+    :param path: path of the project sqlite database
+    :param interval: seconds between two checks for changes
+    """
+
+    def __init__(self, path: str, interval: float = WATCH_INTERVAL) -> None:
+        self._lock = threading.RLock()
+        self.connection = connect_jobs(path)
+        self._watcher = DataVersionWatcher(self.connection, self._lock, interval)
+
+    def add_listener(self, listener) -> None:
+        self._watcher.add_listener(listener)
+
+    def submit(self, kind: str, dataset: str, analysis: str = None) -> int:
+        return submit_job(self.connection, self._lock, kind, dataset, analysis)
+
+    def cancel(self, job_id: int) -> bool:
+        return cancel_job(self.connection, self._lock, job_id)
+
+    def changes_since(self, revision: int = 0) -> list:
+        """
+        :return: jobs changed after the given revision as dictionaries, in revision order
+        """
+        with self._lock:
+            rows = self.connection.execute(
+                f'SELECT {", ".join(JOB_COLUMNS)} FROM {JOBS_TABLE} WHERE revision > ? ORDER BY revision',
+                (revision,)).fetchall()
+        return [dict(zip(JOB_COLUMNS, row)) for row in rows]
+
+    def current_revision(self) -> int:
+        with self._lock:
+            return self.connection.execute(f'SELECT COALESCE(MAX(revision), 0) FROM {JOBS_TABLE}').fetchone()[0]
+
+    def latest_result(self, analysis: str):
+        """
+        :return: result of the latest finished run of the analysis, None if it never finished
+        """
+        with self._lock:
+            row = self.connection.execute(
+                f'SELECT result FROM {JOBS_TABLE} WHERE kind = ? AND analysis = ? AND status = ? '
+                'ORDER BY job_id DESC LIMIT 1', (RUN, analysis, DONE)).fetchone()
+        return row[0] if row else None
+
+    def close(self) -> None:
+        self._watcher.close()
+        with self._lock:
+            self.connection.close()
@@ -39,6 +39,7 @@ def get_analysis_page():
             value=None,
             persistence=True),
         html.Button("Run Analysis", id="run_analysis_button", style={"margin-top": "20px"}),
+        html.Button("Cancel Analysis", id="cancel_analysis_button", style={"margin-top": "20px", "margin-left": "10px"}),
         html.Div([], id="analysis_display", style={"margin-top": "20px"})
     ], style={})
     return result
@@ -49,14 +50,16 @@ def get_analysis_page():
     Output('analysis_display', 'children'),
     Input('analysis-interval-component', 'n_intervals'),
     Input('run_analysis_button', 'n_clicks'),
+    Input('cancel_analysis_button', 'n_clicks'),
     Input('analysis_selector', 'value'),
     State('analysis_selector', 'options'),
     State('analysis_display', 'children'),
 )
-def get_analysis_updates(timer, btn, analysis_choice, analysis_choices, analysis_display):
+def get_analysis_updates(timer, btn, cancel_btn, analysis_choice, analysis_choices, analysis_display):
     ctx = dash.callback_context
     is_time_update = any('analysis-interval-component.n_intervals' in i['prop_id'] for i in ctx.triggered)
     is_button = any('run_analysis_button.n_clicks' in i['prop_id'] for i in ctx.triggered)
+    is_cancel = any('cancel_analysis_button.n_clicks' in i['prop_id'] for i in ctx.triggered)
     is_value = any('analysis_selector.value' == i['prop_id'] for i in ctx.triggered)
     should_update = False
     if analysis_choices != dbUtils.get_available_analysis():
@@ -74,6 +77,12 @@ def get_analysis_updates(timer, btn, analysis_choice, analysis_choices, analysis
         else:
             dbUtils.request_start_analysis(analysis_choice)
             return dbUtils.get_available_analysis(), [html.P("Requesting Analysis..")]
+    if is_cancel and analysis_choice:
+        if not dbUtils.cancel_analysis(analysis_choice):
+            raise PreventUpdate
+        analysis_display = [dbUtils.get_analysis(analysis_choice),
+                            html.P(analysis_choice, style={"display": "none"})]
+        return analysis_choices, analysis_display
 
     # Extra condition was added because dash would not always update when changing to/from a large analysis
     if is_value or (
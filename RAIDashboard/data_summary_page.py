@@ -48,6 +48,7 @@ def get_data_summary_page():
             value=choice,
             persistence=True),
         html.Button("Run Analysis", id=prefix + "run_analysis_button", style={"margin-top": "20px"}),
+        html.Button("Cancel Analysis", id=prefix + "cancel_analysis_button", style={"margin-top": "20px", "margin-left": "10px"}),
         html.Div([], id=prefix + "analysis_display", style={"margin-top": "20px"})
     ], style={})
     return result
@@ -59,14 +60,16 @@ def get_data_summary_page():
     Output(prefix + 'analysis_selector', 'value'),
     Input(prefix + 'interval-component', 'n_intervals'),
     Input(prefix + 'run_analysis_button', 'n_clicks'),
+    Input(prefix + 'cancel_analysis_button', 'n_clicks'),
     Input(prefix + 'analysis_selector', 'value'),
     State(prefix + 'analysis_selector', 'options'),
     State(prefix + 'analysis_display', 'children'),
 )
-def get_analysis_updates(timer, btn, analysis_choice, analysis_choices, analysis_display):
+def get_analysis_updates(timer, btn, cancel_btn, analysis_choice, analysis_choices, analysis_display):
     ctx = dash.callback_context
     is_time_update = any(prefix + 'interval-component.n_intervals' in i['prop_id'] for i in ctx.triggered)
     is_button = any(prefix + 'run_analysis_button.n_clicks' in i['prop_id'] for i in ctx.triggered)
+    is_cancel = any(prefix + 'cancel_analysis_button.n_clicks' in i['prop_id'] for i in ctx.triggered)
     is_value = any(prefix + 'analysis_selector.value' == i['prop_id'] for i in ctx.triggered)
     should_update = False
     force_new_display = False
@@ -90,6 +93,12 @@ def get_analysis_updates(timer, btn, analysis_choice, analysis_choices, analysis
         else:
             dbUtils.request_start_analysis(analysis_choice)
             return dbUtils.get_available_analysis(), [html.P("Requesting Analysis..")], analysis_choice
+    if is_cancel and analysis_choice:
+        if not dbUtils.cancel_analysis(analysis_choice):
+            raise PreventUpdate
+        analysis_display = [dbUtils.get_analysis(analysis_choice),
+                            html.P(analysis_choice, style={"display": "none"})]
+        return analysis_choices, analysis_display, analysis_choice
 
     # Extra condition was added because dash would not always update when changing to/from a large analysis
     if force_new_display or is_value or (analysis_choice and analysis_display == []) or (
@@ -18,19 +18,32 @@
 import json
 import logging
 import os
+import sqlite3
 from collections import defaultdict
 import numpy as np
-import traceback
 import dash_bootstrap_components as dbc
 from dash import html
 from sqlitedict import SqliteDict
 
 from .timer import DashboardTimer
+from RAIShared.value_codec import decode_value
+from .analysis_jobs import AnalysisJobClient
+from RAIShared.analysis_jobs import AVAILABLE, RUN, DONE, FAILED, CANCELLED
 
 logger = logging.getLogger(__name__)
 
 
 PROJECTS = 'PROJECTS'
+MEASUREMENTS_TABLE = 'measurements'
+REVISIONS = 'revisions'
+INFO_KEYS = ('project_info', 'certificate_info', 'metric_info')
+
+# Project keys each subscriber channel displays, a channel is only marked as updated when one of them changes
+CHANNEL_KEYS = {
+    "metric_detail": ("metric_info", "metric_values"),
+    "metric_graph": ("metric_info", "metric_values"),
+    "certificate": ("certificate_info", "certificate_values"),
+}
 
 
 class DBUtils(object):
@@ -40,15 +53,26 @@ class DBUtils(object):
         self.info = {}
         self._precision = 3
         self._maxlen = 100
+        self._max_points = 1000  # Point budget of each graph trace, larger series are downsampled
+        self._downsampling = "lttb"
         self._initialized = False
         self._subscribers = defaultdict(bool)
         self._current_project = {}  # Contains certificates, metrics, info, project info
         self._current_project_name = None  # Used with sqlite to get current project
         self._last_current_project_name = None
+        self._project_listeners = []  # Called with the name of the project the dashboard switches away from
         self._load_analysis_storage = {}
         self._projects = []
         self._metrics_config = {}
         self.db = None
+        self.measurements_db = None
+        self._last_measurement_seq = 0
+        self._revisions = {}  # Revision token or raw value of each project key when it was last decoded
+        self._legacy_measurements = None  # Raw and decoded 'metric_values' of projects written before the measurements table
+        self.analysis_jobs = None
+        self._analysis_revision = 0
+        self._analysis_job_ids = {}  # Latest job requested for each analysis of the current project
+        self._available_analysis_job = None
         self.config_db = None
         self.projects_db = self._get_db()
         self._init_monitoring()
@@ -61,16 +85,16 @@ class DBUtils(object):
         return val
 
     def has_analysis_update(self, analysis, reset=True):
-        current = self.db.get('analysis_update', {})
-        if current and current.get(analysis) and current.get(analysis, {}).get('update') is True:
-            current[analysis]['update'] = False
-            self.db['analysis_update'] = current
-            return True
-        return False
+        if self._current_project_name is None:
+            return False
+        return self.has_update("analysis_update|" + self._current_project_name + "|" + analysis, reset)
 
     def reset_channel(self, channel):
         self._subscribers[channel] = False
 
+    def add_project_listener(self, listener):
+        self._project_listeners.append(listener)
+
     def _get_db(self, name=None):
         folder = os.getenv('DATABASE_FOLDER')
         if name is None:
@@ -78,96 +102,96 @@ class DBUtils(object):
         db = f'{folder}/{name}.sqlite'
         return SqliteDict(db, encode=json.dumps, decode=json.loads, autocommit=True)
 
+    def _get_measurements_db(self, name):
+        folder = os.getenv('DATABASE_FOLDER')
+        return sqlite3.connect(f'{folder}/{name}.sqlite', timeout=30, check_same_thread=False)
+
+    def _get_analysis_jobs(self, name):
+        folder = os.getenv('DATABASE_FOLDER')
+        analysis_jobs = AnalysisJobClient(f'{folder}/{name}.sqlite')
+        analysis_jobs.add_listener(self._on_analysis_jobs_changed)
+        return analysis_jobs
+
     def _init_monitoring(self):
         def sub_handler():
             self._update_projects()
             if self._current_project_name:
-                self._update_info()
-                self._update_values()
-            relevant = ["metric_detail", "metric_graph", "certificate"]
-            for item in relevant:
-                self._subscribers[item] = True
+                changed = self._update_info() + self._update_values()
+                self._notify(changed)
         DashboardTimer(5, sub_handler)
 
+    def _notify(self, changed_keys=None):
+        # Marks the channels displaying one of the changed keys as updated, every channel when changed_keys is None
+        for channel, keys in CHANNEL_KEYS.items():
+            if changed_keys is None or any(key in changed_keys for key in keys):
+                self._subscribers[channel] = True
+
     def _progress_to_html(self, progress):
         return html.Div(dbc.Progress(value=progress, label=str(progress) + "%"))
 
+    def _on_analysis_jobs_changed(self):
+        # Called by the job watcher when the RAI process updates a job
+        project_name = self._current_project_name
+        for job in self.analysis_jobs.changes_since(self._analysis_revision):
+            self._analysis_revision = job['revision']
+            if job['kind'] == AVAILABLE:
+                if job['job_id'] == self._available_analysis_job and job['status'] == DONE:
+                    self.set_available_analysis(json.loads(job['result']))
+                continue
+            analysis = job['analysis']
+            if self._analysis_job_ids.get(analysis) != job['job_id']:
+                continue
+            if job['status'] == DONE:
+                report = html.Div(json.loads(job['result']))
+            elif job['status'] == FAILED:
+                report = html.P(f"Analysis failed: {job['result']}")
+            elif job['status'] == CANCELLED:
+                report = html.P("Analysis cancelled")
+            else:
+                report = self._progress_to_html(job['progress'])
+            self.set_analysis_progress(project_name, analysis, report)
+            self._subscribers["analysis_update|" + project_name + "|" + analysis] = True
+
     def request_start_analysis(self, analysis):
-        def handler_analysis():
-            try:
-                keep_alive = True
-                request = self.db.get('analysis_response')
-                if request and request.get(analysis):
-                    val = request[analysis]['val']
-                    self.db['analysis_response'][analysis] = {
-                        'val': val,
-                        'seen': True,
-                    }
-                    res = self.db.get('analysis_update')
-                    if not res.get(analysis):
-                        res[analysis] = {'progress': 0}
-                    self.set_analysis_progress(self._current_project_name, analysis, html.Div(json.loads(val)))
-                    self._subscribers["analysis_update|" + self._current_project_name + "|" + analysis] = True
-                    if res[analysis]['progress'] == 100:
-                        keep_alive = False
-                    res[analysis] = {'update': True, 'progress': 100}
-                    self.db['analysis_update'] = res
-            except Exception as e:
-                print(f'handler_analysis timer failed: {e}', traceback.print_exc())
-            finally:
-                return keep_alive
-
-        def handler_progress():
-            try:
-                keep_alive = True
-                request = self.db.get('analysis_update')
-                if request and request.get(analysis):
-                    progress = request[analysis]['progress']
-                    self.set_analysis_progress(self._current_project_name, analysis, self._progress_to_html(progress))
-                    if progress == 100:
-                        keep_alive = False
-                    self._subscribers["analysis_update|" + self._current_project_name + "|" + analysis] = True
-            except Exception as e:
-                print(f'handler_progress timer failed: {e}')
-            finally:
-                return keep_alive
+        """
+        Queues a run of the analysis on the current dataset, superseding a previous run of the same analysis.
+        Other analysis keep running concurrently.
+
+        :return: id of the queued job
+        """
+        if self.analysis_jobs is None:
+            return None
+        previous = self._analysis_job_ids.get(analysis)
+        if previous is not None:
+            self.analysis_jobs.cancel(previous)
         self.set_analysis_progress(self._current_project_name, analysis, self._progress_to_html(0))
-        self.db['analysis_response'] = {}
-        self.db['analysis_update'] = {}
-        self.db['start_analysis'] = {
-            'data': self.get_current_dataset(),
-            'analysis': analysis,
-            'seen': False
-        }
-        DashboardTimer(1.2, handler_analysis)
-        DashboardTimer(1, handler_progress)
+        job_id = self.analysis_jobs.submit(RUN, self.get_current_dataset(), analysis)
+        self._analysis_job_ids[analysis] = job_id
+        return job_id
+
+    def cancel_analysis(self, analysis):
+        """
+        Cancels the latest requested run of the analysis, a running analysis stops at its next progress tick.
+
+        :return: True if the analysis was still queued or running
+        """
+        job_id = self._analysis_job_ids.get(analysis)
+        if job_id is None or not self.analysis_jobs.cancel(job_id):
+            return False
+        self.set_analysis_progress(self._current_project_name, analysis, html.P("Analysis cancelled"))
+        self._subscribers["analysis_update|" + self._current_project_name + "|" + analysis] = True
+        return True
 
     def request_available_analysis(self):
-        def sub_handler():
-            try:
-                keep_alive = True
-                request = self.db.get('available_analysis_response')
-                if request and request['seen'] is False:
-                    self.db['available_analysis_response'] = {
-                        'data': request['data'],
-                        'seen': True
-                    }
-                    self.set_available_analysis(json.loads(request['data']))
-                    keep_alive = False
-            except Exception as e:
-                print(f'Analysis timer failed: {e}')
-            finally:
-                return keep_alive
+        if self.analysis_jobs is None:
+            return
         print("requesting available analysis")
-        self.db['available_analysis'] = {
-            'data': self.get_current_dataset(),
-            'seen': False
-        }
-        DashboardTimer(0.5, sub_handler)
+        self._available_analysis_job = self.analysis_jobs.submit(AVAILABLE, self.get_current_dataset())
 
     def reformat(self, precision):
         self._precision = precision
         self._current_project = self._reformat_data(self._current_project)
+        self._notify()
 
     def _reload(self):
         self._update_projects()
@@ -177,6 +201,10 @@ class DBUtils(object):
     def close(self):
         self.db.close()
         self.projects_db.close()
+        if self.measurements_db:
+            self.measurements_db.close()
+        if self.analysis_jobs:
+            self.analysis_jobs.close()
 
     def get_project_info(self):
         return self._current_project.get("project_info", {})
@@ -193,6 +221,9 @@ class DBUtils(object):
     def get_metric_values(self):
         return self._current_project.get("metric_values", '[]')
 
+    def get_current_project_name(self):
+        return self._current_project_name
+
     def get_current_dataset(self):
         return self._current_project.get("current_dataset", None)
 
@@ -209,8 +240,8 @@ class DBUtils(object):
         analysis = None
         if analysis_name is not None:
             analysis = self._load_analysis_storage.get(self._current_project_name, {}).get(analysis_name, None)
-            if analysis is None:
-                analysis = self.db.get("analysis_response", {}).get(analysis, {}).get('val')
+            if analysis is None and self.analysis_jobs is not None:
+                analysis = self.analysis_jobs.latest_result(analysis_name)
                 if analysis is not None:
                     analysis = json.loads(analysis)
         return analysis
@@ -220,7 +251,10 @@ class DBUtils(object):
         logger.info(f"changing current project from {self._current_project_name} to {project_name}")
         if self._current_project_name == project_name:
             return
-        self._current_project_name = project_name
+        previous_project_name, self._current_project_name = self._current_project_name, project_name
+        if previous_project_name is not None:
+            for listener in self._project_listeners:
+                listener(previous_project_name)
         if self.config_db:
             self.config_db.close()
         self.config_db = self._get_db(f'{project_name}_config')
@@ -228,6 +262,18 @@ class DBUtils(object):
         if self.db:
             self.db.close()
         self.db = self._get_db(project_name)
+        if self.measurements_db:
+            self.measurements_db.close()
+        self.measurements_db = self._get_measurements_db(project_name)
+        self._last_measurement_seq = 0
+        self._revisions = {}
+        self._legacy_measurements = None
+        if self.analysis_jobs:
+            self.analysis_jobs.close()
+        self._analysis_job_ids = {}
+        self._available_analysis_job = None
+        self.analysis_jobs = self._get_analysis_jobs(project_name)
+        self._analysis_revision = self.analysis_jobs.current_revision()
         self._current_project = {}
         self._update_info()
         self._update_values()
@@ -235,6 +281,7 @@ class DBUtils(object):
         self.set_model_interpretation()
         self._current_project["analysis"] = {}
         self._current_project = self._reformat_data(self._current_project)
+        self._notify()
 
     def set_current_dataset(self, dataset):
         self._current_project["current_dataset"] = dataset
@@ -268,32 +315,91 @@ class DBUtils(object):
     def get_dataset_list(self):
         return self._current_project.get("dataset_values", [])
 
+    def _load_changed(self, keys, default):
+        """
+        Decodes the project keys which changed since they were last loaded, and returns their names.
+        Keys are compared by the revision token RaiDB writes next to them, or by their raw value for projects without tokens.
+        """
+        revisions = self.db.get(REVISIONS, {})
+        changed = []
+        for key in keys:
+            raw = None
+            revision = revisions.get(key)
+            if revision is None:
+                raw = self.db.get(key)
+                revision = raw
+            if key in self._revisions and key in self._current_project and self._revisions[key] == revision:
+                continue
+            if raw is None:
+                raw = self.db.get(key)
+            self._revisions[key] = revision
+            self._current_project[key] = json.loads(raw) if raw is not None else default
+            changed.append(key)
+        return changed
+
     def _update_info(self):
         self.info = {}
         if self._last_current_project_name != self._current_project_name:
             print("current project name: ", self._current_project_name)
             self._last_current_project_name = self._current_project_name
-        self._current_project["project_info"] = \
-            json.loads(self.db.get('project_info', '{}'))
-        self._current_project["certificate_info"] = \
-            json.loads(self.db.get('certificate_info', '{}'))
-        self._current_project["metric_info"] = \
-            json.loads(self.db.get('metric_info', '{}'))
+        return self._load_changed(INFO_KEYS, {})
+
+    def read_measurements_since(self, seq: int = 0):
+        """
+        Returns the measurements stored after sequence number seq as (sequence number, metric values) pairs.
+        Projects written before measurements had their own table are read from the legacy 'metric_values' key.
+        """
+        try:
+            rows = self.measurements_db.execute(
+                f'SELECT seq, value FROM {MEASUREMENTS_TABLE} WHERE seq > ? ORDER BY seq', (seq,)).fetchall()
+        except sqlite3.OperationalError:
+            rows = []
+        if not rows:
+            legacy = self._read_legacy_measurements()
+            if legacy is not None:
+                return [(i + 1, value) for i, value in enumerate(legacy) if i + 1 > seq]
+        return [(row_seq, decode_value(value)) for row_seq, value in rows]
+
+    def _read_legacy_measurements(self):
+        legacy = self.db.get('metric_values')
+        if legacy is None:
+            return None
+        if self._legacy_measurements is None or self._legacy_measurements[0] != legacy:
+            self._legacy_measurements = (legacy, json.loads(legacy))
+        return self._legacy_measurements[1]
+
+    def _measurements_were_reset(self):
+        # Sequence numbers are never reused, so a reset shows up as missing rows at or below the last read one
+        if self._last_measurement_seq == 0:
+            return False
+        try:
+            row = self.measurements_db.execute(
+                f'SELECT seq FROM {MEASUREMENTS_TABLE} WHERE seq <= ? LIMIT 1', (self._last_measurement_seq,)).fetchone()
+        except sqlite3.OperationalError:
+            row = None
+        if row is None:
+            legacy = self._read_legacy_measurements()
+            return legacy is None or len(legacy) < self._last_measurement_seq
+        return False
 
     def _update_values(self):
+        # Only measurements added since the last update are read, returns the names of the keys which changed
         self.values = {}
-        self._current_project["metric_values"] = json.loads(
-            self.db.get('metric_values')
-        )
-        self._current_project["certificate_values"] = json.loads(
-            self.db.get('certificate_values')
-        )
-
-        self._current_project["dataset_values"] = []
-        for item in self._current_project["metric_values"]:
+        changed = []
+        if "metric_values" not in self._current_project or self._measurements_were_reset():
+            self._current_project["metric_values"] = []
+            self._current_project["dataset_values"] = []
+            self._last_measurement_seq = 0
+            changed.append("metric_values")
+        for seq, item in self.read_measurements_since(self._last_measurement_seq):
+            self._current_project["metric_values"].append(item)
+            self._last_measurement_seq = seq
             for val in item:
                 if val not in self._current_project["dataset_values"]:
                     self._current_project["dataset_values"].append(val)
+            if "metric_values" not in changed:
+                changed.append("metric_values")
+        return changed + self._load_changed(("certificate_values",), {})
 
     def _reformat_data(self, x):
         if type(x) is float:
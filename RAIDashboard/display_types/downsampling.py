@@ -0,0 +1,82 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import numpy as np
+
+__all__ = ['downsample', 'lttb', 'min_max']
+
+DOWNSAMPLING_METHODS = ("lttb", "minmax")
+
+
+# Returns the indices of the points to draw, at most max_points of them, optionally restricted to x_range.
+# Points without a value are dropped once the series is downsampled, first and last points are always kept
+def downsample(x, y, max_points: int = None, method: str = "lttb", x_range=None):
+    assert method in DOWNSAMPLING_METHODS, "method must be one of " + str(DOWNSAMPLING_METHODS)
+    x = np.asarray(x, dtype=np.float64)
+    indices = np.arange(len(x))
+    if x_range is not None:
+        # One point on each side of the range keeps the lines reaching the plot edges
+        start = max(np.searchsorted(x, x_range[0], side="left") - 1, 0)
+        stop = min(np.searchsorted(x, x_range[1], side="right") + 1, len(x))
+        indices = indices[start:stop]
+    if max_points is None or len(indices) <= max_points:
+        return indices
+    values = np.array([np.nan if y[i] is None else y[i] for i in indices], dtype=np.float64)
+    indices = indices[np.isfinite(values)]
+    values = values[np.isfinite(values)]
+    if len(indices) <= max_points:
+        return indices
+    if method == "lttb":
+        return indices[lttb(x[indices], values, max_points)]
+    return indices[min_max(values, max_points)]
+
+
+# Largest Triangle Three Buckets, keeps the point of each bucket forming the largest triangle with
+# the previously kept point and the average of the next bucket
+def lttb(x, y, n_out: int):
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = (np.arange(n_out - 1) * (n - 2) / (n_out - 2)).astype(np.int64) + 1
+    edges[-1] = n - 1
+    result = np.empty(n_out, dtype=np.int64)
+    result[0] = 0
+    result[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[stop:next_stop].mean()
+        avg_y = y[stop:next_stop].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        result[i + 1] = a
+    return result
+
+
+# Keeps the smallest and largest value of each bucket, so spikes are never dropped
+def min_max(y, n_out: int):
+    n = len(y)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, (n_out - 2) // 2 + 1).astype(np.int64)
+    kept = [0, n - 1]
+    for start, stop in zip(edges[:-1], edges[1:]):
+        if stop > start:
+            kept.append(start + int(np.argmin(y[start:stop])))
+            kept.append(start + int(np.argmax(y[start:stop])))
+    return np.unique(kept)
@@ -16,6 +16,7 @@
 
 
 from .display_object import DisplayElement
+from .downsampling import downsample
 import plotly.graph_objs as go
 from abc import ABCMeta
 from dash import dcc
@@ -40,18 +41,30 @@ class TraceableElement(DisplayElement, metaclass=ABCMeta):
                           "bordercolor": "Black",
                           "borderwidth": 1}
 
-    def _get_sc_data(self):
+    def __len__(self):
+        return len(self._data["x"])
+
+    def _select(self, max_points=None, method="lttb", x_range=None):
+        # Returns the columns of the points to draw, downsampled to max_points within x_range
+        indices = downsample(self._data["x"], self._data["y"], max_points, method, x_range)
+        if len(indices) == len(self._data["x"]):
+            return self._data
+        return {key: [values[i] for i in indices] for key, values in self._data.items()}
+
+    def _get_sc_data(self, data=None):
+        data = self._data if data is None else data
         return {
             'mode': self._settings["mode"], 'name': f"{self._name}",
             'orientation': self._settings["orientation"], 'showlegend': self._settings["showlegend"],
-            'text': self._data["text"], 'x': self._data["x"], 'xaxis': 'x', 'y': self._data['y'], 'yaxis': 'y',
+            'text': data["text"], 'x': data["x"], 'xaxis': 'x', 'y': data['y'], 'yaxis': 'y',
             'type': self._settings["type"], 'textposition': self._settings["textposition"],
             'hovertemplate': 'metric=' + self._name + '<br>x=%{x}<br>value=%{y}<br>text=%{text}<extra></extra>'
         }
 
-    def _update_layout(self, fig, tickvals):
+    def _update_layout(self, fig, tickvals, ticktext=None):
+        ticktext = self._data["tag"] if ticktext is None else ticktext
         fig.update_layout(
-            xaxis=dict(tickmode=self._settings["tickmode"], tickvals=tickvals, ticktext=self._data["tag"]),
+            xaxis=dict(tickmode=self._settings["tickmode"], tickvals=tickvals, ticktext=ticktext),
             legend=dict(title_font_family=self._settings["title_font_family"],
                         font=dict(family=self._settings["font_family"], size=self._settings["font_size"],
                                   color=self._settings["font_color"]),
@@ -59,17 +72,23 @@ class TraceableElement(DisplayElement, metaclass=ABCMeta):
                         bordercolor=self._settings["bordercolor"],
                         borderwidth=self._settings["borderwidth"]))
 
-    def to_display(self):
-        sc_data = self._get_sc_data()
+    def to_display(self, max_points=None, method="lttb"):
         fig = go.Figure()
-        fig.add_trace(go.Scatter(**sc_data))
-        fig.update_traces(textposition="top center")
-        self._update_layout(fig, self._data["x"])
+        self.add_trace_to(fig, max_points, method)
         return [dcc.Graph(figure=fig)]
 
-    def add_trace_to(self, fig):
-        sc_data = self._get_sc_data()
-        fig.add_trace(go.Scatter(**sc_data))
+    def add_trace_to(self, fig, max_points=None, method="lttb", x_range=None):
+        """
+        Adds the trace of the metric to fig, drawing at most max_points points.
+
+        :param fig: plotly figure receiving the trace
+        :param max_points: point budget of the trace, by default every point is drawn
+        :param method: "lttb" keeps the shape of the series, "minmax" keeps the extreme value of each bucket
+        :param x_range: (start, end) measurement range to draw, by default the whole series
+        :return: fig
+        """
+        data = self._select(max_points, method, x_range)
+        fig.add_trace(go.Scatter(**self._get_sc_data(data)))
         fig.update_traces(textposition="top center")
-        self._update_layout(fig, self._data["x"])
+        self._update_layout(fig, data["x"], data["tag"])
         return fig
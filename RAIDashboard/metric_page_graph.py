@@ -16,6 +16,7 @@
 
 
 import logging
+import threading
 import dash
 import dash_bootstrap_components as dbc
 from dash import Input, Output, html, State
@@ -32,24 +33,72 @@ prefix = "grouped_"
 selector_height = "320px"
 
 
-def add_trace_to_fig(fig, group, metric):
-    dataset = dbUtils.get_current_dataset()
+# Time series of each displayed metric, measurements stored after a series was built are appended to it
+_traces = {}
+_traces_lock = threading.Lock()
+
+
+def get_trace(dataset, group, metric, metric_type):
     metric_values = dbUtils.get_metric_values()
+    key = (dbUtils.get_current_project_name(), dataset, group, metric)
+    with _traces_lock:
+        entry = _traces.get(key)
+        # Resetting or reformatting the measurements replaces their list, which rebuilds the series
+        if entry is None or entry[1] is not metric_values or entry[2] > len(metric_values):
+            display_obj = get_display(metric, metric_type, dbUtils)
+            if display_obj is None:
+                return None
+            entry = [display_obj, metric_values, 0]
+            _traces[key] = entry
+        display_obj, _, count = entry
+        for data in metric_values[count:]:
+            data = data[dataset]
+            display_obj.append(data[group][metric], data["metadata"]["tag"])
+        entry[2] = len(metric_values)
+        return display_obj
+
+
+# Drops the series of other projects and datasets, and of metrics which are not selected anymore
+def prune_traces(options):
+    current = (dbUtils.get_current_project_name(), dbUtils.get_current_dataset())
+    selected = {tuple(item.split(',')) for item in options}
+    with _traces_lock:
+        for key in [key for key in _traces if key[:2] != current or key[2:] not in selected]:
+            del _traces[key]
+
+
+def _clear_project_traces(project_name):
+    with _traces_lock:
+        for key in [key for key in _traces if key[0] == project_name]:
+            del _traces[key]
+
+
+dbUtils.add_project_listener(_clear_project_traces)
+
+
+def add_trace_to_fig(fig, group, metric, x_range=None):
+    dataset = dbUtils.get_current_dataset()
     metric_type = dbUtils.get_metric_info()
     if group not in metric_type:
         return
     if metric not in metric_type[group]:
         return
     type = metric_type[group][metric].get("type", "numeric")
-    display_obj = get_display(metric, type, dbUtils)
+    display_obj = get_trace(dataset, group, metric, type)
     if display_obj is not None:
-        for i, data in enumerate(metric_values):
-            data = data[dataset]
-            display_obj.append(data[group][metric], data["metadata"]["tag"])
-        display_obj.add_trace_to(fig)
+        display_obj.add_trace_to(fig, dbUtils._max_points, dbUtils._downsampling, x_range)
     return
 
 
+def options_from_db():
+    opt = []
+    db_options = dbUtils._metrics_config
+    for k, v in db_options.items():
+        for item in v:
+            opt.append(f'{k},{item}')
+    return opt
+
+
 # Removes all values from a certain group, and re-adds all of those found in selected
 def update_metric_selections(group: str, selected: list, options: list):
     options = [item for item in options if not item.startswith(group + ",")]
@@ -231,13 +280,6 @@ def update_metric_choices(p_selected, c_selected, reset_button, metric_search, p
     State(prefix + 'graph_cnt', 'children')
 )
 def update_graph(n, options, old_container):
-    def options_from_db():
-        opt = []
-        db_options = dbUtils._metrics_config
-        for k, v in db_options.items():
-            for item in v:
-                opt.append(f'{k},{item}')
-        return opt
     ctx = dash.callback_context
     is_new_data, is_time_update, _ = mvf.get_graph_update_purpose(ctx, prefix)
     if is_time_update:
@@ -246,15 +288,46 @@ def update_graph(n, options, old_container):
             dbUtils._subscribers["metric_graph"] = False
             is_new_data = True
 
-    if is_new_data or options_from_db():
+    # Interval ticks without new measurements keep the current figure
+    if is_new_data or not is_time_update:
         fig = go.Figure()
         if options is None:
             options = options_from_db()
+        prune_traces(options)
         if len(options) == 0:
             return []
         for item in options:
             k, v = item.split(',')
             add_trace_to_fig(fig, k, v)
-        return [dcc.Graph(figure=fig)]
+        return [dcc.Graph(id=prefix + 'graph', figure=fig)]
 
     raise PreventUpdate
+
+
+# Zooming draws the visible measurements with the full point budget, resetting the axes draws the whole series again
+@app.callback(
+    Output(prefix + 'graph', 'figure'),
+    Input(prefix + 'graph', 'relayoutData'),
+    State(prefix + 'legend_data', 'data'),
+    prevent_initial_call=True
+)
+def zoom_graph(relayout, options):
+    if not relayout:
+        raise PreventUpdate
+    if 'xaxis.range[0]' in relayout and 'xaxis.range[1]' in relayout:
+        x_range = (relayout['xaxis.range[0]'], relayout['xaxis.range[1]'])
+    elif 'xaxis.range' in relayout:
+        x_range = tuple(relayout['xaxis.range'])
+    elif relayout.get('xaxis.autorange'):
+        x_range = None
+    else:
+        raise PreventUpdate
+    if options is None:
+        options = options_from_db()
+    fig = go.Figure()
+    for item in options:
+        k, v = item.split(',')
+        add_trace_to_fig(fig, k, v, x_range)
+    if x_range is not None:
+        fig.update_xaxes(range=list(x_range))
+    return fig
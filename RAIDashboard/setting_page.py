@@ -37,6 +37,16 @@ def get_setting_page():
                 [dbc.FormText("Maximum text length", style={"margin-top": "20px"}),
                  dbc.Input(id="input_maxlen", type="number", min=1, max=500, step=1, value=dbUtils._maxlen)],
                 className="d-grid gap-2", id="styled-numeric-input"),
+            html.Div(
+                [dbc.FormText("Maximum points per graph", style={"margin-top": "20px"}),
+                 dbc.Input(id="input_max_points", type="number", min=10, max=100000, step=1, value=dbUtils._max_points)],
+                className="d-grid gap-2"),
+            html.Div(
+                [dbc.FormText("Downsampling", style={"margin-top": "20px"}),
+                 dbc.Select(id="input_downsampling", value=dbUtils._downsampling,
+                            options=[{"label": "Largest Triangle Three Buckets", "value": "lttb"},
+                                     {"label": "Min-Max", "value": "minmax"}])],
+                className="d-grid gap-2"),
             html.Div(
                 dbc.Button("Apply", id="apply_setting", href="/single_metric_info/?" + qs, style={"margin-top": "30px"},
                            color="secondary"), className="d-grid gap-2")
@@ -52,11 +62,17 @@ def get_setting_page():
     [
         Input("input_maxlen", "value"),
         Input("input_precision", "value"),
+        Input("input_max_points", "value"),
+        Input("input_downsampling", "value"),
     ],
 )
-def on_form_change(maxlen, precision):
+def on_form_change(maxlen, precision, max_points, downsampling):
     if maxlen is not None:
         dbUtils._maxlen = maxlen
+    if max_points is not None:
+        dbUtils._max_points = max_points
+    if downsampling is not None:
+        dbUtils._downsampling = downsampling
     if precision:
         dbUtils.reformat(precision)
     return []
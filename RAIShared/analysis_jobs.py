@@ -0,0 +1,153 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import logging
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+__all__ = ['connect_jobs', 'submit_job', 'cancel_job', 'DataVersionWatcher']
+
+# Analysis requests from the dashboard are rows of this table, stored in the project database.
+# Every write stamps the row with the next revision, so a reader can fetch exactly the jobs that changed.
+JOBS_TABLE = 'analysis_jobs'
+CREATE_JOBS_TABLE = f'CREATE TABLE IF NOT EXISTS {JOBS_TABLE} ' \
+                    '(job_id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, dataset TEXT, analysis TEXT, ' \
+                    'status TEXT NOT NULL, progress INTEGER NOT NULL DEFAULT 0, result TEXT, ' \
+                    'revision INTEGER NOT NULL DEFAULT 0)'
+CREATE_JOBS_INDEX = f'CREATE INDEX IF NOT EXISTS {JOBS_TABLE}_revision ON {JOBS_TABLE} (revision)'
+NEXT_REVISION = f'(SELECT COALESCE(MAX(revision), 0) + 1 FROM {JOBS_TABLE})'
+JOB_COLUMNS = ('job_id', 'kind', 'dataset', 'analysis', 'status', 'progress', 'result', 'revision')
+
+# Job kinds
+AVAILABLE = 'available'
+RUN = 'run'
+
+# Job statuses
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+# Seconds between two data_version checks
+WATCH_INTERVAL = 1.0
+
+
+def connect_jobs(path: str):
+    """
+    Opens the project database, creating the jobs table if needed
+
+    :param path: path of the project sqlite database
+    :return: sqlite3 connection which can be shared by threads
+    """
+    connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    with connection:
+        connection.execute(CREATE_JOBS_TABLE)
+        connection.execute(CREATE_JOBS_INDEX)
+    return connection
+
+
+def submit_job(connection, lock, kind: str, dataset: str, analysis: str = None, status: str = QUEUED) -> int:
+    """
+    Adds a job, used by the dashboard to request an analysis and by the worker for the analysis it runs itself
+
+    :param connection: connection returned by connect_jobs
+    :param lock: lock held by the owner around its uses of the connection
+    :param kind: 'available' to list the available analysis, 'run' to run one
+    :param dataset: dataset the analysis uses
+    :param analysis: name of the analysis to run
+    :param status: initial status, 'running' for jobs the caller runs itself
+
+    :return: id of the new job
+    """
+    with lock, connection:
+        cursor = connection.execute(f'INSERT INTO {JOBS_TABLE} (kind, dataset, analysis, status, revision) '
+                                    f'VALUES (?, ?, ?, ?, {NEXT_REVISION})', (kind, dataset, analysis, status))
+    return cursor.lastrowid
+
+
+def cancel_job(connection, lock, job_id: int) -> bool:
+    """
+    Cancels a queued or running job. A running analysis stops at its next progress tick.
+
+    :param connection: connection returned by connect_jobs
+    :param lock: lock held by the owner around its uses of the connection
+    :param job_id: id of the job
+
+    :return: True if the job was still queued or running
+    """
+    with lock, connection:
+        cursor = connection.execute(f'UPDATE {JOBS_TABLE} SET status = ?, revision = {NEXT_REVISION} '
+                                    'WHERE job_id = ? AND status IN (?, ?)', (CANCELLED, job_id, QUEUED, RUNNING))
+    return cursor.rowcount > 0
+
+
+class DataVersionWatcher:
+    """
+    Calls listeners from a daemon thread when another connection commits to the database.
+    SQLite has no notification across processes, so the thread checks ``PRAGMA data_version``, which only reads
+    the database header, once per interval. The jobs themselves are only read by the listeners.
+
+    :param connection: connection to watch, shared with its owner
+    :param lock: lock held by the owner around its uses of the connection
+    :param interval: seconds between two data_version checks
+    """
+
+    def __init__(self, connection, lock, interval: float = WATCH_INTERVAL) -> None:
+        self.connection = connection
+        self._lock = lock
+        self._listeners = []
+        self._stop = threading.Event()
+        self._data_version = self._get_data_version()
+        self._thread = threading.Thread(target=self._watch, args=(interval,), daemon=True)
+        self._thread.start()
+
+    def add_listener(self, listener) -> None:
+        """
+        :param listener: function without arguments, called from the watcher thread when the database was changed
+            by another connection
+        """
+        self._listeners.append(listener)
+
+    def _get_data_version(self):
+        with self._lock:
+            return self.connection.execute('PRAGMA data_version').fetchone()[0]
+
+    def _watch(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                version = self._get_data_version()
+            except sqlite3.Error as e:
+                logger.warning(f'Analysis job watcher failed: {e}')
+                continue
+            if version != self._data_version:
+                self._data_version = version
+                for listener in list(self._listeners):
+                    try:
+                        listener()
+                    except Exception as e:
+                        logger.exception(f'Analysis job listener failed: {e}')
+
+    def close(self) -> None:
+        """
+        Stops the watcher thread, without closing the connection
+        """
+        self._stop.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
@@ -0,0 +1,146 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import json
+from importlib import import_module
+import numpy as np
+
+__all__ = ['ENCODINGS', 'encode_value', 'decode_value']
+
+# Stored values are either JSON text, or bytes starting with MAGIC and one byte naming the binary encoding.
+# RAI.db writes them and the dashboard reads them with this module. msgpack and zstandard are only imported
+# for the binary encodings, they are installed with the msgpack and zstd extras of the package.
+ENCODINGS = ('json', 'msgpack', 'msgpack+zstd')
+MAGIC = b'RAI'
+_ENCODING_BYTES = {'msgpack': b'm', 'msgpack+zstd': b'z'}
+ARRAY_EXT = 1
+# Shorter lists are cheaper to store as msgpack arrays than with an array header
+MIN_ARRAY_SIZE = 16
+ZSTD_LEVEL = 3
+
+
+def encode_value(value, encoding: str = 'json'):
+    """
+    Encodes a stored value such as the metric values of a measurement.
+    The binary encodings store numeric lists and arrays as raw NumPy buffers inside msgpack,
+    'msgpack+zstd' also compresses the result. They need the msgpack and zstandard packages.
+
+    :param value: JSON compatible value, NumPy arrays and scalars are accepted as well
+    :param encoding: one of ENCODINGS
+    :return: str for 'json', bytes otherwise
+    """
+    assert encoding in ENCODINGS, "encoding must be one of " + str(ENCODINGS)
+    if encoding == 'json':
+        return json.dumps(value)
+    payload = import_module('msgpack').packb(_pack(value), use_bin_type=True)
+    if encoding == 'msgpack+zstd':
+        payload = import_module('zstandard').ZstdCompressor(level=ZSTD_LEVEL).compress(payload)
+    return MAGIC + _ENCODING_BYTES[encoding] + payload
+
+
+def decode_value(stored):
+    """
+    Decodes a value written by encode_value with any encoding, numeric arrays are returned as lists
+    so decoded values are the same as after a JSON round trip.
+    """
+    if not isinstance(stored, (bytes, bytearray, memoryview)):
+        return json.loads(stored)
+    stored = bytes(stored)
+    if not stored.startswith(MAGIC):
+        return json.loads(stored)
+    encoding_byte, payload = stored[len(MAGIC):len(MAGIC) + 1], stored[len(MAGIC) + 1:]
+    if encoding_byte == _ENCODING_BYTES['msgpack+zstd']:
+        payload = import_module('zstandard').ZstdDecompressor().decompress(payload)
+    elif encoding_byte != _ENCODING_BYTES['msgpack']:
+        raise ValueError(f"Unknown stored value encoding {encoding_byte!r}")
+    msgpack = import_module('msgpack')
+    return msgpack.unpackb(payload, ext_hook=_unpack_ext, strict_map_key=False)
+
+
+# Converts value to what msgpack stores, numeric lists and arrays become array extensions
+def _pack(value):
+    if isinstance(value, dict):
+        return {_pack_key(key): _pack(item) for key, item in value.items()}
+    if isinstance(value, np.ndarray):
+        packed = _pack_array(value) if value.dtype.kind in 'biuf' and value.ndim > 0 else None
+        return packed if packed is not None else _pack(value.tolist())
+    if isinstance(value, (list, tuple)):
+        packed = _pack_list(value) if len(value) >= MIN_ARRAY_SIZE else None
+        return packed if packed is not None else [_pack(item) for item in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+# Dictionary keys are converted to strings the way json.dumps converts them
+def _pack_key(key):
+    if isinstance(key, str):
+        return key
+    if isinstance(key, np.generic):
+        key = key.item()
+    return json.dumps(key)
+
+
+def _pack_list(value):
+    try:
+        array = np.asarray(value)
+    except (ValueError, TypeError, OverflowError):
+        return None
+    if array.dtype.kind in 'biuf':
+        return _pack_array(array)
+    if array.dtype != object:
+        return None
+    # Lists with missing values, like the ones jsonify returns, are stored as floats with a mask of the None positions
+    try:
+        objects = np.empty(array.shape, dtype=object)
+        objects[...] = value
+    except (ValueError, TypeError):
+        return None
+    missing = np.equal(objects, None)
+    if not all(type(item) is float for item in objects[~missing].flat):
+        return None
+    values = np.zeros(objects.shape, dtype=np.float64)
+    values[~missing] = objects[~missing].astype(np.float64)
+    return _pack_array(values, missing)
+
+
+def _pack_array(array, missing=None):
+    msgpack = import_module('msgpack')
+    array = np.ascontiguousarray(array)
+    header = [array.dtype.newbyteorder('<').str, list(array.shape)]
+    if missing is not None:
+        header.append(np.packbits(missing.ravel()).tobytes())
+    body = array.astype(array.dtype.newbyteorder('<'), copy=False).tobytes()
+    return msgpack.ExtType(ARRAY_EXT, msgpack.packb(header, use_bin_type=True) + body)
+
+
+def _unpack_ext(code, data):
+    msgpack = import_module('msgpack')
+    if code != ARRAY_EXT:
+        return msgpack.ExtType(code, data)
+    unpacker = msgpack.Unpacker(use_list=True)
+    unpacker.feed(data)
+    header = unpacker.unpack()
+    dtype, shape = np.dtype(header[0]), header[1]
+    offset = unpacker.tell()
+    array = np.frombuffer(data, dtype=dtype, offset=offset, count=int(np.prod(shape))).reshape(shape)
+    if len(header) < 3:
+        return array.tolist()
+    missing = np.unpackbits(np.frombuffer(header[2], dtype=np.uint8), count=array.size).astype(bool).reshape(shape)
+    objects = array.astype(object)
+    objects[missing] = None
+    return objects.tolist()
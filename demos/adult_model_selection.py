@@ -76,26 +76,30 @@ ai.initialize(user_config=configuration)
 # test and train data
 reg.fit(xTrain, yTrain)
 
-print("\n\nTESTING PREDICTING METRICS:")
-test_preds = reg.predict(xTest)
-ai.compute({"test": {"predict": test_preds}}, tag='model1')
+reg2 = AdaBoostClassifier()
+reg2.fit(xTrain, yTrain)
+model2 = Model(agent=reg2, output_features=output, name="cisco_income_ai", predict_fun=reg2.predict, predict_prob_fun=reg2.predict_proba,
+               description="Income Prediction AI", model_class="AdaBoost Classifier", )
 
 if use_dashboard:
     r = RaiDB(ai)
     r.reset_data()
-    r.add_measurement()
 
-reg2 = AdaBoostClassifier()
-reg2.fit(xTrain, yTrain)
-ai.model.agent = reg2
-test_preds = reg2.predict(xTest)
 
-ai.compute({"test": {"predict": test_preds}}, tag="model2")
-v = ai.get_metric_values()
-v = v["test"]
+# Adds a measurement for each model once its metrics are computed
+def add_measurement(tag):
+    if use_dashboard:
+        r.add_measurement()
+
+
+# Data only metrics are computed once and shared by both models
+print("\n\nTESTING PREDICTING METRICS:")
+values = ai.compute_models({"model1": {"test": {"predict": reg.predict(xTest)}},
+                            "model2": {"test": {"predict": reg2.predict(xTest)}}},
+                           models={"model1": model, "model2": model2}, on_model=add_measurement)
+v = values["model2"]["test"]
 info = ai.get_metric_info()
 
 if use_dashboard:
-    r.add_measurement()
     r.export_metadata()
     r.export_visualizations("test", "test")
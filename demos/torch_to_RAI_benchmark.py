@@ -0,0 +1,64 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+# Times the np.vstack/torch.vstack accumulation previously used by torch_to_RAI against the
+# preallocated conversion on a synthetic loader of 100k images, in memory and written to a memmap.
+import os
+import tempfile
+import time
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, Dataset
+from RAI.utils import torch_to_RAI
+
+images, shape, batch_size = 100000, (1, 28, 28), 256
+
+
+class SyntheticImages(Dataset):
+    def __init__(self):
+        generator = torch.Generator().manual_seed(0)
+        self.x = torch.rand((images,) + shape, generator=generator)
+        self.y = torch.randint(0, 10, (images,), generator=generator)
+        self.transform = None
+
+    def __len__(self):
+        return images
+
+    def __getitem__(self, index):
+        return self.x[index], self.y[index]
+
+
+def vstack(loader):
+    result_x, result_y, raw_x = None, [], None
+    for x, y in loader:
+        raw_x = x if raw_x is None else torch.vstack((raw_x, x))
+        x = x.detach().numpy()
+        x = x.reshape((-1, 1) + x.shape[1:])
+        result_x = x if result_x is None else np.vstack((result_x, x))
+        result_y.extend(y.detach().numpy().tolist())
+    return result_x, result_y, raw_x
+
+
+loader = DataLoader(SyntheticImages(), batch_size=batch_size)
+with tempfile.TemporaryDirectory() as folder:
+    memmap_path = os.path.join(folder, "x.npy")
+    for name, function in (("vstack", lambda: vstack(loader)),
+                           ("preallocated", lambda: torch_to_RAI(loader)),
+                           ("memmap", lambda: torch_to_RAI(loader, memmap_path=memmap_path))):
+        start = time.perf_counter()
+        result = function()
+        print(f"{name}: {time.perf_counter() - start:.3f}s, X shape {result[0].shape}")
+        del result
@@ -42,6 +42,16 @@ setup(name='openrai',
               'dash-daq~=0.5.0',
               'flask==2.2.4'
           ],
+          'msgpack': [
+              'msgpack~=1.0'
+          ],
+          'zstd': [
+              'msgpack~=1.0',
+              'zstandard~=0.21'
+          ],
+          'arrow': [
+              'pyarrow>=10.0'
+          ],
       },
       install_requires=[
           'aif360~=0.4.0',
@@ -0,0 +1,27 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+from RAI.AISystem import AISystem
+from RAI.dataset import Dataset
+
+
+# Builds and initializes an AISystem without certificates, on a Dataset of the named data
+def make_ai_system(name, model, meta, data_dict, task="binary_classification", user_config=None):
+    ai = AISystem(name, task=task, meta_database=meta, dataset=Dataset(data_dict), model=model,
+                  enable_certificates=False)
+    ai.initialize(user_config={} if user_config is None else user_config)
+    return ai
@@ -0,0 +1,118 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import os
+import sys
+import tempfile
+import threading
+from types import SimpleNamespace
+import pytest
+from RAI.db.analysis_queue import AnalysisJobQueue, AnalysisCancelled
+from RAI.db.service import RaiDB
+from RAIDashboard.analysis_jobs import AnalysisJobClient
+from RAIShared.analysis_jobs import RUN, QUEUED, RUNNING, DONE, FAILED, CANCELLED
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def jobs():
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "project.sqlite")
+        queue = AnalysisJobQueue(path, interval=0.01)
+        client = AnalysisJobClient(path, interval=0.01)
+        yield queue, client
+        client.close()
+        queue.close()
+
+
+def test_watchers_are_daemons(jobs):
+    """Tests that the watcher threads do not keep the process alive."""
+    queue, client = jobs
+    assert queue._watcher._thread.daemon
+    assert client._watcher._thread.daemon
+
+
+def test_listener_called_on_submit(jobs):
+    """Tests that the worker listeners are called when the dashboard submits a job."""
+    queue, client = jobs
+    changed = threading.Event()
+    queue.add_listener(changed.set)
+    job_id = client.submit(RUN, "test", "analysis")
+    assert changed.wait(5)
+    assert [job["job_id"] for job in queue.pending_jobs()] == [job_id]
+    assert queue.get_job(job_id)["status"] == QUEUED
+
+
+def test_job_lifecycle(jobs):
+    """Tests that a claimed job streams its progress and result to the dashboard."""
+    queue, client = jobs
+    job_id = client.submit(RUN, "test", "analysis")
+    revision = client.current_revision()
+    assert queue.claim(job_id)
+    assert not queue.claim(job_id)
+    queue.update_progress(job_id, 50)
+    changes = client.changes_since(revision)
+    assert [(job["status"], job["progress"]) for job in changes] == [(RUNNING, 50)]
+    assert queue.finish(job_id, "result")
+    assert client.changes_since(changes[-1]["revision"])[0]["status"] == DONE
+    assert client.latest_result("analysis") == "result"
+
+
+def test_cancel_stops_progress(jobs):
+    """Tests that a job cancelled by the dashboard stops at its next progress update."""
+    queue, client = jobs
+    job_id = client.submit(RUN, "test", "analysis")
+    assert queue.claim(job_id)
+    assert client.cancel(job_id)
+    with pytest.raises(AnalysisCancelled):
+        queue.update_progress(job_id, 10)
+    assert not queue.finish(job_id, "result")
+    assert queue.get_job(job_id)["status"] == CANCELLED
+    assert client.latest_result("analysis") is None
+
+
+def test_finish_removes_older_results(jobs):
+    """Tests that finishing a run removes the older finished runs of the same analysis."""
+    queue, client = jobs
+    first = client.submit(RUN, "test", "analysis")
+    queue.claim(first)
+    queue.finish(first, "first")
+    second = client.submit(RUN, "test", "analysis")
+    queue.claim(second)
+    queue.finish(second, "second")
+    assert queue.get_job(first) is None
+    assert client.latest_result("analysis") == "second"
+
+
+class FailingAnalysisManager:
+    def run_analysis(self, ai_system, dataset, analysis, connection=None):
+        connection(10)
+        raise ValueError("analysis failed")
+
+
+def test_exported_analysis_failure(tmp_path, monkeypatch):
+    """Tests that an exported analysis which raises is marked as failed instead of staying in progress."""
+    monkeypatch.setenv("DATABASE_FOLDER", str(tmp_path))
+    rai_db = RaiDB(SimpleNamespace(name="Export_Test"))
+    try:
+        rai_db._analysis_manager = FailingAnalysisManager()
+        rai_db._export_analysis("test", "analysis")
+        job = rai_db.analysis_jobs.get_job(1)
+        assert (job["status"], job["result"]) == (FAILED, "analysis failed")
+    finally:
+        rai_db.Disconnect()
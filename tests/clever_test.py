@@ -0,0 +1,100 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import os
+import sys
+import threading
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("art")
+from art.estimators.classification import PyTorchClassifier  # noqa: E402
+from art.metrics import clever_t  # noqa: E402
+from RAI.Analysis.AdversarialAnalysis.clever import clever_scores  # noqa: E402
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+torch.manual_seed(0)
+net = torch.nn.Linear(4, 3)
+classifier = PyTorchClassifier(model=net, loss=torch.nn.CrossEntropyLoss(), input_shape=(4,), nb_classes=3)
+x = np.random.default_rng(0).normal(size=(5, 4)).astype(np.float32)
+radius = 5.0
+radii = {1: radius, 2: radius, np.inf: radius}
+dual_norms = {1: np.inf, 2: 2, np.inf: 1}
+
+np.random.seed(0)
+predicted, scores = clever_scores(classifier, x, radii, nb_batches=10, batch_size=5, executor=None)
+
+
+def test_shapes_and_predicted_class():
+    """Tests that every norm has one score per example and class, with NaN for the predicted class."""
+    assert np.array_equal(predicted, classifier.predict(x).argmax(axis=1))
+    for norm in radii:
+        assert scores[norm].shape == (len(x), 3)
+        assert np.all(np.isnan(scores[norm][np.arange(len(x)), predicted]))
+        others = scores[norm][~np.isnan(scores[norm])]
+        assert np.all(others > 0) and np.all(others <= radius)
+
+
+def test_linear_model_scores():
+    """Tests that the scores of a linear model are the logit margin over the dual norm of the weight difference."""
+    weight = net.weight.detach().numpy()
+    logits = x @ weight.T + net.bias.detach().numpy()
+    for norm, dual in dual_norms.items():
+        for i, c in enumerate(predicted):
+            for t in range(3):
+                if t != c:
+                    expected = min((logits[i, c] - logits[i, t]) / np.linalg.norm(weight[c] - weight[t], ord=dual), radius)
+                    assert np.isclose(scores[norm][i, t], expected, rtol=1e-4)
+
+
+def test_matches_art():
+    """Tests that the batched scores match ART's per example clever_t."""
+    for norm in radii:
+        for i, c in enumerate(predicted):
+            for t in range(3):
+                if t != c:
+                    expected = clever_t(classifier, x[i], t, 10, 5, radius, norm, pool_factor=3)
+                    assert np.isclose(scores[norm][i, t], expected, rtol=1e-4)
+
+
+def test_thread_executor():
+    """Tests that fitting on a thread executor gives the same scores as a sequential run and reports every example."""
+    done = []
+    np.random.seed(0)
+    thread_predicted, thread_scores = clever_scores(classifier, x, radii, nb_batches=10, batch_size=5,
+                                                    executor="thread", max_workers=2, on_example=done.append)
+    assert np.array_equal(thread_predicted, predicted)
+    for norm in radii:
+        assert np.allclose(thread_scores[norm], scores[norm], rtol=1e-4, equal_nan=True)
+    assert sorted(done) == list(range(len(x)))
+
+
+def test_gradients_in_caller_thread(monkeypatch):
+    """Tests that the class gradients are computed in the calling thread when the fits run on an executor."""
+    threads = set()
+    class_gradient = classifier.class_gradient
+
+    def record_thread(*args, **kwargs):
+        threads.add(threading.get_ident())
+        return class_gradient(*args, **kwargs)
+
+    monkeypatch.setattr(classifier, "class_gradient", record_thread)
+    clever_scores(classifier, x, radii, nb_batches=10, batch_size=5, gradient_batch_size=8, executor="thread",
+                  max_workers=2)
+    assert threads == {threading.get_ident()}
@@ -0,0 +1,88 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import numpy as np
+import scipy.stats
+from RAI.utils.column_stats import central_sums, merge_central_sums, column_rows, column_kstat, column_kstatvar, \
+    column_iqr, column_mvsdist, column_pearsonr, sums_kstat, sums_kstatvar, sorted_quantile
+
+rng = np.random.default_rng(8)
+small = rng.lognormal(1, 1, (500, 6)) * 100 - 20
+large = rng.lognormal(1, 1, (3000, 6)) * 100 - 20
+y = small[:, 0] * 0.3 + rng.normal(0, 50, len(small))
+
+
+def test_kstat():
+    """Tests that the column k-statistics match scipy.stats.kstat on every feature."""
+    for X in (small, large):
+        rows = column_rows(X)
+        for k in range(1, 5):
+            result = column_kstat(rows, k)
+            for i in range(X.shape[1]):
+                assert result[i] == scipy.stats.kstat(X[:, i], k)
+
+
+def test_kstatvar():
+    """Tests that the column kstatvar matches scipy.stats.kstatvar on every feature."""
+    result = column_kstatvar(column_rows(small))
+    for i in range(small.shape[1]):
+        assert result[i] == scipy.stats.kstatvar(small[:, i])
+
+
+def test_iqr():
+    """Tests that the column interquartile range matches scipy.stats.iqr on every feature."""
+    result = column_iqr(column_rows(small))
+    for i in range(small.shape[1]):
+        assert result[i] == scipy.stats.iqr(small[:, i])
+
+
+def test_mvsdist():
+    """Tests that the column frozen distributions match scipy.stats.mvsdist, with and without the normal approximation."""
+    for X in (small, large):
+        dists = column_mvsdist(column_rows(X))
+        for i in range(X.shape[1]):
+            for dist, expected in zip(dists, scipy.stats.mvsdist(X[:, i])):
+                assert dist.mean()[i] == expected.mean()
+                assert dist.var()[i] == expected.var()
+                assert dist.std()[i] == expected.std()
+                assert dist.interval(0.9)[0][i] == expected.interval(0.9)[0]
+                assert dist.interval(0.9)[1][i] == expected.interval(0.9)[1]
+
+
+def test_pearsonr():
+    """Tests that the column pearson correlations match scipy.stats.pearsonr on every feature."""
+    correlation, pvalue = column_pearsonr(small, y)
+    for i in range(small.shape[1]):
+        expected = scipy.stats.pearsonr(small[:, i], y)
+        assert correlation[i] == expected[0]
+        assert pvalue[i] == expected[1]
+
+
+def test_sorted_quantile():
+    """Tests that quantiles of the sorted columns match np.quantile."""
+    for q in (0.25, 0.5, 0.75):
+        assert (sorted_quantile(np.sort(small, axis=0), q) == np.quantile(small, q, axis=0)).all()
+
+
+def test_merged_sums():
+    """Tests that k-statistics from central sums merged over batches agree with scipy."""
+    sums = None
+    for start in range(0, len(large), 700):
+        sums = merge_central_sums(sums, central_sums(large[start:start + 700]))
+    for k in range(1, 5):
+        assert np.allclose(sums_kstat(sums, k), [scipy.stats.kstat(large[:, i], k) for i in range(large.shape[1])])
+    assert np.allclose(sums_kstatvar(sums), [scipy.stats.kstatvar(large[:, i]) for i in range(large.shape[1])])
@@ -0,0 +1,98 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import Counter
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from RAI.AISystem import AISystem, Model
+from RAI.dataset import Feature, NumpyData, MetaDatabase, Dataset
+from RAI.metrics.compute_memo import ComputeMemo, get_memo
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+rng = np.random.default_rng(0)
+x = rng.normal(size=(500, 3))
+y = (x[:, 0] + 0.3 * rng.normal(size=len(x)) > 0).astype(int)
+clf = LogisticRegression().fit(x, y)
+meta = MetaDatabase([Feature(f"x{i}", "numeric", f"Feature {i}") for i in range(3)])
+output = Feature("y", "numeric", "Label", categorical=True, values={0: "no", 1: "yes"})
+
+
+def test_computed_once_across_threads():
+    """Tests that threads asking for the same key wait for a single computation."""
+    memo = ComputeMemo()
+    calls = []
+
+    def slow_square(value):
+        calls.append(value)
+        time.sleep(0.05)
+        return value ** 2
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(memo.get("square", slow_square, 3))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == [3]
+    assert results == [9] * 8
+
+
+def test_copy_pickle_and_clear():
+    """Tests that copies and pickled memos keep the values, and that values computed later are not shared back."""
+    memo = ComputeMemo()
+    memo.get("a", lambda: 1)
+    copy = memo.copy()
+    copy.get("b", lambda: 2)
+    assert memo.get("b", lambda: 3) == 3
+    restored = pickle.loads(pickle.dumps(memo))
+    assert restored.get("a", lambda: 4) == 1
+    memo.clear()
+    assert memo.get("a", lambda: 5) == 5
+    assert isinstance(get_memo({}), ComputeMemo)
+    assert get_memo({"memo": memo}) is memo
+
+
+def test_intermediates_shared_in_compute(monkeypatch):
+    """Tests that every intermediate is computed once per compute while several groups use it."""
+    requested = Counter()
+    computed = Counter()
+    get = ComputeMemo.get
+
+    def counting_get(self, key, function, *args, **kwargs):
+        requested[key] += 1
+
+        def counted(*a, **k):
+            computed[key] += 1
+            return function(*a, **k)
+        return get(self, key, counted, *args, **kwargs)
+
+    monkeypatch.setattr(ComputeMemo, "get", counting_get)
+    model = Model(agent=clf, output_features=output, name="classifier", predict_fun=clf.predict,
+                  predict_prob_fun=clf.predict_proba, model_class="Logistic Regression")
+    ai = AISystem("Memo_Test", task="binary_classification", meta_database=meta,
+                  dataset=Dataset({"test": NumpyData(x, y)}), model=model, enable_certificates=False)
+    ai.initialize(user_config={})
+    ai.compute({"test": {"predict": clf.predict(x)}})
+    assert computed and all(count == 1 for count in computed.values())
+    assert requested["scalar_mean"] > 1
+    assert requested["confusion"] > 1
@@ -0,0 +1,88 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import os
+import sys
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.ensemble import RandomForestClassifier
+from RAI.AISystem import Model
+from RAI.dataset import Feature, NumpyData, MetaDatabase
+from RAI.metrics.stats.summary_stats import StatMetricGroup
+from tests.ai_system_utils import make_ai_system
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+rng = np.random.default_rng(0)
+xTrain, xTest = rng.normal(size=(600, 4)), rng.normal(size=(300, 4))
+yTrain = (xTrain[:, 0] + 0.5 * rng.normal(size=len(xTrain)) > 0).astype(int)
+yTest = (xTest[:, 0] + 0.5 * rng.normal(size=len(xTest)) > 0).astype(int)
+meta = MetaDatabase([Feature(f"x{i}", "numeric", f"Feature {i}") for i in range(4)])
+output = Feature("y", "numeric", "Label", categorical=True, values={0: "no", 1: "yes"})
+agents = {"logistic": LogisticRegression().fit(xTrain, yTrain),
+          "tree": DecisionTreeClassifier(max_depth=3, random_state=0).fit(xTrain, yTrain),
+          "forest": RandomForestClassifier(n_estimators=5, max_depth=3, random_state=0).fit(xTrain, yTrain)}
+models = {tag: Model(agent=agent, output_features=output, name=tag, predict_fun=agent.predict,
+                     predict_prob_fun=agent.predict_proba, model_class=type(agent).__name__)
+          for tag, agent in agents.items()}
+predictions = {tag: {"test": {"predict": agent.predict(xTest), "predict_proba": agent.predict_proba(xTest)}}
+               for tag, agent in agents.items()}
+data_dict = {"train": NumpyData(xTrain, yTrain), "test": NumpyData(xTest, yTest)}
+# The date changes between computes
+skipped_metrics = {"date"}
+
+
+def assert_close(expected, actual):
+    if isinstance(expected, dict):
+        assert expected.keys() == actual.keys()
+        for key in expected.keys() - skipped_metrics:
+            assert_close(expected[key], actual[key])
+    elif isinstance(expected, (list, tuple)):
+        assert len(expected) == len(actual)
+        for a, b in zip(expected, actual):
+            assert_close(a, b)
+    elif isinstance(expected, (int, float, np.number)) and not isinstance(expected, bool):
+        assert np.isclose(expected, actual, equal_nan=True)
+    else:
+        assert expected == actual
+
+
+def test_models_match_compute():
+    """Tests that every model gets the metric values of computing it on its own, and its own measurement."""
+    ai = make_ai_system("Models_Test", models["logistic"], meta, data_dict)
+    measured = []
+    values = ai.compute_models(predictions, models, on_model=lambda tag: measured.append(
+        (tag, ai.get_metric_values()["test"]["metadata"]["tag"], ai.model.name)))
+    assert measured == [(tag, tag, tag) for tag in agents]
+    assert ai.model is models["logistic"]
+    for tag in agents:
+        single = make_ai_system("Models_Test", models[tag], meta, data_dict)
+        single.compute(predictions[tag], tag=tag)
+        assert_close(single.get_metric_values()["test"], values[tag]["test"])
+
+
+def test_data_groups_computed_once(monkeypatch):
+    """Tests that groups which only depend on the data are computed once for all the models."""
+    calls = []
+    compute = StatMetricGroup.compute
+    monkeypatch.setattr(StatMetricGroup, "compute", lambda self, data_dict: calls.append(1) or compute(self, data_dict))
+    ai = make_ai_system("Models_Test", models["logistic"], meta, data_dict)
+    values = ai.compute_models(predictions, models)
+    assert len(calls) == 1
+    for tag in agents:
+        assert values[tag]["test"]["summary_stats"] == values["logistic"]["test"]["summary_stats"]
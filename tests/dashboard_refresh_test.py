@@ -0,0 +1,112 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import json
+import os
+import sys
+from types import SimpleNamespace
+import pytest
+from RAI.db.service import RaiDB
+from RAIDashboard.db_utils import DBUtils
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _measurement(accuracy):
+    return {"test": {"metadata": {"tag": None}, "performance_cl": {"accuracy": accuracy}}}
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_FOLDER", str(tmp_path))
+    rai_db = RaiDB(SimpleNamespace(name="Refresh_Test"))
+    db_utils = DBUtils()
+    db_utils.db = db_utils._get_db("Refresh_Test")
+    db_utils.measurements_db = db_utils._get_measurements_db("Refresh_Test")
+    yield rai_db, db_utils
+    db_utils.db.close()
+    db_utils.measurements_db.close()
+    rai_db.Disconnect()
+
+
+def test_only_changed_keys_reloaded(project):
+    """Tests that a refresh only reports and decodes the keys written since the previous refresh."""
+    rai_db, db_utils = project
+    rai_db.add_measurement(_measurement(0.5), certificates={"fairness": True})
+    assert sorted(db_utils._update_values()) == ["certificate_values", "metric_values"]
+    assert db_utils._update_values() == []
+    rai_db.add_measurement(_measurement(0.75))
+    assert db_utils._update_values() == ["metric_values"]
+    assert [item["test"]["performance_cl"]["accuracy"] for item in db_utils._current_project["metric_values"]] == [0.5, 0.75]
+    rai_db.add_measurement(_measurement(0.8), certificates={"fairness": False})
+    assert sorted(db_utils._update_values()) == ["certificate_values", "metric_values"]
+    assert db_utils._current_project["certificate_values"] == {"fairness": False}
+
+
+def test_reset_reloads_history(project):
+    """Tests that measurements removed by a reset are dropped from the dashboard's history."""
+    rai_db, db_utils = project
+    rai_db.add_measurement(_measurement(0.5), certificates={})
+    db_utils._update_values()
+    rai_db.reset_data(export_metadata=False)
+    rai_db.add_measurement(_measurement(0.9))
+    assert "metric_values" in db_utils._update_values()
+    assert [item["test"]["performance_cl"]["accuracy"] for item in db_utils._current_project["metric_values"]] == [0.9]
+
+
+def test_keys_without_revisions(project):
+    """Tests that projects written without revision tokens are compared by their raw value."""
+    _, db_utils = project
+    db_utils.db["project_info"] = json.dumps({"name": "first"})
+    assert db_utils._load_changed(("project_info",), {}) == ["project_info"]
+    assert db_utils._load_changed(("project_info",), {}) == []
+    db_utils.db["project_info"] = json.dumps({"name": "second"})
+    assert db_utils._load_changed(("project_info",), {}) == ["project_info"]
+    assert db_utils._current_project["project_info"] == {"name": "second"}
+
+
+def test_channels_notified_by_key(project):
+    """Tests that only the channels displaying a changed key are marked as updated."""
+    _, db_utils = project
+    for channel in ("metric_detail", "metric_graph", "certificate"):
+        db_utils.reset_channel(channel)
+    db_utils._notify(["certificate_values"])
+    assert db_utils.has_update("certificate")
+    assert not db_utils.has_update("metric_graph") and not db_utils.has_update("metric_detail")
+    db_utils._notify(["metric_values"])
+    assert db_utils.has_update("metric_graph") and db_utils.has_update("metric_detail")
+    assert not db_utils.has_update("certificate")
+
+
+def test_traces_pruned(project, monkeypatch):
+    """Tests that the graph drops the series of deselected metrics and of the project it switched away from."""
+    _, db_utils = project
+    from RAIDashboard import metric_page_graph
+    monkeypatch.setattr(metric_page_graph, "dbUtils", db_utils)
+    monkeypatch.setattr(metric_page_graph, "_traces", {})
+    db_utils.add_project_listener(metric_page_graph._clear_project_traces)
+    db_utils._current_project_name = "Refresh_Test"
+    db_utils.set_current_dataset("test")
+    for key in [("Refresh_Test", "test", "performance_cl", "accuracy"), ("Refresh_Test", "test", "performance_cl", "f1"),
+                ("Refresh_Test", "train", "performance_cl", "accuracy"), ("Other", "test", "performance_cl", "accuracy")]:
+        metric_page_graph._traces[key] = None
+    metric_page_graph.prune_traces(["performance_cl,accuracy"])
+    assert list(metric_page_graph._traces) == [("Refresh_Test", "test", "performance_cl", "accuracy")]
+    db_utils.set_current_project("Other")
+    assert metric_page_graph._traces == {}
+    db_utils.config_db.close()
+    db_utils.analysis_jobs.close()
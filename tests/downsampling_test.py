@@ -0,0 +1,66 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import os
+import sys
+import numpy as np
+from RAIDashboard.display_types.downsampling import downsample, lttb, min_max
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+rng = np.random.default_rng(0)
+x = np.arange(10000, dtype=np.float64)
+y = np.sin(x / 300) + rng.normal(scale=0.05, size=len(x))
+y[4321] = 25.0
+
+
+def test_small_series_kept():
+    """Tests that series with fewer points than the budget are drawn whole."""
+    assert np.array_equal(downsample(x[:50], y[:50], max_points=100), np.arange(50))
+    assert np.array_equal(downsample(x, y), np.arange(len(x)))
+
+
+def test_point_budget():
+    """Tests that both methods keep at most max_points sorted points, including the first and last ones."""
+    for method in ["lttb", "minmax"]:
+        indices = downsample(x, y, max_points=500, method=method)
+        assert len(indices) <= 500
+        assert indices[0] == 0 and indices[-1] == len(x) - 1
+        assert np.all(np.diff(indices) > 0)
+
+
+def test_spikes_kept():
+    """Tests that a single spike survives downsampling."""
+    assert 4321 in lttb(x, y, 200)
+    assert 4321 in min_max(y, 200)
+
+
+def test_missing_values_dropped():
+    """Tests that points without a value are not drawn once a series is downsampled."""
+    values = list(y)
+    values[10:20] = [None] * 10
+    indices = downsample(x, values, max_points=300)
+    assert not any(10 <= i < 20 for i in indices)
+
+
+def test_x_range():
+    """Tests that a zoomed range is drawn with the whole point budget, plus one point on each side."""
+    indices = downsample(x, y, max_points=1000, x_range=(2000, 2500))
+    assert np.array_equal(indices, np.arange(1999, 2502))
+    indices = downsample(x, y, max_points=100, x_range=(2000, 6000))
+    assert len(indices) <= 100
+    assert indices[0] == 1999 and indices[-1] == 6001
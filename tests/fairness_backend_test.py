@@ -0,0 +1,78 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import os
+import sys
+import pytest
+from RAI.dataset import NumpyData, Dataset
+from RAI.AISystem import AISystem, Model
+from RAI.utils import df_to_RAI
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.ensemble import RandomForestClassifier
+
+pytest.importorskip("aif360")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+np.random.seed(21)
+
+data_path = "../data/adult/"
+train_data = pd.read_csv(data_path + "train.csv", header=0,
+                         skipinitialspace=True, na_values="?")
+test_data = pd.read_csv(data_path + "test.csv", header=0,
+                        skipinitialspace=True, na_values="?")
+
+all_data = pd.concat([train_data, test_data], ignore_index=True)
+idx = all_data['race'] != 'White'
+all_data['race'][idx] = 'Black'
+
+meta, X, y, output = df_to_RAI(all_data, target_column="income-per-year", normalize="Scalar", max_categorical_threshold=5)
+xTrain, xTest, yTrain, yTest = train_test_split(X, y, random_state=1, stratify=y)
+
+clf = RandomForestClassifier(n_estimators=10, criterion='entropy', random_state=0, min_samples_leaf=5, max_depth=2)
+clf.fit(xTrain, yTrain)
+predictions = clf.predict(xTest)
+groups = ["group_fairness", "dataset_fairness", "prediction_fairness", "individual_fairness"]
+
+
+def compute(backend):
+    model = Model(agent=clf, output_features=output, name="test_classifier", predict_fun=clf.predict,
+                  predict_prob_fun=clf.predict_proba, model_class="Random Forest Classifier")
+    dataset = Dataset({"train": NumpyData(xTrain, yTrain), "test": NumpyData(xTest, yTest)})
+    ai = AISystem("AdultDB_" + backend, task='binary_classification', meta_database=meta, dataset=dataset, model=model,
+                  enable_certificates=False)
+    ai.initialize(user_config={"fairness": {"priv_group": {"race": {"privileged": 1, "unprivileged": 0}},
+                                            "protected_attributes": ["race"], "positive_label": 1,
+                                            "backend": backend},
+                               "time_complexity": "polynomial"})
+    ai.compute({"test": {"predict": predictions}}, tag="Random Forest")
+    return ai.get_metric_values()["test"]
+
+
+native = compute("native")
+reference = compute("aif360")
+
+
+def test_backends_agree():
+    """Tests that the native fairness counts give the metric values of the AIF360 backend."""
+    for group in groups:
+        assert native[group].keys() == reference[group].keys()
+        for name, value in reference[group].items():
+            if value is None:
+                assert native[group][name] is None, (group, name)
+            else:
+                assert np.allclose(native[group][name], value, equal_nan=True), (group, name)
@@ -0,0 +1,52 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import numpy as np
+from RAI.metrics.fairness_helper.fairness_helper import FairnessCounts
+
+rng = np.random.default_rng(9)
+protected = rng.integers(0, 3, (4000, 2))
+y = rng.integers(0, 2, 4000)
+preds = np.where(rng.random(4000) < 0.8, y, 1 - y)
+priv = [{"race": 1}]
+unpriv = [{"race": 0}]
+
+
+def _counts(rows):
+    return FairnessCounts(protected[rows], ["race", "sex"], y[rows], preds[rows], features=protected[rows],
+                          privileged_groups=priv, unprivileged_groups=unpriv)
+
+
+def test_row_entropy_indices():
+    """Tests that the entropy indices of rows follow the AIF360 definitions on per row benefits."""
+    counts = _counts(slice(None))
+    b = (1 + preds - y).astype(np.float64)
+    assert counts.generalized_entropy_index() == np.mean((b / np.mean(b)) ** 2 - 1) / 2
+    assert counts.theil_index() == np.mean(np.log((b / np.mean(b)) ** b) / np.mean(b))
+
+
+def test_merged_counts():
+    """Tests that counts merged from batches give the metrics of the counts of all rows."""
+    whole = _counts(slice(None))
+    merged = _counts(slice(0, 1500)).merge(_counts(slice(1500, None)))
+    for name in ("num_instances", "base_rate", "true_positive_rate", "false_positive_rate", "disparate_impact",
+                 "statistical_parity_difference", "average_odds_difference"):
+        assert np.isclose(getattr(merged, name)(), getattr(whole, name)())
+    for name in ("generalized_entropy_index", "theil_index", "between_group_generalized_entropy_index",
+                 "between_group_theil_index", "between_all_groups_generalized_entropy_index",
+                 "between_all_groups_theil_index", "smoothed_empirical_differential_fairness"):
+        assert np.isclose(getattr(merged, name)(), getattr(whole, name)())
@@ -0,0 +1,111 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from RAI.AISystem import AISystem, Model
+from RAI.dataset import Feature, NumpyData, MemmapData, MetaDatabase, Dataset
+from RAI.utils import arrow_to_RAI
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+rng = np.random.default_rng(0)
+n = 2500
+frame = pd.DataFrame({"a": rng.normal(size=n), "b": rng.exponential(size=n) + 1, "c": rng.uniform(1, 5, size=n),
+                      "color": rng.choice(["red", "green", "blue"], size=n)})
+frame["label"] = np.where(frame["a"] + 0.5 * rng.normal(size=n) > 0, "yes", "no")
+colors = {0: "blue", 1: "green", 2: "red"}
+x = np.column_stack([frame[["a", "b", "c"]].to_numpy(), pd.Categorical(frame["color"], categories=colors.values()).codes])
+y = (frame["label"] == "yes").to_numpy().astype(int)
+clf = LogisticRegression().fit(x, y)
+predictions = clf.predict(x)
+meta = MetaDatabase([Feature("a", "numeric", "a"), Feature("b", "numeric", "b"), Feature("c", "numeric", "c"),
+                     Feature("color", "numeric", "color", categorical=True, values=colors)])
+output = Feature("label", "numeric", "label", categorical=True, values={0: "no", 1: "yes"})
+groups = ["metadata", "performance_cl", "summary_stats", "stat_moment_group"]
+# The mode is not computed from batches, the quantiles come from a sketch
+batch_metrics = {"date", "mode", "median", "quantile_1", "quantile_3", "iqr"}
+
+
+def compute(test_data, meta_database=meta, output_feature=output):
+    model = Model(agent=clf, output_features=output_feature, name="classifier", predict_fun=clf.predict,
+                  predict_prob_fun=clf.predict_proba, model_class="Logistic Regression")
+    ai = AISystem("File_Data_Test", task="binary_classification", meta_database=meta_database,
+                  dataset=Dataset({"test": test_data}), model=model, enable_certificates=False)
+    ai.initialize(user_config={})
+    ai.compute({"test": {"predict": predictions}})
+    return ai.get_metric_values()["test"]
+
+
+def assert_close(expected, actual):
+    if isinstance(expected, dict):
+        assert expected.keys() == actual.keys()
+        for key in expected.keys() - batch_metrics:
+            assert_close(expected[key], actual[key])
+    elif isinstance(expected, (list, tuple)):
+        assert len(expected) == len(actual)
+        for a, b in zip(expected, actual):
+            assert_close(a, b)
+    elif isinstance(expected, (int, float, np.number)) and not isinstance(expected, bool):
+        assert np.isclose(expected, actual, equal_nan=True)
+    else:
+        assert expected == actual
+
+
+def assert_same_values(expected, actual):
+    for group in groups:
+        assert_close(expected[group], actual[group])
+
+
+expected = compute(NumpyData(x, y))
+
+
+def test_memmap_files(tmp_path):
+    """Tests that .npy files read batch by batch give the values of the in memory arrays."""
+    np.save(tmp_path / "x.npy", x)
+    np.save(tmp_path / "y.npy", y)
+    data = MemmapData(str(tmp_path / "x.npy"), str(tmp_path / "y.npy"), batch_size=400)
+    assert isinstance(data.source_X, np.memmap)
+    assert len(data) == n
+    actual = compute(data)
+    assert actual["metadata"]["sample_count"] == n
+    assert_same_values(expected, actual)
+
+
+@pytest.mark.parametrize("file_name", ["data.parquet", "data.feather"])
+def test_arrow_files(tmp_path, file_name):
+    """Tests that arrow_to_RAI encodes the columns of Parquet and Feather files like the in memory arrays."""
+    pytest.importorskip("pyarrow")
+    path = str(tmp_path / file_name)
+    if file_name.endswith(".parquet"):
+        frame.to_parquet(path, row_group_size=600)
+    else:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+        feather.write_feather(pa.Table.from_pandas(frame, preserve_index=False), path, chunksize=700)
+    arrow_meta, data, arrow_output = arrow_to_RAI(path, target_column="label")
+    assert [f.name for f in arrow_meta.features] == ["a", "b", "c", "color"]
+    assert arrow_meta.features[3].values == colors
+    assert arrow_output[0].values == {0: "no", 1: "yes"}
+    actual = compute(data, arrow_meta, arrow_output[0])
+    assert actual["metadata"]["sample_count"] == n
+    assert actual["performance_cl"]["accuracy"] == expected["performance_cl"]["accuracy"]
+    assert_same_values(expected, actual)
@@ -0,0 +1,75 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import os
+import sys
+from types import SimpleNamespace
+import numpy as np
+from RAI.metrics.stats.image_stats import ImageStatsGroup
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# images are of shape [examples, image columns, c, w, h]
+rng = np.random.default_rng(0)
+images = (rng.random((1000, 1, 3, 16, 16)) * np.array([1.0, 2.0, 0.5])[None, None, :, None, None]).astype(np.float32)
+expected_mean = images.astype(np.float64).mean(axis=(0, 1, 3, 4))
+expected_std = images.astype(np.float64).std(axis=(0, 1, 3, 4))
+
+
+def _values(group):
+    return (np.array(list(group.metrics["mean"].value.values())), np.array(list(group.metrics["std"].value.values())))
+
+
+def _streamed(batch_size):
+    group = ImageStatsGroup(None)
+    for start in range(0, len(images), batch_size):
+        group.compute_batch({"data": SimpleNamespace(image=images[start:start + batch_size])})
+    group.finalize_batch_compute()
+    return group
+
+
+def test_compute():
+    """Tests that compute reports the mean and population standard deviation of each channel."""
+    group = ImageStatsGroup(None)
+    group.compute({"data": SimpleNamespace(image=images)})
+    mean, std = _values(group)
+    assert list(group.metrics["mean"].value) == ["red", "green", "blue"]
+    assert np.allclose(mean, expected_mean, rtol=1e-5)
+    assert np.allclose(std, expected_std, rtol=1e-5)
+
+
+def test_batches_match_reference():
+    """Tests that the streamed values do not depend on the number of batches and match a float64 reduction."""
+    for batch_size in (1, 128, 1000):
+        mean, std = _values(_streamed(batch_size))
+        assert np.allclose(mean, expected_mean, rtol=1e-12)
+        assert np.allclose(std, expected_std, rtol=1e-9)
+
+
+def test_merge():
+    """Tests that merging the states of two halves gives the values of all the images."""
+    first, second = ImageStatsGroup(None), ImageStatsGroup(None)
+    first.compute_batch({"data": SimpleNamespace(image=images[:300])})
+    second.compute_batch({"data": SimpleNamespace(image=images[300:])})
+    merged = ImageStatsGroup(None)
+    merged.merge(first.partial_state())
+    merged.merge(second.partial_state())
+    merged.finalize_batch_compute()
+    mean, std = _values(merged)
+    assert np.allclose(mean, expected_mean, rtol=1e-12)
+    assert np.allclose(std, expected_std, rtol=1e-9)
+    assert first.partial_state()["pixel_count"] == 300 * 16 * 16
@@ -0,0 +1,139 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import json
+import math
+import os
+import pickle
+import sys
+from RAI.dataset import NumpyData, Dataset
+from RAI.AISystem import AISystem, Model
+from RAI.utils import df_to_RAI
+from RAI.utils.utils import jsonify, jsonify_metric, is_primitive
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+use_dashboard = False
+np.random.seed(21)
+
+
+# jsonify before arrays were converted at once, converting every element separately
+def reference_jsonify(v):
+    if type(v) is np.ma.MaskedArray:
+        return np.ma.getdata(v).tolist()
+    if type(v) is np.ndarray:
+        return reference_clean_list(v.tolist())
+    if type(v) is list:
+        return reference_clean_list(v)
+    if v.__class__.__name__ == "bool_":
+        return bool(v)
+    if (isinstance(v, int) or isinstance(v, float)) and (math.isinf(v) or math.isnan(v)):
+        return None
+    if is_primitive(v):
+        return v
+    return pickle.dumps(v).decode('ISO-8859-1')
+
+
+def reference_clean_list(v):
+    for i in range(len(v)):
+        v[i] = reference_jsonify(v[i])
+    return v
+
+
+rng = np.random.default_rng(0)
+values = [
+    rng.normal(size=(30, 4)),
+    np.array([[1.0, np.nan], [np.inf, -np.inf]]),
+    rng.integers(0, 10, size=(5, 5)),
+    np.array([True, False]),
+    np.array([1.5, None, "a"], dtype=object),
+    [1.0, float("nan"), 2, [np.float64(3.0), np.inf]],
+    np.ma.MaskedArray([1.0, 2.0], mask=[True, False]),
+    np.float64(0.5),
+    np.float32(0.25),
+    np.int64(7),
+    np.bool_(True),
+    float("inf"),
+    3,
+    "text",
+    None,
+]
+
+
+def test_jsonify_matches_reference():
+    """Tests that jsonify returns the values of the element by element conversion, as Python types."""
+    for value in values:
+        expected = reference_jsonify(value.copy() if hasattr(value, "copy") else value)
+        result = jsonify(value.copy() if hasattr(value, "copy") else value)
+        assert json.dumps(result, allow_nan=False) == json.dumps(expected, allow_nan=False, default=lambda x: x.item())
+
+
+def test_jsonify_numpy_scalars():
+    """Tests that NumPy scalars become Python values, with None for non finite floats."""
+    assert jsonify(np.float32(np.nan)) is None
+    assert type(jsonify(np.float32(0.25))) is float
+    assert type(jsonify(np.int64(7))) is int
+
+
+def test_jsonify_metric_types():
+    """Tests that jsonify_metric converts values using their declared metric type."""
+    assert jsonify_metric(np.float64(np.nan), "numeric") is None
+    assert type(jsonify_metric(np.float32(0.5), "numeric")) is float
+    assert jsonify_metric(np.bool_(False), "Boolean") is False
+    assert jsonify_metric(np.array([[1.0, np.inf]]), "Matrix") == [[1.0, None]]
+    nested = {np.int64(1): {"a": np.float64(np.nan), "b": (np.float32(1.0), 2)}, "c": [np.inf, 1]}
+    assert jsonify_metric(nested, "Dict") == {1: {"a": None, "b": [1.0, 2]}, "c": [None, 1]}
+    assert jsonify_metric(np.array([1.0, np.nan]), "numeric") == [1.0, None]
+
+
+data_path = "../data/adult/"
+train_data = pd.read_csv(data_path + "train.csv", header=0,
+                         skipinitialspace=True, na_values="?")
+idx = train_data['race'] != 'White'
+train_data['race'][idx] = 'Black'
+meta, X, y, output = df_to_RAI(train_data, target_column="income-per-year", normalize="Scalar", max_categorical_threshold=5)
+xTrain, xTest, yTrain, yTest = train_test_split(X, y, random_state=1, stratify=y)
+clf = RandomForestClassifier(n_estimators=10, criterion='entropy', random_state=0, min_samples_leaf=5, max_depth=2)
+clf.fit(xTrain, yTrain)
+predictions = clf.predict(xTest)
+
+
+def compute(schema_export):
+    model = Model(agent=clf, output_features=output, name="test_classifier", predict_fun=clf.predict,
+                  predict_prob_fun=clf.predict_proba, model_class="Random Forest Classifier")
+    dataset = Dataset({"train": NumpyData(xTrain, yTrain), "test": NumpyData(xTest, yTest)})
+    ai = AISystem("AdultDB_Export", task='binary_classification', meta_database=meta, dataset=dataset, model=model,
+                  enable_certificates=False)
+    ai.initialize(user_config={"fairness": {"priv_group": {"race": {"privileged": 1, "unprivileged": 0}},
+                                            "protected_attributes": ["race"], "positive_label": 1},
+                               "time_complexity": "polynomial", "schema_export": schema_export})
+    ai.compute({"test": {"predict": predictions}}, tag="Random Forest")
+    return ai.get_metric_values()["test"], ai.get_metric_info()
+
+
+def test_schema_export():
+    """Tests that the schema driven export is valid JSON and keeps the numeric values of the default export."""
+    exported, info = compute(True)
+    default, _ = compute(False)
+    json.dumps(exported, allow_nan=False)
+    for group in exported:
+        for metric, value in exported[group].items():
+            if info[group][metric]["type"] in ("numeric", "Matrix", "Vector") and metric != "date":
+                assert json.dumps(value) == json.dumps(default[group][metric])
@@ -0,0 +1,91 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import json
+import os
+import subprocess
+import sys
+from RAI.metrics.metric_registry import registry, LazyMetricGroup
+from RAI.metrics.stats import FrequencyStatMetricGroup
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs a tabular binary classification in a fresh interpreter, other tests import torch and the metric modules
+script = """
+import json
+import sys
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from RAI.AISystem import AISystem, Model
+from RAI.dataset import Feature, NumpyData, MetaDatabase, Dataset
+from RAI.metrics.metric_registry import registry, LazyMetricGroup
+
+# A group whose module, like one with a missing optional dependency, cannot be imported
+with open("RAI/metrics/stats/summary_stats.json") as f:
+    config = json.load(f)
+config["name"] = "missing_dependency_group"
+registry[config["name"]] = LazyMetricGroup(config, "RAI.metrics.stats.missing_dependency_module")
+
+rng = np.random.default_rng(0)
+x = rng.normal(size=(200, 3))
+y = (x[:, 0] > 0).astype(int)
+clf = LogisticRegression().fit(x, y)
+meta = MetaDatabase([Feature(f"x{i}", "numeric", f"Feature {i}") for i in range(3)])
+output = Feature("y", "numeric", "Label", categorical=True, values={0: "no", 1: "yes"})
+model = Model(agent=clf, output_features=output, name="classifier", predict_fun=clf.predict,
+              predict_prob_fun=clf.predict_proba, model_class="Logistic Regression")
+ai = AISystem("Lazy_Test", task="binary_classification", meta_database=meta,
+              dataset=Dataset({"test": NumpyData(x, y)}), model=model, enable_certificates=False)
+ai.initialize(user_config=json.loads(sys.argv[1]))
+ai.compute({"test": {"predict": clf.predict(x)}})
+print(json.dumps({"modules": [m for m in ("torch", "torchvision", "aif360", "art", "torchmetrics", "dash") if m in sys.modules],
+                  "lazy": [name for name, entry in registry.items() if isinstance(entry, LazyMetricGroup)],
+                  "groups": list(ai.get_metric_values()["test"])}))
+"""
+
+
+def run(user_config):
+    env = dict(os.environ, PYTHONPATH=root)
+    result = subprocess.run([sys.executable, "-c", script, json.dumps(user_config)], cwd=root, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_tabular_run_imports_no_heavy_backend():
+    """Tests that a tabular run imports none of the deep learning, fairness or dashboard packages,
+    and skips groups whose module cannot be imported."""
+    result = run({})
+    assert result["modules"] == []
+    assert "missing_dependency_group" not in result["groups"]
+    assert "performance_cl" in result["groups"] and "summary_stats" in result["groups"]
+    for name in ("image_stats", "image_generation", "text_generation", "performance_reg"):
+        assert name in result["lazy"]
+
+
+def test_blacklisted_groups_not_imported():
+    """Tests that blacklisted groups are skipped before their module is imported."""
+    result = run({"blacklist": ["summary_stats", "adversarial_robustness"]})
+    assert "summary_stats" in result["lazy"] and "adversarial_robustness" in result["lazy"]
+    assert "summary_stats" not in result["groups"] and "adversarial_robustness" not in result["groups"]
+    assert "performance_cl" in result["groups"]
+
+
+def test_package_attribute_imports_class():
+    """Tests that the class names of a metric package import the class registered under the group name."""
+    assert registry["frequency_stats"] is FrequencyStatMetricGroup
+
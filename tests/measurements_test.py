@@ -0,0 +1,89 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import json
+import os
+import sys
+from types import SimpleNamespace
+import pytest
+from sqlitedict import SqliteDict
+from RAI.db.service import RaiDB
+from RAIDashboard.db_utils import DBUtils
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _measurement(tag, accuracy):
+    return {"test": {"metadata": {"tag": tag}, "performance_cl": {"accuracy": accuracy}}}
+
+
+@pytest.fixture
+def folder(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_FOLDER", str(tmp_path))
+    return tmp_path
+
+
+def test_measurements_rows(folder):
+    """Tests that every measurement is its own row and can be read back by sequence number and tag."""
+    rai_db = RaiDB(SimpleNamespace(name="Measurements_Test"))
+    try:
+        for i in range(5):
+            rai_db.add_measurement(_measurement("even" if i % 2 == 0 else "odd", i / 10), certificates={})
+        rows = rai_db.get_measurements()
+        assert [seq for seq, _, _ in rows] == [1, 2, 3, 4, 5]
+        assert [value["test"]["performance_cl"]["accuracy"] for _, _, value in rows] == [0.0, 0.1, 0.2, 0.3, 0.4]
+        assert [seq for seq, _, _ in rai_db.get_measurements(since=3)] == [4, 5]
+        assert [seq for seq, _, _ in rai_db.get_measurements(tag="odd")] == [2, 4]
+        columns = {name: column_type for _, name, column_type, *_ in
+                   rai_db.measurements_db.execute("PRAGMA table_info(measurements)")}
+        assert columns["value"] == "BLOB"
+        rai_db.reset_data(export_metadata=False)
+        assert rai_db.get_measurements() == []
+    finally:
+        rai_db.Disconnect()
+
+
+def test_legacy_metric_values_migrated(folder):
+    """Tests that the 'metric_values' list of older projects is moved into the measurements table."""
+    legacy = SqliteDict(f"{folder}/Legacy_Test.sqlite", encode=json.dumps, decode=json.loads, autocommit=True)
+    legacy["metric_values"] = json.dumps([_measurement("a", 0.5), _measurement("b", 0.75)])
+    legacy.close()
+    rai_db = RaiDB(SimpleNamespace(name="Legacy_Test"))
+    try:
+        assert [(seq, tag) for seq, tag, _ in rai_db.get_measurements()] == [(1, "a"), (2, "b")]
+        assert rai_db.get_measurements()[1][2] == _measurement("b", 0.75)
+        assert "metric_values" not in rai_db.db
+    finally:
+        rai_db.Disconnect()
+
+
+def test_dashboard_reads_new_rows(folder):
+    """Tests that the dashboard only reads the measurements stored after the last one it read."""
+    rai_db = RaiDB(SimpleNamespace(name="Dashboard_Test"))
+    db_utils = DBUtils()
+    try:
+        db_utils.db = db_utils._get_db("Dashboard_Test")
+        db_utils.measurements_db = db_utils._get_measurements_db("Dashboard_Test")
+        rai_db.add_measurement(_measurement("a", 0.5), certificates={})
+        first = db_utils.read_measurements_since(0)
+        assert [(seq, value["test"]["performance_cl"]["accuracy"]) for seq, value in first] == [(1, 0.5)]
+        rai_db.add_measurement(_measurement("b", 0.75), certificates={})
+        assert [seq for seq, _ in db_utils.read_measurements_since(first[-1][0])] == [2]
+    finally:
+        db_utils.db.close()
+        db_utils.measurements_db.close()
+        rai_db.Disconnect()
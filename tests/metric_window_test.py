@@ -0,0 +1,123 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import os
+import sys
+from RAI.dataset import NumpyData
+from RAI.AISystem import Model
+from RAI.utils import df_to_RAI
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.ensemble import RandomForestClassifier
+from tests.ai_system_utils import make_ai_system
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+use_dashboard = False
+np.random.seed(21)
+
+data_path = "../data/adult/"
+train_data = pd.read_csv(data_path + "train.csv", header=0,
+                         skipinitialspace=True, na_values="?")
+idx = train_data['race'] != 'White'
+train_data['race'][idx] = 'Black'
+
+meta, X, y, output = df_to_RAI(train_data, target_column="income-per-year", normalize="Scalar", max_categorical_threshold=5)
+xTrain, xTest, yTrain, yTest = train_test_split(X, y, random_state=1, stratify=y)
+
+clf = RandomForestClassifier(n_estimators=10, criterion='entropy', random_state=0, min_samples_leaf=5, max_depth=2)
+clf.fit(xTrain, yTrain)
+predictions = clf.predict(xTest)
+model = Model(agent=clf, output_features=output, name="test_classifier", predict_fun=clf.predict,
+              predict_prob_fun=clf.predict_proba, model_class="Random Forest Classifier")
+train = NumpyData(xTrain, yTrain)
+
+configuration = {"fairness": {"priv_group": {"race": {"privileged": 1, "unprivileged": 0}},
+                              "protected_attributes": ["race"], "positive_label": 1},
+                 "time_complexity": "polynomial"}
+groups = ["performance_cl", "group_fairness", "stat_moment_group"]
+
+# One batch every 5 seconds, in sliding windows of 20 seconds starting every 10 seconds
+batches = np.array_split(np.arange(len(xTest)), 12)
+timestamps = [5 * i + 1 for i in range(len(batches))]
+size, step = 20, 10
+
+
+ai = make_ai_system("AdultDB_Window", model, meta, {"train": train, "test": NumpyData(xTest, yTest)},
+                    user_config=configuration)
+emitted = []
+window = ai.add_window(size, step, on_window=emitted.append)
+pane_counts = []
+for rows, timestamp in zip(batches, timestamps):
+    ai.update(xTest[rows], yTest[rows], {"predict": predictions[rows]}, timestamp=timestamp)
+    pane_counts.append(len(window._panes))
+window.flush()
+windows = [values["window_20s"] for values in emitted]
+window_starts = list(range(-step, timestamps[-1], step))
+
+
+# Metric values of compute on the rows of the batches in [start, start + size)
+def compute_window(start):
+    rows = np.concatenate([batch for batch, timestamp in zip(batches, timestamps) if start <= timestamp < start + size])
+    window_ai = make_ai_system("AdultDB_Window_Compute", model, meta,
+                               {"train": train, "test": NumpyData(xTest[rows], yTest[rows])}, user_config=configuration)
+    window_ai.compute({"test": {"predict": predictions[rows]}}, tag="Random Forest")
+    return len(rows), window_ai.get_metric_values()["test"]
+
+
+def assert_close(expected, actual):
+    if isinstance(expected, dict):
+        assert expected.keys() == actual.keys()
+        for key in expected:
+            assert_close(expected[key], actual[key])
+    elif expected is None:
+        assert actual is None
+    elif isinstance(expected, (int, float, np.number)) and not isinstance(expected, bool):
+        assert np.isclose(expected, actual, equal_nan=True)
+
+
+def test_window_count():
+    """Tests that every sliding window containing a batch is emitted once."""
+    assert len(windows) == len(window_starts)
+
+
+def test_one_pane_per_step():
+    """Tests that the window keeps one pane per step rather than one state per open window and batch."""
+    assert max(pane_counts) <= size // step
+
+
+def test_windows_match_compute():
+    """Tests that the values of each window are those of compute on the rows of its batches."""
+    for start, values in zip(window_starts, windows):
+        sample_count, expected = compute_window(start)
+        assert values["metadata"]["sample_count"] == sample_count
+        for group in groups:
+            assert_close(expected[group], values[group])
+
+
+def test_tumbling_windows():
+    """Tests that tumbling windows split the batches without overlap."""
+    tumbling_ai = make_ai_system("AdultDB_Tumbling", model, meta, {"train": train, "test": NumpyData(xTest, yTest)},
+                                 user_config=configuration)
+    values = []
+    tumbling = tumbling_ai.add_window(size, on_window=values.append)
+    for rows, timestamp in zip(batches, timestamps):
+        tumbling_ai.update(xTest[rows], yTest[rows], {"predict": predictions[rows]}, timestamp=timestamp)
+    tumbling.flush()
+    counts = [window["window_20s"]["metadata"]["sample_count"] for window in values]
+    assert counts == [sum(len(batch) for batch, timestamp in zip(batches, timestamps) if start <= timestamp < start + size)
+                      for start in range(0, timestamps[-1], size)]
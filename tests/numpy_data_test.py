@@ -0,0 +1,91 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import os
+import sys
+from RAI.dataset import NumpyData, Dataset
+from RAI.AISystem import AISystem, Model
+from RAI.utils import df_to_RAI
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+use_dashboard = False
+np.random.seed(21)
+
+data_path = "../data/adult/"
+train_data = pd.read_csv(data_path + "train.csv", header=0,
+                         skipinitialspace=True, na_values="?")
+
+meta, X, y, output = df_to_RAI(train_data, target_column="income-per-year", normalize="Scalar",
+                               max_categorical_threshold=5, group_columns=True)
+xTrain, xTest, yTrain, yTest = train_test_split(X, y, random_state=1, stratify=y)
+
+clf = RandomForestClassifier(n_estimators=10, criterion='entropy', random_state=0, min_samples_leaf=5, max_depth=2)
+clf.fit(xTrain, yTrain)
+predictions = clf.predict(xTest)
+groups = ["summary_stats", "stat_moment_group", "correlation_stats_binary", "frequency_stats"]
+
+
+# Computes the statistics of xTest stored in the given memory order. With copy, each feature type is copied
+# out of X as NumpyData did before using views.
+def compute_stats(order, copy):
+    model = Model(agent=clf, output_features=output, name="test_classifier", predict_fun=clf.predict,
+                  predict_prob_fun=clf.predict_proba, model_class="Random Forest Classifier")
+    test = NumpyData(np.array(xTest, order=order), yTest)
+    dataset = Dataset({"train": NumpyData(xTrain, yTrain), "test": test})
+    ai = AISystem("AdultDB_Views", task='binary_classification', meta_database=meta, dataset=dataset, model=model,
+                  enable_certificates=False)
+    ai.initialize(user_config={"time_complexity": "polynomial"})
+    if copy:
+        masks = ai._get_masks()
+        test.scalar = np.array(test.X[:, masks["scalar"]]).astype(np.float64)
+        test.categorical = test.X[:, masks["categorical"]]
+    ai.compute({"test": {"predict": predictions}}, tag="Random Forest")
+    return test, ai.get_metric_values()["test"]
+
+
+def assert_equal(expected, actual):
+    if isinstance(expected, dict):
+        assert expected.keys() == actual.keys()
+        for key in expected:
+            assert_equal(expected[key], actual[key])
+    elif isinstance(expected, (list, tuple)):
+        assert len(expected) == len(actual)
+        for a, b in zip(expected, actual):
+            assert_equal(a, b)
+    else:
+        assert expected == actual or (expected != expected and actual != actual)
+
+
+def test_feature_types_are_views():
+    """Tests that the feature types of grouped columns of a Fortran ordered X are views of X."""
+    assert X.flags.f_contiguous
+    test, _ = compute_stats("F", copy=False)
+    assert np.shares_memory(test.scalar, test.X)
+    assert np.shares_memory(test.categorical, test.X)
+
+
+def test_views_keep_values():
+    """Tests that statistics computed on views of X are identical to those computed on copies of each feature type."""
+    for order in ["C", "F"]:
+        _, view_metrics = compute_stats(order, copy=False)
+        _, copy_metrics = compute_stats(order, copy=True)
+        for group in groups:
+            assert_equal(copy_metrics[group], view_metrics[group])
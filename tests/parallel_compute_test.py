@@ -0,0 +1,89 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import os
+import sys
+from RAI.dataset import NumpyData, Dataset
+from RAI.AISystem import AISystem, Model
+from RAI.utils import df_to_RAI
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+use_dashboard = False
+np.random.seed(21)
+
+data_path = "../data/adult/"
+train_data = pd.read_csv(data_path + "train.csv", header=0,
+                         skipinitialspace=True, na_values="?")
+idx = train_data['race'] != 'White'
+train_data['race'][idx] = 'Black'
+
+meta, X, y, output = df_to_RAI(train_data, target_column="income-per-year", normalize="Scalar", max_categorical_threshold=5)
+xTrain, xTest, yTrain, yTest = train_test_split(X, y, random_state=1, stratify=y)
+
+clf = RandomForestClassifier(n_estimators=10, criterion='entropy', random_state=0, min_samples_leaf=5, max_depth=2)
+clf.fit(xTrain, yTrain)
+predictions = clf.predict(xTest)
+probabilities = clf.predict_proba(xTest)
+
+
+def compute(executor=None, max_workers=None):
+    model = Model(agent=clf, output_features=output, name="test_classifier", predict_fun=clf.predict,
+                  predict_prob_fun=clf.predict_proba, model_class="Random Forest Classifier")
+    dataset = Dataset({"train": NumpyData(xTrain, yTrain), "test": NumpyData(xTest, yTest)})
+    ai = AISystem("AdultDB_Parallel", task='binary_classification', meta_database=meta, dataset=dataset, model=model,
+                  enable_certificates=False)
+    ai.initialize(user_config={"fairness": {"priv_group": {"race": {"privileged": 1, "unprivileged": 0}},
+                                            "protected_attributes": ["race"], "positive_label": 1},
+                               "time_complexity": "polynomial", "executor": executor, "max_workers": max_workers})
+    ai.compute({"test": {"predict": predictions, "predict_proba": probabilities}}, tag="Random Forest")
+    return ai.get_metric_values()["test"]
+
+
+sequential = compute()
+
+
+def assert_equal(expected, actual):
+    if isinstance(expected, dict):
+        assert expected.keys() == actual.keys()
+        for key in expected:
+            assert_equal(expected[key], actual[key])
+    elif isinstance(expected, (list, tuple)):
+        assert len(expected) == len(actual)
+        for a, b in zip(expected, actual):
+            assert_equal(a, b)
+    else:
+        assert expected == actual or (expected != expected and actual != actual)
+
+
+# The date changes between computes, and the estimators of the model are objects rather than computed values
+def without_date(metrics):
+    return {group: {name: value for name, value in values.items() if name not in ("date", "estimator_params")}
+            for group, values in metrics.items()}
+
+
+def test_thread_executor():
+    """Tests that metric groups computed on a thread pool have the values of a sequential compute."""
+    assert_equal(without_date(sequential), without_date(compute("thread", 4)))
+
+
+def test_process_executor():
+    """Tests that metric groups computed on a process pool have the values of a sequential compute."""
+    assert_equal(without_date(sequential), without_date(compute("process", 2)))
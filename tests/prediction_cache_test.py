@@ -0,0 +1,124 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import os
+import sys
+from RAI.dataset import Feature, NumpyData, MetaDatabase
+from RAI.AISystem import Model
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from tests.ai_system_utils import make_ai_system
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+use_dashboard = False
+np.random.seed(21)
+
+rng = np.random.default_rng(0)
+xTrain, xTest = rng.normal(size=(400, 3)), rng.normal(size=(200, 3))
+yTrain, yTest = (xTrain[:, 0] > 0).astype(int), (xTest[:, 0] > 0).astype(int)
+meta = MetaDatabase([Feature(f"x{i}", "numeric", f"Feature {i}") for i in range(3)])
+output = Feature("y", "numeric", "Label", categorical=True, values={0: "no", 1: "yes"})
+
+
+class CountingModel:
+    def __init__(self, agent):
+        self.agent = agent
+        self.calls = 0
+
+    def predict(self, X):
+        self.calls += 1
+        return self.agent.predict(X)
+
+
+# Each AISystem gets its own agent, as some tests retrain or replace it
+def make_ai(user_config=None):
+    agent = CountingModel(LogisticRegression().fit(xTrain, yTrain))
+    model = Model(agent=agent.agent, output_features=output, name="cache_classifier", predict_fun=agent.predict,
+                  model_class="Logistic Regression")
+    ai = make_ai_system("Cache_Test", model, meta, {"train": NumpyData(xTrain, yTrain), "test": NumpyData(xTest, yTest)},
+                        user_config=user_config)
+    return ai, agent
+
+
+def test_predictions_cached():
+    """Tests that run_compute and get_predictions reuse the outputs of the model."""
+    ai, agent = make_ai()
+    ai.run_compute()
+    ai.run_compute()
+    assert np.array_equal(ai.get_predictions("test"), agent.predict(xTest))
+    assert agent.calls == 3
+
+
+def test_fingerprint_once_per_compute():
+    """Tests that run_compute hashes the agent once for all its datasets and output types."""
+    ai, _ = make_ai()
+    hashes = []
+    fingerprint = ai.model.fingerprint
+    ai.model.fingerprint = lambda: hashes.append(1) or fingerprint()
+    ai.run_compute()
+    assert len(hashes) == 1
+
+
+def test_new_agent_runs_again():
+    """Tests that replacing the agent of the model runs the model again."""
+    ai, agent = make_ai()
+    ai.get_predictions("test")
+    fingerprint = ai.model.fingerprint()
+    agent.agent = LogisticRegression(C=0.01).fit(xTrain, 1 - yTrain)
+    ai.model.agent = agent.agent
+    assert ai.model.fingerprint() != fingerprint
+    assert np.array_equal(ai.get_predictions("test"), agent.agent.predict(xTest))
+    assert agent.calls == 2
+
+
+def test_retrain_in_place():
+    """Tests that retraining the agent in place runs the model again without any call to clear the cache."""
+    ai, agent = make_ai()
+    ai.run_compute()
+    before = ai.get_predictions("test")
+    accuracy = ai.get_metric_values()["test"]["performance_cl"]["accuracy"]
+    agent.agent.fit(xTrain, 1 - yTrain)
+    ai.run_compute()
+    assert np.array_equal(ai.get_predictions("test"), 1 - before)
+    assert np.isclose(ai.get_metric_values()["test"]["performance_cl"]["accuracy"], 1 - accuracy)
+    assert agent.calls == 4
+    assert len(ai._prediction_cache) == 2
+
+
+def test_infer_batches():
+    """Tests that batched inference returns the outputs of one call, on every executor."""
+    agent = LogisticRegression().fit(xTrain, yTrain)
+    model = Model(agent=agent, output_features=output, name="batched_classifier", predict_fun=agent.predict,
+                  predict_prob_fun=agent.predict_proba, model_class="Logistic Regression")
+    for executor in (None, "thread", "process"):
+        assert np.array_equal(model.infer("predict", xTest, batch_size=64, executor=executor), agent.predict(xTest))
+        assert np.array_equal(model.infer("predict_proba", xTest, batch_size=64, executor=executor, max_workers=2),
+                              agent.predict_proba(xTest))
+    listed = Model(agent=agent, output_features=output, name="list_classifier",
+                   predict_fun=lambda X: agent.predict(X).tolist(), model_class="Logistic Regression")
+    assert listed.infer("predict", xTest, batch_size=64) == agent.predict(xTest).tolist()
+
+
+def test_inference_config():
+    """Tests that user_config["inference"] sets the batch size of the model calls and can turn the cache off."""
+    ai, agent = make_ai({"inference": {"batch_size": 64, "executor": "thread"}})
+    assert np.array_equal(ai.get_predictions("test"), agent.agent.predict(xTest))
+    assert agent.calls == 4
+    ai, agent = make_ai({"inference": {"cache": False}})
+    ai.get_predictions("test")
+    ai.get_predictions("test")
+    assert agent.calls == 2
@@ -0,0 +1,103 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import os
+import sys
+import time
+import numpy as np
+import pytest
+from RAI.dataset import MemmapData
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+rng = np.random.default_rng(0)
+x = rng.normal(size=(1000, 4))
+y = rng.integers(0, 2, len(x))
+maps = {"scalar": [True, True, False, False], "categorical": [False, False, True, True]}
+
+
+class CountingData(MemmapData):
+    def __init__(self, *args, fail_at=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.reads = 0
+        self.fail_at = fail_at
+
+    def _batches(self):
+        for batch in super()._batches():
+            if self.reads == self.fail_at:
+                raise ValueError("unreadable batch")
+            self.reads += 1
+            yield batch
+
+
+def read_all(data):
+    batches = []
+    data.reset()
+    while data.next_batch():
+        batches.append((data.X.copy(), data.y.copy(), data.scalar.copy(), data.categorical.copy()))
+    return batches
+
+
+def test_prefetched_batches_match():
+    """Tests that batches read ahead on a background thread are the batches read on next_batch."""
+    for prefetch in (1, 3):
+        data = CountingData(x, y, batch_size=128, prefetch=prefetch)
+        data.initialize(maps)
+        expected = CountingData(x, y, batch_size=128)
+        expected.initialize(maps)
+        batches, expected_batches = read_all(data), read_all(expected)
+        assert len(batches) == len(expected_batches) == 8
+        for batch, expected_batch in zip(batches, expected_batches):
+            for value, expected_value in zip(batch, expected_batch):
+                assert np.array_equal(value, expected_value)
+        assert not data.next_batch()
+
+
+def test_read_ahead_is_bounded():
+    """Tests that the background thread reads at most prefetch batches ahead."""
+    data = CountingData(x, y, batch_size=10, prefetch=2)
+    data.initialize(maps)
+    data.reset()
+    assert data.next_batch()
+    time.sleep(0.3)
+    # One batch was consumed, two are queued and the thread may hold one more waiting for space
+    assert data.reads <= 4
+    data._prefetcher.close()
+
+
+def test_errors_raised_on_next_batch():
+    """Tests that an error reading a batch ahead is raised by next_batch."""
+    data = CountingData(x, y, batch_size=100, prefetch=2, fail_at=3)
+    data.initialize(maps)
+    data.reset()
+    for _ in range(3):
+        assert data.next_batch()
+    with pytest.raises(ValueError, match="unreadable batch"):
+        data.next_batch()
+    assert not data.next_batch()
+
+
+def test_reset_stops_thread():
+    """Tests that resetting the data stops the thread reading ahead from the previous pass."""
+    data = CountingData(x, y, batch_size=10, prefetch=2)
+    data.initialize(maps)
+    data.reset()
+    data.next_batch()
+    thread = data._prefetcher._thread
+    data.reset()
+    assert not thread.is_alive()
+    assert len(read_all(data)) == 100
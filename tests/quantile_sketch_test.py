@@ -0,0 +1,81 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import os
+import sys
+import numpy as np
+from RAI.utils.quantile_sketch import QuantileSketch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+rng = np.random.default_rng(0)
+data = np.column_stack([rng.normal(size=200000), rng.exponential(size=200000), rng.integers(0, 50, size=200000)])
+quantiles = [0.1, 0.25, 0.5, 0.75, 0.9]
+tolerance = 0.01
+
+
+# Largest distance between the rank of each estimated quantile and its target rank, as a fraction of the rows
+def rank_error(X, estimates):
+    errors = []
+    for q, estimate in zip(quantiles, estimates):
+        for column in range(X.shape[1]):
+            values = np.sort(X[:, column])
+            low = np.searchsorted(values, estimate[column], side="left") / len(values)
+            high = np.searchsorted(values, estimate[column], side="right") / len(values)
+            errors.append(max(low - q, q - high, 0))
+    return max(errors)
+
+
+def test_exact_before_compaction():
+    """Tests that a sketch holding every row returns the quantiles of np.quantile."""
+    sketch = QuantileSketch(k=200)
+    sketch.update(data[:100])
+    assert np.array_equal(sketch.quantile(quantiles), np.quantile(data[:100], quantiles, axis=0))
+
+
+def test_rank_error():
+    """Tests that the quantiles of a sketch built with a tolerance are within that rank error, in bounded memory."""
+    sketch = QuantileSketch.with_tolerance(tolerance, seed=0)
+    for start in range(0, len(data), 10000):
+        sketch.update(data[start:start + 10000])
+    assert sketch.n == len(data)
+    assert len(sketch) < len(data) / 20
+    assert rank_error(data, sketch.quantile(quantiles)) <= tolerance
+
+
+def test_merge():
+    """Tests that merging the sketches of shards keeps the rank error of one sketch of all rows."""
+    shards = np.array_split(data, 4)
+    sketches = [QuantileSketch.with_tolerance(tolerance, seed=i) for i in range(len(shards))]
+    for sketch, shard in zip(sketches, shards):
+        sketch.update(shard)
+    merged = sketches[0]
+    for sketch in sketches[1:]:
+        merged.merge(sketch)
+    assert merged.n == len(data)
+    assert rank_error(data, merged.quantile(quantiles)) <= tolerance
+
+
+def test_nan_and_empty():
+    """Tests that columns containing NaN have NaN quantiles and that an empty sketch has none."""
+    assert QuantileSketch().quantile(0.5) is None
+    X = data[:1000].copy()
+    X[3, 1] = np.nan
+    sketch = QuantileSketch()
+    sketch.update(X)
+    median = sketch.quantile(0.5)
+    assert np.isnan(median[1]) and not np.isnan(median[0])
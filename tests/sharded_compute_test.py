@@ -0,0 +1,109 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import os
+import sys
+from RAI.dataset import NumpyData, MemmapData, Dataset
+from RAI.AISystem import AISystem, Model
+from RAI.utils import df_to_RAI
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+use_dashboard = False
+np.random.seed(21)
+
+data_path = "../data/adult/"
+train_data = pd.read_csv(data_path + "train.csv", header=0,
+                         skipinitialspace=True, na_values="?")
+idx = train_data['race'] != 'White'
+train_data['race'][idx] = 'Black'
+
+meta, X, y, output = df_to_RAI(train_data, target_column="income-per-year", normalize="Scalar", max_categorical_threshold=5)
+xTrain, xTest, yTrain, yTest = train_test_split(X, y, random_state=1, stratify=y)
+
+clf = RandomForestClassifier(n_estimators=10, criterion='entropy', random_state=0, min_samples_leaf=5, max_depth=2)
+clf.fit(xTrain, yTrain)
+predictions = clf.predict(xTest)
+groups = ["metadata", "performance_cl", "group_fairness", "dataset_fairness", "prediction_fairness",
+          "individual_fairness", "frequency_stats", "stat_moment_group"]
+# Consistency compares each row to its nearest neighbours, so it is only reported by compute
+row_metrics = {"consistency", "date"}
+
+
+def compute(test_data, parallelism=None, stats=None):
+    model = Model(agent=clf, output_features=output, name="test_classifier", predict_fun=clf.predict,
+                  predict_prob_fun=clf.predict_proba, model_class="Random Forest Classifier")
+    dataset = Dataset({"train": NumpyData(xTrain, yTrain), "test": test_data})
+    ai = AISystem("AdultDB_Sharded", task='binary_classification', meta_database=meta, dataset=dataset, model=model,
+                  enable_certificates=False)
+    ai.initialize(user_config={"fairness": {"priv_group": {"race": {"privileged": 1, "unprivileged": 0}},
+                                            "protected_attributes": ["race"], "positive_label": 1},
+                               "time_complexity": "polynomial", "stats": stats or {}})
+    ai.compute({"test": {"predict": predictions}}, tag="Random Forest", parallelism=parallelism)
+    return ai.get_metric_values()["test"]
+
+
+sequential = compute(NumpyData(xTest, yTest))
+
+
+def assert_close(expected, actual):
+    if isinstance(expected, dict):
+        assert expected.keys() == actual.keys()
+        for key in expected.keys() - row_metrics:
+            assert_close(expected[key], actual[key])
+    elif expected is None:
+        assert actual is None
+    elif isinstance(expected, (int, float, np.number)) and not isinstance(expected, bool):
+        assert np.isclose(expected, actual, equal_nan=True)
+
+
+def test_sharded_rows():
+    """Tests that merging the states of blocks of rows computed in other processes gives the values of compute."""
+    sharded = compute(NumpyData(xTest, yTest), parallelism=3)
+    for group in groups:
+        assert_close(sequential[group], sharded[group])
+
+
+def test_sharded_batches():
+    """Tests that the batches of a MemmapData are computed as shards with the values of compute."""
+    sharded = compute(MemmapData(xTest, yTest, batch_size=1000), parallelism=2)
+    for group in groups:
+        assert_close(sequential[group], sharded[group])
+
+
+def test_summary_stats():
+    """Tests that without a quantile tolerance the summary statistics under parallelism are those of compute."""
+    sharded = compute(NumpyData(xTest, yTest), parallelism=3)
+    for metric in ["mean", "standard_deviation", "min", "max", "sem", "skew", "kurtosis", "variation",
+                   "num_nan_rows", "frozen_mean_mean", "kstat_2", "kstatvar"]:
+        assert_close(sequential["summary_stats"][metric], sharded["summary_stats"][metric])
+    for metric in ["median", "quantile_1", "quantile_3", "iqr"]:
+        assert sharded["summary_stats"][metric] == sequential["summary_stats"][metric]
+
+
+def test_summary_stats_tolerance():
+    """Tests that with a quantile tolerance the summary statistics of the shards are merged within the tolerance."""
+    tolerance = 0.01
+    test_data = NumpyData(xTest, yTest)
+    sharded = compute(test_data, parallelism=3, stats={"quantile_tolerance": tolerance})
+    assert_close(sequential["summary_stats"]["mean"], sharded["summary_stats"]["mean"])
+    medians = [median for median in sharded["summary_stats"]["median"].values() if median is not None]
+    for column, median in zip(test_data.scalar.T, medians):
+        assert np.mean(column < median) - tolerance <= 0.5 <= np.mean(column <= median) + tolerance
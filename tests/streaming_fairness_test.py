@@ -0,0 +1,107 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import os
+import sys
+from RAI.dataset import NumpyData, MemmapData
+from RAI.AISystem import Model
+from RAI.utils import df_to_RAI
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.ensemble import RandomForestClassifier
+from tests.ai_system_utils import make_ai_system
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+use_dashboard = False
+np.random.seed(21)
+
+data_path = "../data/adult/"
+train_data = pd.read_csv(data_path + "train.csv", header=0,
+                         skipinitialspace=True, na_values="?")
+test_data = pd.read_csv(data_path + "test.csv", header=0,
+                        skipinitialspace=True, na_values="?")
+
+all_data = pd.concat([train_data, test_data], ignore_index=True)
+idx = all_data['race'] != 'White'
+all_data['race'][idx] = 'Black'
+
+meta, X, y, output = df_to_RAI(all_data, target_column="income-per-year", normalize="Scalar", max_categorical_threshold=5)
+xTrain, xTest, yTrain, yTest = train_test_split(X, y, random_state=1, stratify=y)
+
+clf = RandomForestClassifier(n_estimators=10, criterion='entropy', random_state=0, min_samples_leaf=5, max_depth=2)
+clf.fit(xTrain, yTrain)
+predictions = clf.predict(xTest)
+model = Model(agent=clf, output_features=output, name="test_classifier", predict_fun=clf.predict,
+              predict_prob_fun=clf.predict_proba, model_class="Random Forest Classifier")
+train = NumpyData(xTrain, yTrain)
+
+configuration = {"fairness": {"priv_group": {"race": {"privileged": 1, "unprivileged": 0}},
+                              "protected_attributes": ["race"], "positive_label": 1},
+                 "time_complexity": "polynomial"}
+groups = ["group_fairness", "dataset_fairness", "prediction_fairness", "individual_fairness",
+          "frequency_stats"]
+batch_size = 2000
+# Consistency compares each row to its nearest neighbours, so it is only reported by compute
+row_metrics = {"consistency"}
+
+
+ai = make_ai_system("AdultDB_Stream", model, meta, {"train": train, "test": NumpyData(xTest, yTest)},
+                    user_config=configuration)
+ai.compute({"test": {"predict": predictions}}, tag="Random Forest")
+metrics = ai.get_metric_values()["test"]
+
+for start in range(0, len(xTest), batch_size):
+    ai.update(xTest[start:start + batch_size], yTest[start:start + batch_size],
+              {"predict": predictions[start:start + batch_size]})
+update_metrics = ai.get_metric_values()["update"]
+
+batch_data = MemmapData(xTest, yTest, batch_size=batch_size)
+batch_ai = make_ai_system("AdultDB_Batches", model, meta, {"train": train, "test": batch_data},
+                          user_config=configuration)
+batch_ai.compute({"test": {"predict": predictions}}, tag="Random Forest")
+batch_metrics = batch_ai.get_metric_values()["test"]
+
+
+def assert_close(expected, actual):
+    if isinstance(expected, dict):
+        assert expected.keys() == actual.keys()
+        for key in expected.keys() - row_metrics:
+            assert_close(expected[key], actual[key])
+    elif expected is None:
+        assert actual is None
+    elif isinstance(expected, (int, float, np.number)) and not isinstance(expected, bool):
+        assert np.isclose(expected, actual, equal_nan=True)
+
+
+def test_update_groups():
+    """Tests that the fairness and frequency groups keep a value when samples are folded in with update."""
+    for group in groups:
+        assert group in update_metrics
+
+
+def test_update_matches_compute():
+    """Tests that folding the test set in with update gives the fairness and frequency values of compute."""
+    for group in groups:
+        assert_close(metrics[group], update_metrics[group])
+
+
+def test_batches_match_compute():
+    """Tests that the fairness and frequency groups compute the same values from batches of a MemmapData."""
+    for group in groups:
+        assert group in batch_metrics
+        assert_close(metrics[group], batch_metrics[group])
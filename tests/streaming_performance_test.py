@@ -0,0 +1,75 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import os
+import sys
+from RAI.dataset import Feature, NumpyData, MetaDatabase
+from RAI.AISystem import Model
+from RAI.metrics.performance.performance_cl import batch_confusion, merge_confusion
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, confusion_matrix, f1_score
+from tests.ai_system_utils import make_ai_system
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+rng = np.random.default_rng(0)
+x = rng.normal(size=(3000, 4))
+y = np.digitize(x[:, 0] + 0.5 * rng.normal(size=len(x)), [-1, 0, 1])
+clf = LogisticRegression(max_iter=1000).fit(x, y)
+predictions = clf.predict(x)
+batch_size = 400
+meta = MetaDatabase([Feature(f"x{i}", "numeric", f"Feature {i}") for i in range(x.shape[1])])
+output = Feature("y", "numeric", "Label", categorical=True, values={i: str(i) for i in range(4)})
+model = Model(agent=clf, output_features=output, name="classifier", predict_fun=clf.predict,
+              predict_prob_fun=clf.predict_proba, model_class="Logistic Regression")
+
+
+def test_batch_confusion():
+    """Tests that the confusion matrix of a batch matches sklearn for integer and string labels."""
+    classes, confusion = batch_confusion(y, predictions)
+    assert np.array_equal(confusion, confusion_matrix(y, predictions, labels=classes))
+    labels, predicted_labels = np.array(list("abcd"))[y], np.array(list("abcd"))[predictions]
+    classes, confusion = batch_confusion(labels, predicted_labels)
+    assert list(classes) == ["a", "b", "c", "d"]
+    assert np.array_equal(confusion, confusion_matrix(labels, predicted_labels, labels=classes))
+
+
+def test_merge_confusion_label_sets():
+    """Tests that merging batches that saw different labels gives the confusion matrix of all the rows."""
+    labels, predicted_labels = np.array(list("abcd"))[y], np.array(list("abcd"))[predictions]
+    order = np.argsort(y, kind="stable")
+    classes, confusion = None, None
+    for part in np.array_split(order, 5):
+        classes, confusion = merge_confusion(classes, confusion, *batch_confusion(labels[part], predicted_labels[part]))
+    assert np.array_equal(confusion, confusion_matrix(labels, predicted_labels, labels=classes))
+
+
+def test_update_matches_compute():
+    """Tests that streaming the rows through update gives the same values as compute and sklearn."""
+    ai = make_ai_system("Performance_Compute", model, meta, {"test": NumpyData(x, y)}, task="classification")
+    ai.compute({"test": {"predict": predictions}})
+    computed = ai.get_metric_values()["test"]["performance_cl"]
+    streamed_ai = make_ai_system("Performance_Stream", model, meta, {"test": NumpyData(x, y)}, task="classification")
+    for start in range(0, len(x), batch_size):
+        streamed_ai.update(x[start:start + batch_size], y[start:start + batch_size],
+                           {"predict": predictions[start:start + batch_size]})
+    streamed = streamed_ai.get_metric_values()["update"]["performance_cl"]
+    assert computed["accuracy"] == accuracy_score(y, predictions)
+    assert np.allclose(computed["f1_avg"], f1_score(y, predictions, average="macro"))
+    for name, value in computed.items():
+        assert np.allclose(streamed[name], value), name
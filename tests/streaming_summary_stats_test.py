@@ -0,0 +1,82 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import os
+import sys
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from RAI.AISystem import Model
+from RAI.dataset import Feature, NumpyData, MetaDatabase
+from tests.ai_system_utils import make_ai_system
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+rng = np.random.default_rng(0)
+x = np.column_stack([rng.normal(size=3000), rng.exponential(size=3000) + 1, rng.uniform(1, 5, size=3000)])
+y = (x[:, 0] > 0).astype(int)
+clf = LogisticRegression().fit(x, y)
+meta = MetaDatabase([Feature(f"x{i}", "numeric", f"Feature {i}") for i in range(x.shape[1])])
+output = Feature("y", "numeric", "Label", categorical=True, values={0: "no", 1: "yes"})
+model = Model(agent=clf, output_features=output, name="classifier", predict_fun=clf.predict,
+              predict_prob_fun=clf.predict_proba, model_class="Logistic Regression")
+batch_size = 250
+# Quantiles come from a sketch with a bounded rank error, and the mode can not be computed from streaming state
+streamed_metrics = ["mean", "covariance", "num_nan_rows", "percent_nan_rows", "geometric_mean", "kurtosis", "skew",
+                    "kstat_1", "kstat_2", "kstat_3", "kstat_4", "kstatvar", "variation", "min", "max",
+                    "standard_deviation", "sem", "bayes_mean", "bayes_variance",
+                    "bayes_std", "frozen_mean_mean", "frozen_variance_mean", "frozen_std_std"]
+
+
+computed_ai = make_ai_system("Stats_Compute", model, meta, {"test": NumpyData(x, y)})
+computed_ai.compute({"test": {"predict": clf.predict(x)}})
+computed = computed_ai.get_metric_values()["test"]
+
+streamed_ai = make_ai_system("Stats_Stream", model, meta, {"test": NumpyData(x, y)})
+for start in range(0, len(x), batch_size):
+    streamed_ai.update(x[start:start + batch_size], y[start:start + batch_size],
+                       {"predict": clf.predict(x[start:start + batch_size])})
+streamed = streamed_ai.get_metric_values()["update"]
+
+
+# Metrics are exported per feature, as a dict of numbers or of (low, high) intervals
+def as_array(value):
+    if isinstance(value, dict):
+        value = list(value.values())
+    return np.asarray(value, dtype=np.float64)
+
+
+def test_summary_stats_updates():
+    """Tests that summary statistics folded in batch by batch match those of compute."""
+    for name in streamed_metrics:
+        assert np.allclose(as_array(streamed["summary_stats"][name]), as_array(computed["summary_stats"][name]),
+                           equal_nan=True), name
+    assert streamed["summary_stats"]["mode"] is None
+
+
+def test_quantile_updates():
+    """Tests that the streamed quartiles are within the rank error of the sketch."""
+    for name, q in [("quantile_1", 0.25), ("median", 0.5), ("quantile_3", 0.75)]:
+        ranks = np.mean(x <= as_array(streamed["summary_stats"][name]), axis=0)
+        assert np.all(np.abs(ranks - q) <= 0.01), name
+    assert np.allclose(as_array(streamed["summary_stats"]["iqr"]),
+                       as_array(streamed["summary_stats"]["quantile_3"]) - as_array(streamed["summary_stats"]["quantile_1"]))
+
+
+def test_moments_updates():
+    """Tests that the central moments folded in batch by batch match those of compute."""
+    for name, value in computed["stat_moment_group"].items():
+        assert np.allclose(as_array(streamed["stat_moment_group"][name]), as_array(value)), name
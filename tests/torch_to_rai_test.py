@@ -0,0 +1,91 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import os
+import sys
+import numpy as np
+import pytest
+
+# Some torch builds crash importing torchvision after tensorflow, which aif360.metrics loads in the fairness tests
+if "tensorflow" in sys.modules and "torchvision" not in sys.modules:
+    pytest.skip("torchvision can not be imported after tensorflow", allow_module_level=True)
+torch = pytest.importorskip("torch")
+pytest.importorskip("torchvision")
+from torch.utils.data import DataLoader, Dataset, IterableDataset  # noqa: E402
+from RAI.utils import torch_to_RAI  # noqa: E402
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+images = torch.from_numpy(np.random.default_rng(0).random((50, 3, 4, 4)).astype(np.float32))
+labels = torch.arange(50) % 3
+
+
+class ImageDataset(Dataset):
+    def __init__(self):
+        self.transform = lambda image: image
+        self.reads = 0
+
+    def __len__(self):
+        return len(images)
+
+    def __getitem__(self, i):
+        self.reads += 1
+        return self.transform(images[i]), labels[i]
+
+
+class ImageStream(IterableDataset):
+    def __init__(self):
+        self.transform = lambda image: image
+
+    def __iter__(self):
+        return ((self.transform(images[i]), labels[i]) for i in range(len(images)))
+
+
+def test_loader_conversion():
+    """Tests that the batches of a DataLoader become one image column per row, with their labels."""
+    x, y, raw_x = torch_to_RAI(DataLoader(ImageDataset(), batch_size=8))
+    assert x.shape == (50, 1, 3, 4, 4)
+    assert np.array_equal(x[:, 0], images.numpy())
+    assert y == labels.tolist()
+    assert np.array_equal(raw_x.numpy(), images.numpy())
+
+
+def test_max_size_stops_reading():
+    """Tests that the conversion keeps max_size rows and stops reading the loader once it has them."""
+    dataset = ImageDataset()
+    x, y, _ = torch_to_RAI(DataLoader(dataset, batch_size=8), max_size=20)
+    assert x.shape[0] == 20 and len(y) == 20
+    assert np.array_equal(x[:, 0], images[:20].numpy())
+    assert dataset.reads == 24
+
+
+def test_unknown_length_and_drop_last():
+    """Tests loaders whose number of rows is unknown and loaders dropping their last batch."""
+    x, y, _ = torch_to_RAI(DataLoader(ImageStream(), batch_size=8))
+    assert np.array_equal(x[:, 0], images.numpy()) and y == labels.tolist()
+    x, y, _ = torch_to_RAI(DataLoader(ImageStream(), batch_size=8), max_size=30)
+    assert np.array_equal(x[:, 0], images[:30].numpy()) and len(y) == 30
+    x, y, _ = torch_to_RAI(DataLoader(ImageDataset(), batch_size=8, drop_last=True))
+    assert np.array_equal(x[:, 0], images[:48].numpy()) and y == labels[:48].tolist()
+
+
+def test_memmap_path(tmp_path):
+    """Tests that the rows can be written to a memory mapped .npy file."""
+    path = str(tmp_path / "x.npy")
+    x, _, _ = torch_to_RAI(DataLoader(ImageDataset(), batch_size=8), memmap_path=path)
+    assert isinstance(x, np.memmap)
+    assert np.array_equal(np.load(path)[:, 0], images.numpy())
@@ -0,0 +1,69 @@
+# Copyright 2022 Cisco Systems, Inc. and its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+
+import json
+import os
+import sys
+import numpy as np
+import pytest
+from RAIShared.value_codec import ENCODINGS, encode_value, decode_value
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+pytest.importorskip("msgpack")
+pytest.importorskip("zstandard")
+
+rng = np.random.default_rng(0)
+value = {
+    "metadata": {"sample_count": 200, "date": "2022-01-01 00:00:00", "model": None},
+    "performance_cl": {"accuracy": 0.75, "confusion_matrix": rng.integers(0, 50, size=(20, 20)).tolist(),
+                       "precision_list": [0.5, None] + rng.random(30).tolist()},
+    "summary_stats": {"mean": {"x0": np.float64(0.25), "x1": np.float32(1.5)}, "matrix": rng.normal(size=(40, 3))},
+    "frequency_stats": {"values": {1: 0.5, 2: 0.5}, "short": [1, 2, 3], "labels": ["a"] * 20},
+    "flags": [True, False] * 10,
+}
+# The values of a JSON round trip, which every encoding must return
+expected = json.loads(json.dumps(value, default=lambda x: x.tolist() if hasattr(x, "tolist") else x.item()))
+
+
+def test_round_trip():
+    """Tests that every encoding decodes to the values of a JSON round trip."""
+    for encoding in ENCODINGS:
+        assert decode_value(encode_value(value if encoding != "json" else expected, encoding)) == expected
+
+
+def test_binary_format():
+    """Tests that binary encodings are tagged bytes, and that compression makes wide matrices smaller."""
+    matrix = {"matrix": rng.normal(size=(200, 200))}
+    msgpack = encode_value(matrix, "msgpack")
+    assert isinstance(msgpack, bytes) and msgpack.startswith(b"RAIm")
+    assert len(msgpack) < len(encode_value(matrix["matrix"].tolist(), "json"))
+    zeros = {"matrix": np.zeros((200, 200))}
+    zstd = encode_value(zeros, "msgpack+zstd")
+    assert zstd.startswith(b"RAIz")
+    assert len(zstd) < len(encode_value(zeros, "msgpack")) // 10
+
+
+def test_json_rows():
+    """Tests that JSON rows are decoded whether they are read as text or bytes."""
+    assert decode_value('{"a": [1, null]}') == {"a": [1, None]}
+    assert decode_value(b'{"a": [1, null]}') == {"a": [1, None]}
+
+
+def test_unknown_encoding():
+    """Tests that values with an unknown encoding byte are rejected."""
+    with pytest.raises(ValueError):
+        decode_value(b"RAIx" + b"\x00")